@@ -6,7 +6,7 @@ Built with Vue.js 3 + Element Plus for modern UI development.
 """
 
 from .core.app import App
-from .core.component import Component, ElementComponent, HtmlComponent
+from .core.component import Component, ElementComponent, HtmlComponent, Memo
 from .components import *
 
 __version__ = "3.0.0"
@@ -18,6 +18,7 @@ __all__ = [
     'Component', 
     'ElementComponent',
     'HtmlComponent',
+    'Memo',
     # Components
     'Button', 'Input', 'Text', 'Title', 'Card', 'Layout',
     'Row', 'Col', 'Space', 'Divider'
@@ -3,8 +3,10 @@ Core module for Litchi 0.3.1
 """
 
 from .app import App
-from .component import Component, ElementComponent, HtmlComponent
+from .backends import StateBackend, SQLiteBackend, SharedMemoryBackend
+from .component import Component, ElementComponent, HtmlComponent, Memo
 from .renderer import Renderer
+from .session import SessionStore
 from .state import StateManager
 
 __all__ = [
@@ -12,6 +14,11 @@ __all__ = [
     'Component',
     'ElementComponent', 
     'HtmlComponent',
+    'Memo',
     'Renderer',
+    'SharedMemoryBackend',
+    'SQLiteBackend',
+    'StateBackend',
+    'SessionStore',
     'StateManager'
 ]
@@ -2,18 +2,52 @@
 Core application class for Litchi 0.3.1
 """
 
-from typing import Any, Dict, List, Optional, Callable, Union
-from flask import Flask, render_template_string, request, jsonify
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Callable, Tuple, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import Flask, Response, render_template_string, request, send_file, session, has_request_context, stream_with_context
+import atexit
 import os
 import json
+import hashlib
+import threading
+import time
 import traceback
+import uuid
 from datetime import datetime
 from pathlib import Path
 
+try:
+    from flask_sock import Sock
+except ImportError:
+    Sock = None
+
 from .renderer import Renderer
+from . import serialization
+from .assets import ASSET_URL_PATH, BUILD_DIR, AssetManifest
+from .backends import StateBackend
+from .broadcast import BroadcastHub
+from .bundler import build_element_plus, collect_components
+from .cache import CachedPage, PageCache
+from .compression import CODINGS, Compressor
+from .compiler import empty_reads, find_static_nodes, perturbed_state
+from .component import assign_ids, memo_cache
+from .diff import diff_tree
+from .handlers import HandlerBinder
+from .push import PushRegistry
+from .session import ReplayLog, SessionStore
 from .state import StateManager
 
 
+# State a build in the current context reads instead of the app's own, as
+# (app, state) (see App._building_with)
+_build_state: ContextVar[Optional[Tuple['App', StateManager]]] = ContextVar('litchi_build_state', default=None)
+
+# Session renders in the current context run for outside of its requests,
+# as (app, session ID) (see App._rendering_for)
+_render_session: ContextVar[Optional[Tuple['App', str]]] = ContextVar('litchi_render_session', default=None)
+
+
 class App:
     """
     Main application class for Litchi 0.3.1
@@ -25,15 +59,169 @@ class App:
         self,
         name: str = "LitchiApp",
         debug: bool = False,
+        session_state: bool = False,
+        max_sessions: int = 1000,
+        session_ttl: Optional[float] = 3600,
+        state_backend: Optional[StateBackend] = None,
+        id_mode: str = 'uuid',
+        live_updates: bool = False,
+        encoding: str = 'pretty',
+        json_encoder: Optional[Callable[..., str]] = None,
+        stream: bool = False,
+        ssr: bool = False,
+        page_cache: bool = False,
+        etag: Optional[str] = None,
+        cache_control: Optional[str] = None,
+        compression: bool = False,
+        compression_min_size: int = 1024,
+        assets: str = 'cdn',
+        server_push: bool = False,
+        broadcast_tick: float = 0.05,
+        topics: Optional[Iterable[str]] = None,
+        websocket: bool = False,
         **kwargs
     ):
-        """Initialize Litchi application"""
+        """
+        Initialize Litchi application
+        
+        Args:
+            name: Application name
+            debug: Enable debug mode
+            session_state: Give every browser session its own state
+            max_sessions: Maximum number of session states kept in memory
+            session_ttl: Idle seconds before a session state is dropped
+            state_backend: Shared state backend, so several worker processes
+                           can serve the app (see litchi.core.backends);
+                           with session_state it must support namespaces.
+                           Implies id_mode='path', so any worker finds the
+                           components events are sent for
+            id_mode: How components without an explicit id get one:
+                     'uuid' (random per instance) or 'path' (derived from
+                     tree position and ``key``, stable across renders)
+            live_updates: After each event, re-run build() and send the
+                          client a JSON Patch against the tree it shows
+                          instead of requiring reloads. Implies id_mode='path'.
+            encoding: Wire encoding of the component configuration in the
+                      page: 'pretty', 'compact' or 'packed' (see Renderer)
+            json_encoder: Custom JSON encoder ``(obj, indent=False) -> str``
+                          for pages, API responses, StateManager.to_json()
+                          and the state backend (see Renderer)
+            stream: Stream the page, sending the head before build() runs
+            ssr: Send server-rendered HTML that the client hydrates (native
+                 HTML components, with stand-ins for cards, rows, columns
+                 and containers; see litchi.core.ssr)
+            page_cache: Reuse the rendered page until a state key that
+                        build() read is written or the context changes.
+                        build() must then depend only on state and context.
+            etag: Validate page requests so unchanged pages get a 304:
+                  'state' (tag the state and context versions and answer
+                  without rendering; build() must depend only on state and
+                  context) or 'content' (tag a hash of the rendered page).
+                  Both imply id_mode='path', so a page kept by the browser
+                  has the IDs the server still dispatches events by
+            cache_control: Cache-Control header for pages; defaults to
+                           'no-cache' (always revalidate) with etag set
+            compression: gzip (or brotli, if installed) the page and API
+                         responses for clients that accept it
+            compression_min_size: Smallest response in bytes to compress
+            assets: Where pages load Vue, Element Plus and axios from:
+                    'cdn' (development builds from unpkg) or 'local'
+                    (production builds from the package's static/ folder,
+                    cached as immutable; see litchi.core.assets)
+            server_push: Keep a Server-Sent Events stream open to each page
+                         so the server can push updates (see push()).
+                         Implies id_mode='path', so pushed re-renders
+                         diff against the tree each page shows
+            broadcast_tick: Seconds broadcast state changes are collected
+                            for before being sent (see broadcast_state())
+            topics: State key prefixes the pages subscribe to for
+                    broadcasts; None receives every broadcast key
+            websocket: Send events over one WebSocket per page instead of
+                       an HTTP request each, falling back to HTTP while it
+                       is not connected (requires flask-sock)
+        """
+        if id_mode not in ('uuid', 'path'):
+            raise ValueError(f"Invalid id_mode: {id_mode!r}")
+        if assets not in ('cdn', 'local'):
+            raise ValueError(f"Invalid assets: {assets!r}")
+        if etag not in (None, 'state', 'content'):
+            raise ValueError(f"Invalid etag: {etag!r}")
+        if etag == 'content' and stream:
+            raise ValueError("etag='content' needs the whole page and cannot be used with stream=True")
+        if session_state and state_backend is not None and not state_backend.supports_namespaces:
+            raise ValueError(
+                f"{type(state_backend).__name__} cannot hold per-session states; "
+                "use SQLiteBackend with session_state=True"
+            )
+        
         self.name = name
         self.debug = debug
+        self.id_mode = (
+            'path' if live_updates or etag is not None or state_backend is not None or server_push
+            else id_mode
+        )
+        self.live_updates = live_updates
+        self.stream = stream
+        self.etag = etag
+        self.topics = tuple(topics) if topics is not None else None
+        self.websocket = websocket and Sock is not None
+        if websocket and Sock is None:
+            print("⚠️ flask-sock is not installed, events are sent over HTTP")
+        self.cache_control = cache_control if cache_control is not None or etag is None else 'no-cache'
+        
+        # State versions restart with the process, so 'state' tags include
+        # a per-process token and never match pages of an earlier process
+        self._process_token = uuid.uuid4().hex
         
         # Core components
-        self.renderer = Renderer()
-        self.state = StateManager()
+        self.assets = AssetManifest(local=assets == 'local', build_dir=BUILD_DIR / name)
+        self.renderer = Renderer(encoding=encoding, json_encoder=json_encoder, ssr=ssr, assets=self.assets)
+        self._state_backend = state_backend
+        if state_backend is not None and state_backend.json_encoder is None:
+            state_backend.json_encoder = json_encoder
+        self._state = self._create_state(state_backend)
+        
+        # Per-session states, seeded from the app-level state
+        self._sessions: Optional[SessionStore] = None
+        if session_state:
+            self._sessions = SessionStore(
+                self._create_session_state,
+                max_sessions=max_sessions,
+                ttl=session_ttl,
+                on_evict=lambda session_id, state: state.flush()
+            )
+        
+        # Last tree sent to each session, for live update and push diffs,
+        # and a lock per session so its diffs follow each other
+        self._rendered_trees = SessionStore(
+            lambda session_id: None,
+            max_sessions=max_sessions,
+            ttl=session_ttl
+        )
+        self._render_locks = SessionStore(
+            lambda session_id: threading.Lock(),
+            max_sessions=max_sessions,
+            ttl=session_ttl
+        )
+        
+        # Rendered pages by session (or '' for a shared state)
+        self._page_cache: Optional[PageCache] = None
+        if page_cache:
+            self._page_cache = PageCache(max_sessions=max_sessions, ttl=session_ttl)
+        
+        # Response compression
+        self._compressor: Optional[Compressor] = None
+        if compression:
+            self._compressor = Compressor(min_size=compression_min_size)
+        
+        # Pages connected for server push
+        self._push: Optional[PushRegistry] = None
+        self._hub: Optional[BroadcastHub] = None
+        if server_push:
+            self._push = PushRegistry(self.renderer.dumps)
+            self._hub = BroadcastHub(self._push.encode, tick=broadcast_tick, render=self._render_sessions)
+        self._broadcast_prefixes: List[str] = []
+        self._broadcast_watchers: List[Callable] = []
         
         # Flask app instance (created lazily)
         self._flask_app: Optional[Flask] = None
@@ -42,13 +230,39 @@ class App:
         self._components: List[Any] = []
         
         # Event handlers
-        self._event_handlers: Dict[str, Callable] = {}
+        self._event_handlers: Dict[str, HandlerBinder] = {}
+        
+        # Component ID to event handler mapping of the last build, per
+        # session (each visitor's page has its own IDs and handlers), and
+        # for builds outside of a request
+        self._session_handlers = SessionStore(
+            lambda session_id: {},
+            max_sessions=max_sessions,
+            ttl=session_ttl
+        )
+        self._app_handlers: Dict[str, Dict[str, HandlerBinder]] = {}
+        
+        # Responses of recent event batches per session by batch ID, so a
+        # batch resent over HTTP after its WebSocket dropped runs only once
+        # however busy other sessions are
+        self._batches = SessionStore(
+            lambda session_id: ReplayLog(size=64),
+            max_sessions=max_sessions,
+            ttl=session_ttl
+        )
         
-        # Component ID to event handler mapping
-        self._component_handlers: Dict[str, Dict[str, Callable]] = {}
+        # on_<event> method handlers, resolved on first use (misses are not
+        # cached, since event names come from the client)
+        self._method_handlers: Dict[str, HandlerBinder] = {}
         
         # Global context
         self._context: Dict[str, Any] = {}
+        self._context_version = 0
+        
+        # Lifecycle
+        self._setup_lock = threading.Lock()
+        self._setup_done = False
+        self._torn_down = False
     
     def build(self) -> Union[Any, List[Any]]:
         """
@@ -65,18 +279,153 @@ class App:
         """
         Setup hook called before app starts
         
+        Runs once per process: at startup in run(), or on the first request
+        when served by a WSGI server.
+        
         Override this method to initialize resources, connect to databases, etc.
         """
         pass
     
+    def before_request(self) -> None:
+        """
+        Per-request hook called before each page render and API call
+        
+        Override this method to prepare request-scoped resources.
+        """
+        pass
+    
     def teardown(self) -> None:
         """
         Teardown hook called when app stops
         
+        Called once when run() returns or the worker process exits.
+        
         Override this method to cleanup resources.
         """
         pass
     
+    def _ensure_setup(self) -> None:
+        """Call setup() once per process and schedule teardown() at exit"""
+        if self._setup_done:
+            return
+        with self._setup_lock:
+            if self._setup_done:
+                return
+            self.setup()
+            self._seed_state()
+            self._setup_done = True
+            atexit.register(self._shutdown)
+    
+    def _seed_state(self) -> None:
+        """
+        Write the app-level state set up so far to a new shared backend
+        
+        Values set in __init__ and setup() are defaults, like the seed of
+        a session state: they only reach the backend if it has never been
+        written. Otherwise this process drops them for the shared values,
+        so a starting worker does not reset the state of the others.
+        """
+        if self._state_backend is None:
+            return
+        if self._state_backend.version() == 0:
+            self._state.flush()
+        else:
+            self._state.revert()
+    
+    def _shutdown(self) -> None:
+        """Call teardown() once, if setup() ran"""
+        with self._setup_lock:
+            if not self._setup_done or self._torn_down:
+                return
+            self._torn_down = True
+        if self._push is not None:
+            self._hub.close()
+            self._push.close()
+        self.teardown()
+    
+    # ==================== State Management ====================
+    
+    @property
+    def state(self) -> StateManager:
+        """
+        Current state manager
+        
+        With session state enabled this resolves to the state of the
+        session handling the current request. Outside of a request (e.g.
+        in __init__) it is the app-level state new sessions start from,
+        with a copy of its values and watchers.
+        """
+        override = _build_state.get()
+        if override is not None and override[0] is self:
+            return override[1]
+        if self._sessions is not None:
+            session_id = self._session_id()
+            if session_id is not None:
+                return self._sessions.get(session_id)
+        return self._state
+    
+    @state.setter
+    def state(self, value: StateManager) -> None:
+        self._state = value
+    
+    def _create_state(self, backend: Optional[StateBackend]) -> StateManager:
+        """
+        Create a state manager
+        
+        Backend-backed states sync at the start of each request and flush
+        at its end, so reads inside a request never leave the process.
+        """
+        if backend is None:
+            return StateManager(json_encoder=self.renderer.json_encoder)
+        return StateManager(
+            backend=backend,
+            flush_interval=None,
+            sync_interval=None,
+            json_encoder=self.renderer.json_encoder
+        )
+    
+    def _create_session_state(self, session_id: str) -> StateManager:
+        """Create the state for a new session"""
+        if self._state_backend is None:
+            state = self._state.copy()
+        else:
+            backend = self._state_backend.scoped(session_id)
+            is_new = backend.version() == 0
+            state = self._create_state(backend)
+            if is_new:
+                state.from_dict(self._state.get_all())
+                state.flush()
+        
+        # Watchers of the app-level state apply to every session, except
+        # the ones broadcasting its changes to all pages
+        for key, callbacks in self._state.watchers().items():
+            for callback in callbacks:
+                if callback not in self._broadcast_watchers:
+                    state.watch(key, callback)
+        self._watch_broadcast(state, session_id, self._broadcast_prefixes)
+        return state
+    
+    @property
+    def _component_handlers(self) -> Dict[str, Dict[str, HandlerBinder]]:
+        """Get the handler registry of the current session"""
+        session_id = self._session_id()
+        if session_id is None:
+            return self._app_handlers
+        return self._session_handlers.get(session_id)
+    
+    def _session_id(self) -> Optional[str]:
+        """Get the Litchi session ID for the current request, if any"""
+        override = _render_session.get()
+        if override is not None and override[0] is self:
+            return override[1]
+        if not has_request_context():
+            return None
+        session_id = session.get('_litchi_sid')
+        if session_id is None:
+            session_id = uuid.uuid4().hex
+            session['_litchi_sid'] = session_id
+        return session_id
+    
     # ==================== Component Management ====================
     
     def add_component(self, component: Any) -> 'App':
@@ -88,13 +437,21 @@ class App:
         """Get all registered components"""
         return self._components
     
-    def _register_component_handlers(self, component: Any) -> None:
+    def _register_component_handlers(
+        self,
+        component: Any,
+        handlers: Optional[Dict[str, Dict[str, HandlerBinder]]] = None
+    ) -> None:
         """
         Recursively register component event handlers by ID
         
         Args:
             component: The component to register
+            handlers: Registry to add to (defaults to the current session's)
         """
+        if handlers is None:
+            handlers = self._component_handlers
+        
         if not hasattr(component, 'id') or not hasattr(component, '_events'):
             return
         
@@ -102,13 +459,20 @@ class App:
         events = component._events
         
         # Register this component's handlers
+        # Components with only client-side handlers are registered too, so
+        # their events are told apart from events of unknown components
+        binders = {
+            event_name: HandlerBinder(handler)
+            for event_name, handler in events.items()
+            if callable(handler)
+        }
         if events:
-            self._component_handlers[component_id] = events.copy()
+            handlers[component_id] = binders
         
         # Recursively register children
         if hasattr(component, '_children'):
             for child in component._children:
-                self._register_component_handlers(child)
+                self._register_component_handlers(child, handlers)
     
     # ==================== Event Handling ====================
     
@@ -122,22 +486,143 @@ class App:
                 return self.success("Clicked!")
         """
         def decorator(func: Callable) -> Callable:
-            self._event_handlers[event_name] = func
+            self._event_handlers[event_name] = HandlerBinder(func, pass_app=True)
             return func
         return decorator
     
     def emit(self, event_name: str, **params) -> Any:
         """Emit an event and call its handler"""
-        handler = self._event_handlers.get(event_name)
-        if handler:
-            return handler(self, **params)
+        binder = self._event_handlers.get(event_name)
+        if binder:
+            return binder.handler(self, **params)
         return None
     
+    def push(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+        **kwargs
+    ) -> int:
+        """
+        Push an update to connected pages
+        
+        Pages apply pushed messages like the ``data`` of an event
+        response: ``state_update``, ``component_update``, ``notification``,
+        ``modal``, ``redirect`` and ``reload``. Can be called from any
+        thread, e.g. from state watchers or background jobs.
+        
+        Values in ``state_update`` are written to the state the pages
+        render from: the app state, or with session_state the state of
+        each session pushed to. Unless the message navigates away, the
+        pages are then re-rendered and sent a patch of their tree along
+        with the message, so pushed state shows up like state changed by
+        an event does.
+        
+        Usage:
+            app.push(notification={'message': 'Build finished'})
+            app.push(state_update={'progress': 80}, session_id=sid)
+        
+        Args:
+            data: Message to push
+            session_id: Session whose pages get the message; None pushes to
+                        every connected page
+            **kwargs: Further message fields
+            
+        Returns:
+            Number of pages the message was queued for
+        """
+        if self._push is None:
+            raise RuntimeError("Server push is disabled, create the app with server_push=True")
+        message = dict(data or {}, **kwargs)
+        sessions = {subscriber.session_id for subscriber in self._push.subscribers(session_id)}
+        
+        updates = message.get('state_update')
+        if updates:
+            if self._sessions is None:
+                states = [self._state]
+            else:
+                targets = [session_id] if session_id is not None else sessions
+                states = [self._sessions.get(target) for target in targets if target is not None]
+            for state in states:
+                state.update(updates)
+                state.flush()
+        
+        if self._is_navigation({'data': message}):
+            return self._push.push(message, session_id)
+        
+        sent = 0
+        frames: Dict[int, bytes] = {}
+        for target, patch in self._render_sessions(sessions).items():
+            frame = frames.get(id(patch))
+            if frame is None:
+                frame = frames[id(patch)] = self._push.encode(dict(message, patch=patch) if patch else message)
+            sent += self._push.send_frame(frame, target)
+        return sent
+    
+    def broadcast_state(self, *prefixes: str) -> 'App':
+        """
+        Send changes of state keys to the connected pages
+        
+        Changes are published to the broadcast hub, which coalesces them
+        per key for ``broadcast_tick`` seconds and sends each page a
+        ``state_update`` with the patch re-rendering it. Changes of the app-level state reach every page;
+        with session_state, changes of a session's state reach the pages
+        of that session. Pages receive every broadcast key unless the app
+        was created with ``topics``.
+        
+        Usage:
+            app.broadcast_state('dashboard')
+        
+        Args:
+            *prefixes: State keys whose changes (including changes of
+                       nested keys) are broadcast
+        """
+        if self._hub is None:
+            raise RuntimeError("Server push is disabled, create the app with server_push=True")
+        self._broadcast_prefixes.extend(prefixes)
+        self._broadcast_watchers.extend(self._watch_broadcast(self._state, None, prefixes))
+        if self._sessions is not None:
+            for session_id, state in self._sessions.items():
+                self._watch_broadcast(state, session_id, prefixes)
+        return self
+    
+    def _watch_broadcast(self, state: StateManager, session_id: Optional[str], prefixes: Iterable[str]) -> List[Callable]:
+        """
+        Publish changes of a state's keys to the pages of its session, or to all
+        
+        Returns:
+            The watchers added
+        """
+        def publish(key: str, new_value: Any, old_value: Any) -> None:
+            self._hub.publish(key, new_value, session_id)
+        
+        for prefix in prefixes:
+            state.watch(prefix, publish)
+        return [publish]
+    
+    def publish(self, key: str, value: Any) -> None:
+        """
+        Broadcast a value to every page subscribed to its key
+        
+        Args:
+            key: State key the value is sent as
+            value: Value to send
+        """
+        if self._hub is None:
+            raise RuntimeError("Server push is disabled, create the app with server_push=True")
+        self._hub.publish(key, value)
+    
+    @property
+    def session_id(self) -> Optional[str]:
+        """Litchi session ID of the current request, for push()"""
+        return self._session_id()
+    
     # ==================== Context Management ====================
     
     def set_context(self, key: str, value: Any) -> 'App':
         """Set global context value"""
         self._context[key] = value
+        self._context_version += 1
         return self
     
     def get_context(self, key: str, default: Any = None) -> Any:
@@ -243,34 +728,368 @@ class App:
             'state_update': {key: value}
         }, **kwargs)
     
+    def _json_response(self, payload: Any, status: int = 200) -> Response:
+        """Create JSON response using the renderer's encoder"""
+        return Response(self.renderer.dumps(payload), status=status, mimetype='application/json')
+    
     # ==================== Rendering ====================
     
     def render(self) -> str:
         """Render application to HTML"""
+        return self._render_page(encode=False)
+    
+    def render_bytes(self) -> bytes:
+        """Render application to UTF-8 encoded HTML"""
+        return self._render_page(encode=True)
+    
+    def _render_page(self, encode: bool) -> Union[str, bytes]:
+        """Render application to HTML text or bytes"""
         try:
             # Call setup hook
-            self.setup()
+            self._ensure_setup()
             
-            # Build UI components
-            components = self.build()
-            if not isinstance(components, list):
-                components = [components] if components else []
+            cached = self._cached_page()
+            if cached is not None:
+                return cached.bytes() if encode else cached.text()
             
-            # Register all component handlers
-            self._component_handlers.clear()
-            for component in components:
-                self._register_component_handlers(component)
+            state = self.state
+            version = state.version
+            with state.track_reads() as reads:
+                components = self._build_components()
+                vue_config = self.renderer.render_config(components, self)
             
-            # Render to HTML
-            html = self.renderer.render(components, self._context, self)
+            self._set_rendered_tree(vue_config)
             
-            return html
+            # Render to HTML
+            page = self.renderer.render_page(vue_config, self._context, self, encode=encode)
+            self._cache_page(state, version, reads, page, vue_config)
+            return page
             
         except Exception as e:
             if self.debug:
-                return self._render_error(e)
+                page = self._render_error(e)
             else:
-                return self._render_error_page()
+                page = self._render_error_page()
+            return page.encode('utf-8') if encode else page
+    
+    def render_stream(self) -> Iterator[str]:
+        """
+        Render application to HTML in chunks
+        
+        The page head is produced before setup() and build() run. Errors
+        raised after that replace the partially sent page with the error page.
+        
+        Returns:
+            Iterator over HTML chunks
+        """
+        # Resolve the session now: its cookie must be set before streaming
+        self._session_id()
+        
+        def build() -> List[Any]:
+            self._ensure_setup()
+            return self._build_components()
+        
+        def generate() -> Iterator[str]:
+            vue_config: List[Dict[str, Any]] = []
+            chunks: List[str] = []
+            try:
+                cached = self._cached_page()
+                if cached is not None:
+                    yield cached.text()
+                    return
+                
+                state = self.state
+                version = state.version
+                with state.track_reads() as reads:
+                    for chunk in self.renderer.render_stream(build, self._context, self, vue_config):
+                        chunks.append(chunk)
+                        yield chunk
+            except Exception as e:
+                page = self._render_error(e) if self.debug else self._render_error_page()
+                page_json = self.renderer.dumps(page).replace('</', '<\\/')
+                yield (
+                    "</script><script>document.open();"
+                    f"document.write({page_json});"
+                    "document.close();</script>"
+                )
+                return
+            
+            self._set_rendered_tree(vue_config)
+            self._cache_page(state, version, reads, ''.join(chunks), vue_config)
+        
+        return generate()
+    
+    def _cached_page(self) -> Optional[CachedPage]:
+        """
+        Get the cached page for the current request if it is still fresh
+        
+        Restores the event handlers and live update tree of the cached
+        build, since the client will send events for its components.
+        """
+        if self._page_cache is None:
+            return None
+        
+        cached = self._page_cache.get(self._page_cache_key(), self.state, self._context_version)
+        if cached is not None:
+            handlers = self._component_handlers
+            handlers.clear()
+            handlers.update(cached.handlers)
+            self._set_rendered_tree(cached.vue_config)
+        return cached
+    
+    def _cache_page(
+        self,
+        state: StateManager,
+        version: int,
+        reads: Dict[Optional[str], None],
+        page: Union[str, bytes],
+        vue_config: List[Dict[str, Any]]
+    ) -> None:
+        """Cache a rendered page, unless the state changed while rendering it"""
+        if self._page_cache is None or state.version != version:
+            return
+        self._page_cache.put(
+            self._page_cache_key(), state, reads, self._context_version,
+            page, vue_config, dict(self._component_handlers)
+        )
+    
+    def _page_cache_key(self) -> str:
+        """Get the page cache key: the session ID with session state, else ''"""
+        if self._sessions is None:
+            return ''
+        return self._session_id() or ''
+    
+    def _set_rendered_tree(self, vue_config: List[Dict[str, Any]]) -> None:
+        """Remember the tree sent to the current session for live updates and pushes"""
+        if self.live_updates or self._push is not None:
+            session_id = self._session_id()
+            if session_id is not None:
+                self._rendered_trees.set(session_id, vue_config)
+    
+    @contextmanager
+    def _building_with(self, state: StateManager) -> Iterator[None]:
+        """
+        Make builds in the block read another state
+        
+        Only the current thread (or context) sees it; requests served
+        meanwhile keep using the app's states.
+        """
+        token = _build_state.set((self, state))
+        try:
+            yield
+        finally:
+            _build_state.reset(token)
+    
+    def _build_components(self, register: bool = True) -> List[Any]:
+        """
+        Build UI components and register their event handlers
+        
+        Args:
+            register: Replace the current session's handler registry with
+                      the handlers of this build
+        """
+        with memo_cache(self.renderer.memo_cache):
+            components = self.build()
+        if not isinstance(components, list):
+            components = [components] if components else []
+        
+        if self.id_mode == 'path':
+            assign_ids(components)
+        
+        # Register all component handlers
+        if register:
+            handlers = self._component_handlers
+            handlers.clear()
+            for component in components:
+                self._register_component_handlers(component, handlers)
+        
+        return components
+    
+    def compile(self) -> int:
+        """
+        Hoist the static parts of the component tree
+        
+        Builds the UI three times (normally, against a copy of the state
+        with every value changed, and normally again) and keeps the largest
+        subtrees that render identically each time. Later renders reuse
+        those subtrees, already serialized, instead of rendering them; each
+        reuse still compares the subtree's components with the compiled
+        ones, which visits them but renders and serializes nothing.
+        Components get path-based IDs so they can be matched across builds.
+        
+        Call this before serving requests, and again after changing the
+        context or anything else build() reads besides the state. The
+        builds read the app-level state and leave the states and handlers
+        requests use alone, so it may run while serving; pages rendered
+        meanwhile are just not hoisted. Nothing is hoisted while build()
+        reads a missing or empty state value, since perturbing it cannot
+        show what depends on it and reads cannot be traced to the parts
+        of the UI they feed; a warning names such values, so they can be
+        given representative values first.
+        
+        Returns:
+            Number of hoisted subtrees
+        """
+        self.id_mode = 'path'
+        self._ensure_setup()
+        self.renderer.set_static_nodes({})
+        if self._page_cache is not None:
+            self._page_cache.clear()
+        
+        with self._building_with(self._state), self._state.track_reads() as reads:
+            components = self._build_components(register=False)
+            vue_config = self.renderer.render_config(components, self)
+        empty = empty_reads(self._state, reads)
+        if empty:
+            print(
+                f"⚠️ compile() hoisted nothing: build() read missing or empty state values "
+                f"({', '.join(empty)}), give them representative values first"
+            )
+            return 0
+        
+        try:
+            with self._building_with(perturbed_state(self._state)):
+                perturbed_config = self.renderer.render_config(self._build_components(register=False), self)
+        except Exception:
+            # build() cannot run against arbitrary state, hoist nothing
+            return 0
+        
+        with self._building_with(self._state):
+            repeated_config = self.renderer.render_config(self._build_components(register=False), self)
+        
+        nodes = find_static_nodes(components, vue_config, perturbed_config, repeated_config)
+        self.renderer.set_static_nodes(nodes)
+        if self._page_cache is not None:
+            self._page_cache.clear()
+        return len(nodes)
+    
+    def build_assets(
+        self,
+        element_plus_dir: Union[str, Path] = 'node_modules/element-plus',
+        include: Iterable[str] = (),
+        output_dir: Optional[Union[str, Path]] = None
+    ) -> Dict[str, Path]:
+        """
+        Build Element Plus assets containing only the components used
+        
+        Renders the UI against the app-level state and against a copy with
+        every value changed (showing both sides of most conditions) to
+        collect every ``el-*`` component, then writes a stylesheet subset
+        from theme-chalk and, when esbuild is available, a bundle
+        registering only those components. Pages of this app use them
+        right away; with assets='local' the app picks them up from its
+        build folder on later starts. Other apps are not affected.
+        
+        Args:
+            element_plus_dir: Installed element-plus npm package
+            include: Further component names (e.g. 'dialog' or 'el-dialog')
+                     for parts of the UI neither render shows
+            output_dir: Folder to write to (defaults to the app's folder
+                        in BUILD_DIR, ``.litchi/assets/<name>``)
+            
+        Returns:
+            Mapping of asset name to the written file
+        """
+        self._ensure_setup()
+        with self._building_with(self._state):
+            vue_configs = [self.renderer.render_config(self._build_components(register=False), self)]
+        
+        try:
+            with self._building_with(perturbed_state(self._state)):
+                vue_configs.append(self.renderer.render_config(self._build_components(register=False), self))
+        except Exception:
+            # build() cannot run against arbitrary state, use the first render only
+            pass
+        
+        names = collect_components(vue_configs)
+        names.update(name[3:] if name.startswith('el-') else name for name in include)
+        
+        output_dir = Path(output_dir) if output_dir is not None else self.assets.build_dir
+        built = build_element_plus(names, Path(element_plus_dir), output_dir)
+        for name, path in built.items():
+            self.assets.add(name, path)
+        if self._page_cache is not None:
+            self._page_cache.clear()
+        return built
+    
+    def _render_patch(self) -> Optional[List[Dict[str, Any]]]:
+        """
+        Re-build the UI and diff it against the tree the client shows
+        
+        Returns:
+            JSON Patch operations, or None without a session to diff against
+        """
+        session_id = self._session_id()
+        if session_id is None:
+            return None
+        
+        with self._render_locks.get(session_id):
+            previous = self._rendered_trees.peek(session_id)
+            vue_config = self.renderer.render_config(self._build_components(), self)
+            self._rendered_trees.set(session_id, vue_config)
+        return self._diff_trees(previous, vue_config)
+    
+    def _render_sessions(self, session_ids: Iterable[Optional[str]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Re-build the UI of sessions outside of their requests and diff it
+        against the tree each one's pages show
+        
+        Without session state every session shows the same UI, so it is
+        built once, and sessions last sent the same tree share one patch
+        (the same list object).
+        
+        Returns:
+            JSON Patch operations by session ID, possibly empty
+        """
+        patches: Dict[str, List[Dict[str, Any]]] = {}
+        # Patches by the trees they lead from and to, holding on to both so
+        # their IDs stay unique
+        diffs: Dict[Tuple[int, int], Tuple[Any, Any, List[Dict[str, Any]]]] = {}
+        shared: Optional[Tuple[List[Dict[str, Any]], Dict[str, Dict[str, HandlerBinder]]]] = None
+        
+        for session_id in session_ids:
+            if session_id is None:
+                continue
+            with self._rendering_for(session_id), self._render_locks.get(session_id):
+                previous = self._rendered_trees.peek(session_id)
+                if shared is None:
+                    vue_config = self.renderer.render_config(self._build_components(), self)
+                    if self._sessions is None:
+                        shared = (vue_config, dict(self._component_handlers))
+                else:
+                    vue_config, handlers = shared
+                    registry = self._component_handlers
+                    registry.clear()
+                    registry.update(handlers)
+                self._rendered_trees.set(session_id, vue_config)
+            
+            key = (id(previous), id(vue_config))
+            if key not in diffs:
+                diffs[key] = (previous, vue_config, self._diff_trees(previous, vue_config))
+            patches[session_id] = diffs[key][2]
+        return patches
+    
+    @contextmanager
+    def _rendering_for(self, session_id: str) -> Iterator[None]:
+        """
+        Make the block act for a session, as its requests do
+        
+        State, handler registry and rendered tree all resolve to the
+        session's. Only the current thread (or context) sees it.
+        """
+        token = _render_session.set((self, session_id))
+        try:
+            yield
+        finally:
+            _render_session.reset(token)
+    
+    @staticmethod
+    def _diff_trees(previous: Optional[List[Any]], vue_config: List[Any]) -> List[Dict[str, Any]]:
+        """Diff a newly rendered tree against the one a page shows"""
+        if previous is None:
+            # Nothing to diff against (e.g. evicted), replace the whole tree
+            return [{'op': 'replace', 'path': '', 'value': vue_config}]
+        return diff_tree(previous, vue_config)
     
     def _render_error(self, error: Exception) -> str:
         """Render detailed error page for debug mode"""
@@ -476,17 +1295,148 @@ class App:
         
         # Register routes
         self._register_routes(flask_app)
+        self._register_hooks(flask_app)
         
         return flask_app
     
+    def _register_hooks(self, flask_app: Flask) -> None:
+        """Register request lifecycle hooks with Flask"""
+        
+        @flask_app.before_request
+        def prepare_request():
+            self._ensure_setup()
+            self.before_request()
+        
+        if self._compressor is not None:
+            @flask_app.after_request
+            def compress_response(response):
+                if request.endpoint in ('index', 'handle_event', 'handle_events', 'handle_state'):
+                    self._compress_response(response)
+                return response
+        
+        if self._state_backend is not None:
+            @flask_app.before_request
+            def sync_state():
+                self.state.sync()
+            
+            @flask_app.teardown_request
+            def flush_state(exc):
+                self.state.flush()
+    
+    def _state_tag(self) -> str:
+        """
+        Get the ETag of the current page
+        
+        Derived from the state and context versions only, so no rendering
+        is needed to tell whether the client's copy is still current. No
+        Last-Modified is sent with it: its one-second resolution would
+        let If-Modified-Since match a page changed within the same second.
+        """
+        state = self.state
+        key = f"{self._process_token}:{self._page_cache_key()}:{id(state)}:{state.version}:{self._context_version}"
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+    
+    def _not_modified(self, tag: str) -> Optional[Response]:
+        """
+        Get a 304 response if the client's copy of the page is current
+        
+        The client may hold the tag of a compressed variant of the page
+        (see _compress_response), which matches as well.
+        """
+        for candidate in [tag] + [f"{tag}-{coding}" for coding in CODINGS]:
+            if request.if_none_match.contains(candidate):
+                tag = candidate
+                break
+        
+        response = Response(mimetype='text/html')
+        self._set_validators(response, tag)
+        response.make_conditional(request)
+        return response if response.status_code == 304 else None
+    
+    def _set_validators(self, response: Response, tag: Optional[str] = None) -> None:
+        """Set the ETag and Cache-Control headers of a page"""
+        if tag is not None:
+            response.set_etag(tag)
+        if self.cache_control:
+            response.headers['Cache-Control'] = self.cache_control
+    
+    def _compress_response(self, response: Response) -> None:
+        """
+        Compress a response body in place if the client accepts it
+        
+        Streamed responses are sent as is. A strong ETag gets the coding
+        appended, since each coding is a different representation.
+        """
+        response.vary.add('Accept-Encoding')
+        if (
+            response.status_code != 200
+            or response.is_streamed
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+        ):
+            return
+        
+        coding = self._compressor.negotiate(request.headers.get('Accept-Encoding'))
+        if coding is None:
+            return
+        
+        data = response.get_data()
+        if len(data) < self._compressor.min_size:
+            return
+        
+        if request.endpoint == 'index':
+            # Pages start with the shell head; gzip it only once
+            self._compressor.add_prefix(self.renderer.shell(self._context, self).parts_bytes[0])
+        
+        response.set_data(self._compressor.compress(data, coding))
+        response.headers['Content-Encoding'] = coding
+        tag, weak = response.get_etag()
+        if tag is not None and not weak:
+            response.set_etag(f"{tag}-{coding}")
+    
     def _register_routes(self, flask_app: Flask) -> None:
         """Register all routes with Flask"""
         
         # Main route
         @flask_app.route('/', methods=['GET', 'POST'])
         def index():
-            html = self.render()
-            return html
+            if self.etag == 'state':
+                tag = self._state_tag()
+                not_modified = self._not_modified(tag)
+                if not_modified is not None:
+                    return not_modified
+            
+            if self.stream:
+                response = Response(stream_with_context(self.render_stream()), mimetype='text/html')
+            else:
+                response = Response(self.render_bytes(), mimetype='text/html')
+            
+            if self.etag == 'state':
+                self._set_validators(response, tag)
+            elif self.etag == 'content':
+                response.add_etag()
+                not_modified = self._not_modified(response.get_etag()[0])
+                if not_modified is not None:
+                    return not_modified
+                self._set_validators(response)
+            elif self.cache_control:
+                response.headers['Cache-Control'] = self.cache_control
+            
+            if self.assets.local:
+                link = self.assets.link_header()
+                if link:
+                    response.headers['Link'] = link
+            return response
+        
+        # Content-hashed frontend assets, never changing under one URL
+        @flask_app.route(f'{ASSET_URL_PATH}/<filename>')
+        def asset(filename):
+            path = self.assets.path(filename)
+            if path is None:
+                return self._json_response(self.error("Asset not found"), 404)
+            response = send_file(path, max_age=31536000, conditional=True, etag=False)
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
         
         # API route for event handling
         @flask_app.route('/api/event', methods=['POST'])
@@ -494,29 +1444,61 @@ class App:
             try:
                 data = request.get_json()
                 if not data:
-                    return jsonify(self.error("No data provided")), 400
-                
-                event_name = data.get('event')
-                action = data.get('action', event_name)  # Get action if provided, otherwise use event
-                params = data.get('params', {})
-                component_id = data.get('component_id')
-                
-                if not event_name:
-                    return jsonify(self.error("Missing event name")), 400
+                    return self._json_response(self.error("No data provided"), 400)
                 
-                # Handle event - pass action as the event to find the correct handler
-                result = self._handle_event(action, component_id, params)
+                result, status = self._dispatch_event(data)
+                if status == 200:
+                    self._attach_patch(result, [result])
+                return self._json_response(result, status)
                 
-                if result is None:
-                    result = self.success("Event handled")
+            except Exception as e:
+                error_response = self.error(str(e))
+                if self.debug:
+                    error_response['traceback'] = traceback.format_exc()
+                return self._json_response(error_response, 500)
+        
+        # API route for batches of events, run in order
+        @flask_app.route('/api/events', methods=['POST'])
+        def handle_events():
+            try:
+                data = request.get_json()
+                events = data.get('events') if isinstance(data, dict) else None
+                if not isinstance(events, list):
+                    return self._json_response(self.error("No events provided"), 400)
                 
-                return jsonify(result)
+                return self._json_response(self._dispatch_events(events, data.get('id')))
                 
             except Exception as e:
                 error_response = self.error(str(e))
                 if self.debug:
                     error_response['traceback'] = traceback.format_exc()
-                return jsonify(error_response), 500
+                return self._json_response(error_response, 500)
+        
+        # Server push stream, one per open page
+        if self._push is not None:
+            @flask_app.route('/api/stream')
+            def handle_stream():
+                subscriber = self._push.subscribe(self._session_id())
+                topics = request.args.get('topics')
+                self._hub.subscribe(subscriber, topics.split(',') if topics else None)
+                
+                def generate() -> Iterator[bytes]:
+                    try:
+                        yield b'retry: 3000\n\n'
+                        yield from subscriber.frames()
+                    finally:
+                        self._hub.unsubscribe(subscriber)
+                        self._push.unsubscribe(subscriber)
+                
+                return Response(generate(), mimetype='text/event-stream', headers={
+                    'Cache-Control': 'no-cache',
+                    'X-Accel-Buffering': 'no'
+                })
+        
+        # Event WebSocket, one per open page
+        if self.websocket:
+            sock = Sock(flask_app)
+            sock.route('/api/ws')(self._serve_websocket)
         
         # State API
         @flask_app.route('/api/state/<key>', methods=['GET', 'POST'])
@@ -524,78 +1506,197 @@ class App:
             try:
                 if request.method == 'GET':
                     value = self.state.get(key)
-                    return jsonify(self.data(value))
+                    return self._json_response(self.data(value))
                 else:
                     data = request.get_json()
                     value = data.get('value')
                     self.state.set(key, value)
-                    return jsonify(self.success("State updated", value))
+                    return self._json_response(self.success("State updated", value))
             except Exception as e:
-                return jsonify(self.error(str(e))), 500
+                return self._json_response(self.error(str(e)), 500)
     
-    def _handle_event(self, event_name: str, component_id: Optional[str], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Handle event by finding appropriate handler via component ID"""
-        import inspect
+    def _dispatch_event(self, data: Dict[str, Any]) -> Tuple[Dict[str, Any], int]:
+        """
+        Run the handler of one event sent by the client
         
-        # First, try to find handler via component_id
-        if component_id and component_id in self._component_handlers:
-            component_handlers = self._component_handlers[component_id]
+        Args:
+            data: Event with 'event', optional 'action', 'params' and 'component_id'
             
-            # Look for the event in this component's handlers
-            if event_name in component_handlers:
-                handler = component_handlers[event_name]
-                if callable(handler):
-                    try:
-                        sig = inspect.signature(handler)
-                        filtered_params = {}
-                        for param_name, param in sig.parameters.items():
-                            if param_name in params:
-                                filtered_params[param_name] = params[param_name]
-                        return handler(**filtered_params)
-                    except Exception as e:
-                        if self.debug:
-                            raise
-                        return self.error(f"Error calling handler: {str(e)}")
+        Returns:
+            Tuple of (result, HTTP status)
+        """
+        event_name = data.get('event')
+        action = data.get('action', event_name)  # Get action if provided, otherwise use event
+        params = data.get('params', {})
+        component_id = data.get('component_id')
         
-        # Fallback: Try to find method handler (on_<event_name>)
-        method_name = f"on_{event_name}"
-        if hasattr(self, method_name):
-            method = getattr(self, method_name)
-            if callable(method):
-                try:
-                    sig = inspect.signature(method)
-                    filtered_params = {}
-                    for param_name, param in sig.parameters.items():
-                        if param_name in params:
-                            filtered_params[param_name] = params[param_name]
-                        elif param.default is inspect.Parameter.empty and param.kind not in (
-                            inspect.Parameter.VAR_KEYWORD,
-                            inspect.Parameter.VAR_POSITIONAL
-                        ):
-                            pass
-                    return method(**filtered_params)
-                except Exception as e:
-                    if self.debug:
-                        raise
-                    return self.error(f"Error calling {method_name}: {str(e)}")
+        if not event_name:
+            return self.error("Missing event name"), 400
+        if not isinstance(event_name, str) or not isinstance(action, str):
+            return self.error("Event name and action must be strings"), 400
         
-        # Fallback: Try registered event handlers
-        handler = self._event_handlers.get(event_name)
-        if handler:
+        # Handle event - pass action as the event to find the correct handler
+        result = self._handle_event(action, component_id, params)
+        
+        if result is None:
+            result = self.success("Event handled")
+        return result, 200
+    
+    def _dispatch_events(self, events: List[Any], batch_id: Any = None) -> Dict[str, Any]:
+        """
+        Run the handlers of a batch of events in order
+        
+        Events after one that redirects or reloads the page are not run,
+        since the page is going away. An event whose handler raises (as
+        handlers do in debug mode) gets an error result, with the
+        traceback in debug mode, and the following events still run.
+        
+        Args:
+            events: Events as accepted by _dispatch_event()
+            batch_id: ID the page gave the batch; a batch sent again with
+                      the same ID gets the first response without running
+            
+        Returns:
+            Response with one result per event run, and the live update patch
+        """
+        if isinstance(batch_id, str):
+            return self._batches.get(self._session_id() or '').run(
+                batch_id,
+                lambda: self._dispatch_events(events)
+            )
+        
+        results = []
+        for event in events:
             try:
-                sig = inspect.signature(handler)
-                filtered_params = {}
-                for param_name, param in sig.parameters.items():
-                    if param_name != 'self' and param_name in params:
-                        filtered_params[param_name] = params[param_name]
-                return handler(self, **filtered_params)
+                result, _ = self._dispatch_event(event if isinstance(event, dict) else {})
             except Exception as e:
+                result = self.error(str(e))
                 if self.debug:
-                    raise
-                return self.error(f"Error calling handler: {str(e)}")
+                    result['traceback'] = traceback.format_exc()
+            results.append(result)
+            if self._is_navigation(result):
+                break
+        
+        response = {'success': True, 'results': results}
+        self._attach_patch(response, results)
+        return response
+    
+    def _serve_websocket(self, ws: Any) -> None:
+        """
+        Handle event batches sent over a page's WebSocket
+        
+        Each message is ``{"id": ..., "events": [...]}`` and is answered
+        with the /api/events response carrying the same id. Responses
+        leave out the timestamps added by success() and error().
+        """
+        while True:
+            message = ws.receive()
+            if message is None:
+                return
+            
+            request_id = None
+            try:
+                data = serialization.loads(message)
+                request_id = data.get('id')
+                if self._state_backend is not None:
+                    self.state.sync()
+                self.before_request()
+                response = self._dispatch_events(data.get('events') or [], request_id)
+            except Exception as e:
+                response = self.error(str(e))
+                if self.debug:
+                    response['traceback'] = traceback.format_exc()
+            finally:
+                if self._state_backend is not None:
+                    self.state.flush()
+            
+            # Copy, since the response may also answer a resent batch
+            response = {key: value for key, value in response.items() if key != 'timestamp'}
+            response['id'] = request_id
+            if 'results' in response:
+                response['results'] = [
+                    {key: value for key, value in result.items() if key != 'timestamp'}
+                    if isinstance(result, dict) else result
+                    for result in response['results']
+                ]
+            ws.send(self.renderer.dumps(response))
+    
+    def _attach_patch(self, response: Any, results: List[Any]) -> None:
+        """Add the live update patch for the handled events to a response"""
+        if not self.live_updates or not isinstance(response, dict):
+            return
+        if any(self._is_navigation(result) for result in results):
+            return
+        patch = self._render_patch()
+        if patch:
+            response['patch'] = patch
+    
+    @staticmethod
+    def _is_navigation(result: Any) -> bool:
+        """Check whether an event result sends the client to another page"""
+        data = result.get('data') if isinstance(result, dict) else None
+        return isinstance(data, dict) and bool(data.get('redirect') or data.get('reload'))
+    
+    def _handle_event(self, event_name: str, component_id: Optional[str], params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Handle event by finding appropriate handler via component ID"""
+        # First, try to find handler via component_id
+        if component_id:
+            binders = self._component_binders(component_id)
+            if binders is None:
+                return self.error(f"Unknown component '{component_id}', reload the page")
+            binder = binders.get(event_name)
+            if binder is not None:
+                return self._call_handler(binder, params, "handler")
+        
+        # Fallback: Try to find method handler (on_<event_name>)
+        binder = self._method_handler(event_name)
+        if binder is not None:
+            return self._call_handler(binder, params, f"on_{event_name}")
+        
+        # Fallback: Try registered event handlers
+        binder = self._event_handlers.get(event_name)
+        if binder is not None:
+            return self._call_handler(binder, params, "handler")
         
         return None
     
+    def _component_binders(self, component_id: str) -> Optional[Dict[str, HandlerBinder]]:
+        """
+        Get the handler binders of a component on the session's page
+        
+        The registry of a session is empty if its page was answered with
+        a 304 or cached by the browser, or if it expired while the page
+        stayed open. Path IDs are stable, so it is then rebuilt.
+        
+        Returns:
+            Binders by event name, or None if the page has no such component
+        """
+        binders = self._component_handlers.get(component_id)
+        if binders is None and self.id_mode == 'path':
+            self._build_components()
+            binders = self._component_handlers.get(component_id)
+        return binders
+    
+    def _method_handler(self, event_name: str) -> Optional[HandlerBinder]:
+        """Get binder for the on_<event_name> method, if the app defines one"""
+        try:
+            return self._method_handlers[event_name]
+        except KeyError:
+            method = getattr(self, f"on_{event_name}", None)
+            if not callable(method):
+                return None
+            binder = self._method_handlers[event_name] = HandlerBinder(method)
+            return binder
+    
+    def _call_handler(self, binder: HandlerBinder, params: Dict[str, Any], name: str) -> Any:
+        """Call a handler binder, turning errors into error responses"""
+        try:
+            return binder(self, params)
+        except Exception as e:
+            if self.debug:
+                raise
+            return self.error(f"Error calling {name}: {str(e)}")
+    
     # ==================== Running ====================
     
     def run(
@@ -622,6 +1723,10 @@ class App:
         print(f"  ⏰ Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'='*60}\n")
         
+        # Call setup hook (in the serving process only, not the reloader)
+        if not self.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            self._ensure_setup()
+        
         # Run Flask
         try:
             self._flask_app.run(
@@ -632,22 +1737,34 @@ class App:
             )
         finally:
             # Call teardown hook
-            self.teardown()
+            self._shutdown()
     
     def save_static(self, output_path: str = 'dist/index.html') -> str:
         """Save application as static HTML file"""
-        html = self.render()
+        html = self.render_bytes()
         
         # Create directory if needed
         output_file = Path(output_path)
         output_file.parent.mkdir(parents=True, exist_ok=True)
         
         # Write file
-        with open(output_file, 'w', encoding='utf-8') as f:
+        with open(output_file, 'wb') as f:
             f.write(html)
         
         print(f"✅ Static HTML saved to: {output_path}")
         return str(output_file)
     
+    def __call__(self, environ: Dict[str, Any], start_response: Callable) -> Any:
+        """
+        WSGI entry point
+        
+        Lets WSGI servers such as gunicorn run the app in several worker
+        processes, e.g. ``gunicorn -w 4 myapp:app``. Combine with a
+        ``state_backend`` so all workers share one state.
+        """
+        if self._flask_app is None:
+            self._flask_app = self._create_flask_app()
+        return self._flask_app(environ, start_response)
+    
     def __repr__(self) -> str:
         return f"<App(name='{self.name}', debug={self.debug})>"
@@ -0,0 +1,208 @@
+"""
+Frontend assets for Litchi 0.3.1
+
+Pages load Vue, Element Plus and axios. By default they come from the
+unpkg CDN as development builds. With local assets, production builds
+are served from the package's static/ folder under content-hashed file
+names so browsers can cache them forever; any file missing there falls
+back to its production build on the CDN, and the Element Plus subset
+builds App.build_assets() made for the app replace the full ones.
+"""
+
+from typing import Dict, List, Optional
+from pathlib import Path
+import hashlib
+import os
+import urllib.request
+
+from .bundler import SUBSET_SCRIPT, SUBSET_STYLE
+
+
+# Package static folder, also served by Flask at /static
+STATIC_DIR = Path(__file__).parent.parent / 'static'
+
+# Folder holding each app's subset builds (in a subfolder named after the
+# app), relative to the working directory
+BUILD_DIR = Path('.litchi') / 'assets'
+
+# URL prefix of content-hashed assets
+ASSET_URL_PATH = '/_litchi/assets'
+
+
+class Asset:
+    """
+    A frontend library file
+    """
+    
+    __slots__ = ('name', 'kind', 'filename', 'url', 'dev_url')
+    
+    def __init__(self, name: str, kind: str, filename: str, url: str, dev_url: str):
+        """
+        Initialize asset
+        
+        Args:
+            name: Asset name
+            kind: 'script' or 'style'
+            filename: File name in the static folder
+            url: CDN URL of the production build
+            dev_url: CDN URL of the development build
+        """
+        self.name = name
+        self.kind = kind
+        self.filename = filename
+        self.url = url
+        self.dev_url = dev_url
+
+
+# Assets in page load order
+ASSETS = [
+    Asset(
+        'element-plus-css', 'style', 'element-plus.css',
+        'https://unpkg.com/element-plus@2.4.0/dist/index.css',
+        'https://unpkg.com/element-plus@2.4.0/dist/index.css'
+    ),
+    Asset(
+        'vue', 'script', 'vue.global.prod.js',
+        'https://unpkg.com/vue@3.3.0/dist/vue.global.prod.js',
+        'https://unpkg.com/vue@3.3.0/dist/vue.global.js'
+    ),
+    Asset(
+        'element-plus', 'script', 'element-plus.full.min.js',
+        'https://unpkg.com/element-plus@2.4.0/dist/index.full.min.js',
+        'https://unpkg.com/element-plus@2.4.0/dist/index.full.js'
+    ),
+    Asset(
+        'axios', 'script', 'axios.min.js',
+        'https://unpkg.com/axios@1.5.0/dist/axios.min.js',
+        'https://unpkg.com/axios@1.5.0/dist/axios.min.js'
+    ),
+]
+
+
+class AssetManifest:
+    """
+    Map of asset names to the URLs pages load them from
+    
+    Local files are addressed by a name containing a hash of their
+    content (e.g. ``vue.global.prod.3f2a9c1b7d0e.js``), so a changed file
+    gets a new URL and old URLs can be cached as immutable.
+    """
+    
+    def __init__(
+        self,
+        static_dir: Optional[Path] = None,
+        local: bool = True,
+        build_dir: Optional[Path] = None
+    ):
+        """
+        Initialize asset manifest
+        
+        Args:
+            static_dir: Folder holding local asset files (defaults to STATIC_DIR)
+            local: Serve local production builds; False loads the CDN
+                   development builds
+            build_dir: Folder of the app's own subset builds, which replace
+                       the full Element Plus builds when local is set
+        """
+        self.static_dir = Path(static_dir) if static_dir is not None else STATIC_DIR
+        self.build_dir = Path(build_dir) if build_dir is not None else None
+        self.local = local
+        self._urls: Dict[str, str] = {}
+        self._files: Dict[str, Path] = {}
+        self.version = 0
+        
+        for asset in ASSETS:
+            if not local:
+                self._urls[asset.name] = asset.dev_url
+            elif not self.add(asset.name, self.static_dir / asset.filename):
+                self._urls[asset.name] = asset.url
+        
+        if local and self.build_dir is not None:
+            self.add('element-plus-css', self.build_dir / SUBSET_STYLE)
+            self.add('element-plus', self.build_dir / SUBSET_SCRIPT)
+    
+    def add(self, name: str, path: Path) -> bool:
+        """
+        Serve an asset from a local file
+        
+        Args:
+            name: Asset name
+            path: File to serve
+        
+        Returns:
+            True if the file exists and was added
+        """
+        path = Path(path)
+        if not path.is_file():
+            return False
+        
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+        hashed = f"{path.stem}.{digest}{path.suffix}"
+        self._files[hashed] = path
+        self._urls[name] = f"{ASSET_URL_PATH}/{hashed}"
+        self.version += 1
+        return True
+    
+    def url(self, name: str) -> str:
+        """Get the URL of an asset"""
+        return self._urls[name]
+    
+    def path(self, hashed_name: str) -> Optional[Path]:
+        """Get the local file for a content-hashed file name, if any"""
+        return self._files.get(hashed_name)
+    
+    def tags(self) -> str:
+        """Generate preload hints for local files followed by the style and script tags"""
+        lines: List[str] = []
+        for asset in ASSETS:
+            if self._is_local(asset.name):
+                lines.append(f'<link rel="preload" href="{self.url(asset.name)}" as="{asset.kind}">')
+        for asset in ASSETS:
+            if asset.kind == 'style':
+                lines.append(f'<link rel="stylesheet" href="{self.url(asset.name)}">')
+            else:
+                lines.append(f'<script src="{self.url(asset.name)}"></script>')
+        return '\n    '.join(lines)
+    
+    def link_header(self) -> str:
+        """Generate a Link header preloading the local assets"""
+        return ', '.join(
+            f'<{self.url(asset.name)}>; rel=preload; as={asset.kind}'
+            for asset in ASSETS
+            if self._is_local(asset.name)
+        )
+    
+    def _is_local(self, name: str) -> bool:
+        """Check whether an asset is served from a local file"""
+        return self.url(name).startswith(ASSET_URL_PATH)
+
+
+def fetch_assets(static_dir: Optional[Path] = None, force: bool = False) -> List[Path]:
+    """
+    Download the production builds of all assets into the static folder
+    
+    Run once on a machine with internet access; the files can then be
+    shipped with the app to environments without it.
+    
+    Args:
+        static_dir: Target folder (defaults to STATIC_DIR)
+        force: Download files that already exist again
+    
+    Returns:
+        Paths of the downloaded files
+    """
+    target = Path(static_dir) if static_dir is not None else STATIC_DIR
+    target.mkdir(parents=True, exist_ok=True)
+    
+    downloaded = []
+    for asset in ASSETS:
+        path = target / asset.filename
+        if path.exists() and not force:
+            continue
+        with urllib.request.urlopen(asset.url) as response:
+            data = response.read()
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        downloaded.append(path)
+    return downloaded
@@ -0,0 +1,334 @@
+"""
+Shared state backends for Litchi 0.3.1
+
+A backend lets several worker processes serve one app by keeping the
+authoritative copy of the state outside of any single process. Each
+StateManager keeps its own in-process copy for reads and only talks to
+the backend to check for newer versions and to write changed keys.
+"""
+
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+
+from . import serialization
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+class StateBackend(ABC):
+    """
+    Storage backend for StateManager
+    
+    Values are stored per top-level state key and must be JSON serializable.
+    Every write bumps a version number so readers can cheaply detect
+    changes made by other processes.
+    """
+    
+    # Whether scoped() is supported (needed for per-session states)
+    supports_namespaces = False
+    
+    # JSON encoder ``(obj, indent=False) -> str`` for stored values; None
+    # uses litchi.core.serialization (App sets its json_encoder here)
+    json_encoder: Optional[Callable[..., str]] = None
+    
+    @abstractmethod
+    def load(self) -> Dict[str, Any]:
+        """Load the full state"""
+        pass
+    
+    @abstractmethod
+    def version(self) -> int:
+        """Get current version number (0 for a never written state)"""
+        pass
+    
+    @abstractmethod
+    def write(
+        self,
+        updates: Dict[str, Any],
+        deletes: Iterable[str] = (),
+        replace: bool = False
+    ) -> int:
+        """
+        Write changed top-level keys in one transaction
+        
+        Args:
+            updates: Top-level keys and their new values
+            deletes: Top-level keys to remove
+            replace: Drop all keys not in updates first
+            
+        Returns:
+            New version number
+        """
+        pass
+    
+    def _dumps(self, value: Any) -> str:
+        """Serialize a value with the configured encoder"""
+        return (self.json_encoder or serialization.dumps)(value)
+    
+    def scoped(self, namespace: str) -> 'StateBackend':
+        """
+        Get a backend for a separate namespace sharing the same storage
+        
+        Used to store per-session states.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support namespaces")
+    
+    def close(self) -> None:
+        """Release resources held by this backend"""
+        pass
+
+
+class SQLiteBackend(StateBackend):
+    """
+    State backend storing keys in a SQLite database in WAL mode
+    
+    WAL mode lets readers in other processes proceed while one process
+    writes, which suits many workers with mostly-read traffic.
+    """
+    
+    supports_namespaces = True
+    
+    def __init__(
+        self,
+        path: str,
+        namespace: str = 'default',
+        timeout: float = 5.0,
+        json_encoder: Optional[Callable[..., str]] = None
+    ):
+        """
+        Initialize SQLite backend
+        
+        Args:
+            path: Database file path
+            namespace: Namespace for keys, so one file can hold several states
+            timeout: Seconds to wait for a lock held by another process
+            json_encoder: JSON encoder for stored values
+        """
+        self.path = path
+        self.namespace = namespace
+        self.timeout = timeout
+        self.json_encoder = json_encoder
+        self._local = threading.local()
+        
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS litchi_state ('
+            'namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, '
+            'PRIMARY KEY (namespace, key))'
+        )
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS litchi_version ('
+            'namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)'
+        )
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Get the connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def load(self) -> Dict[str, Any]:
+        rows = self._connection().execute(
+            'SELECT key, value FROM litchi_state WHERE namespace = ?',
+            (self.namespace,)
+        )
+        return {key: serialization.loads(value) for key, value in rows}
+    
+    def version(self) -> int:
+        row = self._connection().execute(
+            'SELECT version FROM litchi_version WHERE namespace = ?',
+            (self.namespace,)
+        ).fetchone()
+        return row[0] if row else 0
+    
+    def write(
+        self,
+        updates: Dict[str, Any],
+        deletes: Iterable[str] = (),
+        replace: bool = False
+    ) -> int:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if replace:
+                conn.execute('DELETE FROM litchi_state WHERE namespace = ?', (self.namespace,))
+            conn.executemany(
+                'INSERT OR REPLACE INTO litchi_state (namespace, key, value) VALUES (?, ?, ?)',
+                [(self.namespace, key, self._dumps(value)) for key, value in updates.items()]
+            )
+            conn.executemany(
+                'DELETE FROM litchi_state WHERE namespace = ? AND key = ?',
+                [(self.namespace, key) for key in deletes]
+            )
+            conn.execute(
+                'INSERT INTO litchi_version (namespace, version) VALUES (?, 1) '
+                'ON CONFLICT(namespace) DO UPDATE SET version = version + 1',
+                (self.namespace,)
+            )
+            version = conn.execute(
+                'SELECT version FROM litchi_version WHERE namespace = ?',
+                (self.namespace,)
+            ).fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return version
+    
+    def scoped(self, namespace: str) -> 'SQLiteBackend':
+        return SQLiteBackend(
+            self.path,
+            namespace=f"{self.namespace}:{namespace}",
+            timeout=self.timeout,
+            json_encoder=self.json_encoder
+        )
+    
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+    
+    def __repr__(self) -> str:
+        return f"<SQLiteBackend(path='{self.path}', namespace='{self.namespace}')>"
+
+
+class SharedMemoryBackend(StateBackend):
+    """
+    State backend keeping the state as one JSON document in shared memory
+    
+    Suited to several worker processes on one machine. The segment starts
+    with a version and a length header; writers serialize through a lock
+    file named after the segment in the temp directory.
+    """
+    
+    _HEADER = struct.Struct('<QQ')
+    
+    def __init__(
+        self,
+        name: str = 'litchi_state',
+        size: int = 1 << 20,
+        json_encoder: Optional[Callable[..., str]] = None
+    ):
+        """
+        Initialize shared memory backend
+        
+        Args:
+            name: Shared memory segment name, identical in all workers
+            size: Segment size in bytes (only used by the creating process)
+            json_encoder: JSON encoder for the stored document
+        """
+        self.name = name
+        self.json_encoder = json_encoder
+        self._untracked = False
+        self._lock_file = open(os.path.join(tempfile.gettempdir(), f"{name}.lock"), 'a+b')
+        self._thread_lock = threading.Lock()
+        
+        with self._locked():
+            try:
+                self._shm = self._open_segment(create=True, size=size)
+                self._HEADER.pack_into(self._shm.buf, 0, 0, 0)
+            except FileExistsError:
+                self._shm = self._open_segment(create=False, size=0)
+    
+    def _open_segment(self, create: bool, size: int) -> Any:
+        """Open segment without letting the resource tracker unlink it at exit"""
+        from multiprocessing import resource_tracker, shared_memory
+        
+        try:
+            return shared_memory.SharedMemory(name=self.name, create=create, size=size, track=False)
+        except TypeError:  # Python < 3.13
+            pass
+        
+        # Older Pythons always register the segment, and the tracker would
+        # unlink it when this process exits, wiping the state for the others
+        shm = shared_memory.SharedMemory(name=self.name, create=create, size=size)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        self._untracked = True
+        return shm
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold the cross-process lock"""
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            else:  # pragma: no cover - Windows
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                else:  # pragma: no cover - Windows
+                    self._lock_file.seek(0)
+                    msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+    
+    def _read(self) -> Dict[str, Any]:
+        """Read the document (caller holds the lock)"""
+        _, length = self._HEADER.unpack_from(self._shm.buf, 0)
+        if not length:
+            return {}
+        start = self._HEADER.size
+        return serialization.loads(bytes(self._shm.buf[start:start + length]))
+    
+    def load(self) -> Dict[str, Any]:
+        with self._locked():
+            return self._read()
+    
+    def version(self) -> int:
+        # Unlocked read: only used as a change hint before a locked load()
+        return self._HEADER.unpack_from(self._shm.buf, 0)[0]
+    
+    def write(
+        self,
+        updates: Dict[str, Any],
+        deletes: Iterable[str] = (),
+        replace: bool = False
+    ) -> int:
+        with self._locked():
+            version = self._HEADER.unpack_from(self._shm.buf, 0)[0] + 1
+            data = {} if replace else self._read()
+            data.update(updates)
+            for key in deletes:
+                data.pop(key, None)
+            
+            encoded = self._dumps(data).encode('utf-8')
+            start = self._HEADER.size
+            if start + len(encoded) > self._shm.size:
+                raise ValueError(
+                    f"State of {len(encoded)} bytes does not fit in shared memory segment '{self.name}'"
+                )
+            self._shm.buf[start:start + len(encoded)] = encoded
+            self._HEADER.pack_into(self._shm.buf, 0, version, len(encoded))
+        return version
+    
+    def close(self) -> None:
+        self._shm.close()
+        self._lock_file.close()
+    
+    def unlink(self) -> None:
+        """Destroy the shared memory segment (call once, from one process)"""
+        if self._untracked:
+            # unlink() unregisters the segment, so register it back first
+            from multiprocessing import resource_tracker
+            resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+    
+    def __repr__(self) -> str:
+        return f"<SharedMemoryBackend(name='{self.name}', size={self._shm.size})>"
@@ -0,0 +1,207 @@
+"""
+Broadcast hub for Litchi 0.3.1
+
+Fans state changes out to many connected pages. Pages subscribe to
+topics, which are state key prefixes. Changes published within one tick
+are coalesced per key, and each tick sends every page one frame with the
+changes it subscribed to, and the patch re-rendering its page; pages
+receiving the same changes and patch are written the same serialized
+bytes.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+import threading
+
+from .push import Subscriber
+
+
+class BroadcastHub:
+    """
+    Topic-based fan-out of state updates with tick coalescing
+    """
+    
+    def __init__(
+        self,
+        encode: Callable[[Dict[str, Any]], bytes],
+        tick: float = 0.05,
+        render: Optional[Callable[[Iterable[Optional[str]]], Dict[str, List[Any]]]] = None
+    ):
+        """
+        Initialize broadcast hub
+        
+        Args:
+            encode: Serializes a message to a frame (see PushRegistry.encode)
+            tick: Seconds to collect changes before sending them; 0 sends
+                  every change right away
+            render: Re-renders the pages of the given sessions once per
+                    tick and returns their patches by session ID, sent as
+                    ``patch``; sessions given the same list object share
+                    a frame (see App._render_sessions)
+        """
+        self._encode = encode
+        self.tick = tick
+        self._render = render
+        # Topics of each subscriber (None receives every key), and the
+        # subscribers grouped by topic set so flush() matches each set once
+        self._subscribers: Dict[Subscriber, Optional[FrozenSet[str]]] = {}
+        self._groups: Dict[Optional[FrozenSet[str]], Set[Subscriber]] = {}
+        # Pending values by (session ID, key); a None session reaches every page
+        self._pending: Dict[Tuple[Optional[str], str], Any] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._lock = threading.Lock()
+    
+    def subscribe(self, subscriber: Subscriber, topics: Optional[Iterable[str]] = None) -> None:
+        """
+        Subscribe a page to topics
+        
+        Args:
+            subscriber: Page to send to
+            topics: State key prefixes (e.g. 'dashboard' also matches
+                    'dashboard.cpu'); None subscribes to every key
+        """
+        with self._lock:
+            if topics is None:
+                merged = None
+            elif subscriber not in self._subscribers:
+                merged = frozenset(topics)
+            elif self._subscribers[subscriber] is not None:
+                merged = self._subscribers[subscriber].union(topics)
+            else:
+                return
+            self._remove(subscriber)
+            self._subscribers[subscriber] = merged
+            self._groups.setdefault(merged, set()).add(subscriber)
+    
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a page from all topics"""
+        with self._lock:
+            self._remove(subscriber)
+    
+    def _remove(self, subscriber: Subscriber) -> None:
+        """Drop a subscriber and its topic group entry (lock held)"""
+        if subscriber not in self._subscribers:
+            return
+        topics = self._subscribers.pop(subscriber)
+        group = self._groups[topics]
+        group.discard(subscriber)
+        if not group:
+            del self._groups[topics]
+    
+    def publish(self, key: str, value: Any, session_id: Optional[str] = None) -> None:
+        """
+        Publish a new value for a state key
+        
+        Values published for the same key within one tick replace each
+        other; only the last one is sent.
+        
+        Args:
+            key: State key (dot notation allowed)
+            value: New value
+            session_id: Only send to the pages of this session (for
+                        per-session states); None sends to every page
+        """
+        with self._lock:
+            self._pending[(session_id, key)] = value
+            if self.tick > 0:
+                if self._timer is None:
+                    self._timer = threading.Timer(self.tick, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+        self.flush()
+    
+    def flush(self) -> int:
+        """
+        Send the changes collected so far
+        
+        Each page gets one frame holding every change it is subscribed
+        to, however many of its topics a change matches, and the patch
+        re-rendering its session's page; other pages of that session get
+        the patch alone. Topics are matched once per distinct topic set,
+        and pages receiving the same changes and patch share one
+        serialized frame.
+        
+        Returns:
+            Number of frames queued across all subscribers
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+            groups = [(topics, list(members)) for topics, members in self._groups.items()]
+        if not pending:
+            return 0
+        
+        # Changed keys each page gets, by topic set and session
+        deliveries: List[Tuple[Tuple[Tuple[Optional[str], str], ...], List[Subscriber]]] = []
+        for topics, members in groups:
+            # Changes under the topic set, split into those for every page
+            # and those for one session's pages
+            shared: List[Tuple[Optional[str], str]] = []
+            private: Dict[str, List[Tuple[Optional[str], str]]] = {}
+            for session_id, key in pending:
+                if topics is None or any(_matches(key, topic) for topic in topics):
+                    if session_id is None:
+                        shared.append((session_id, key))
+                    else:
+                        private.setdefault(session_id, []).append((session_id, key))
+            if not shared and not private:
+                continue
+            
+            sessions: Dict[Optional[str], List[Subscriber]] = {}
+            for subscriber in members:
+                sessions.setdefault(subscriber.session_id, []).append(subscriber)
+            for page_session, pages in sessions.items():
+                keys = tuple(shared + private.get(page_session, []))
+                if keys:
+                    deliveries.append((keys, pages))
+        
+        patches: Dict[str, List[Any]] = {}
+        if self._render is not None and deliveries:
+            patches = self._render({pages[0].session_id for _, pages in deliveries})
+            
+            # Other pages of a re-rendered session need its patch too
+            delivered = {subscriber for _, pages in deliveries for subscriber in pages}
+            others: Dict[Optional[str], List[Subscriber]] = {}
+            for _, members in groups:
+                for subscriber in members:
+                    if subscriber not in delivered and patches.get(subscriber.session_id):
+                        others.setdefault(subscriber.session_id, []).append(subscriber)
+            deliveries.extend(((), pages) for pages in others.values())
+        
+        frames: Dict[Tuple[Tuple[Tuple[Optional[str], str], ...], int], bytes] = {}
+        sent = 0
+        for keys, pages in deliveries:
+            patch = patches.get(pages[0].session_id)
+            frame = frames.get((keys, id(patch)))
+            if frame is None:
+                message: Dict[str, Any] = {}
+                if keys:
+                    message['state_update'] = {key: pending[(session_id, key)] for session_id, key in keys}
+                if patch:
+                    message['patch'] = patch
+                frame = frames[(keys, id(patch))] = self._encode(message)
+            for subscriber in pages:
+                if subscriber.send(frame):
+                    sent += 1
+                else:
+                    self.unsubscribe(subscriber)
+        return sent
+    
+    def close(self) -> None:
+        """Stop the pending tick and drop all subscriptions"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._pending.clear()
+            self._subscribers.clear()
+            self._groups.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+
+def _matches(key: str, topic: Optional[str]) -> bool:
+    """Check whether a state key falls under a topic, or contains it"""
+    return topic is None or key == topic or key.startswith(topic + '.') or topic.startswith(key + '.')
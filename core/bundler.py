@@ -0,0 +1,199 @@
+"""
+Element Plus subset builds for Litchi 0.3.1
+
+Builds a registration bundle and a stylesheet containing only the
+Element Plus components an app renders, from an installed element-plus
+npm package. The stylesheet is concatenated from theme-chalk; the
+bundle needs esbuild (on PATH or in node_modules/.bin).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Set
+from pathlib import Path
+import os
+import re
+import shutil
+import subprocess
+
+
+# File names of the subset builds in an app's build folder
+SUBSET_SCRIPT = 'element-plus.subset.min.js'
+SUBSET_STYLE = 'element-plus.subset.css'
+
+# Services the client bootstrap calls directly, and the components they render
+_SERVICES = ('ElMessage', 'ElMessageBox')
+_SERVICE_STYLES = ('icon', 'message', 'message-box', 'overlay', 'button', 'input')
+
+
+def collect_components(vue_configs: Iterable[List[Any]]) -> Set[str]:
+    """
+    Collect the Element Plus component names used in rendered trees
+    
+    Args:
+        vue_configs: Rendered component configurations
+    
+    Returns:
+        Component names without the ``el-`` prefix (e.g. ``{'button'}``)
+    """
+    names: Set[str] = set()
+    
+    def visit(nodes: List[Any]) -> None:
+        for node in nodes:
+            if isinstance(node, dict):
+                component = node.get('component') or ''
+                if component.startswith('el-'):
+                    names.add(component[3:])
+                visit(node.get('children') or [])
+    
+    for vue_config in vue_configs:
+        visit(vue_config)
+    return names
+
+
+def export_name(name: str) -> str:
+    """Get the Element Plus export of a component name (``button-group`` -> ``ElButtonGroup``)"""
+    return 'El' + ''.join(part.capitalize() for part in name.split('-'))
+
+
+def build_element_plus(
+    names: Iterable[str],
+    package_dir: Path,
+    output_dir: Path,
+    esbuild: Optional[str] = None
+) -> Dict[str, Path]:
+    """
+    Build the subset stylesheet and bundle
+    
+    Names that element-plus does not export (such as Litchi's own
+    ``card-header``) are skipped.
+    
+    Args:
+        names: Component names without the ``el-`` prefix
+        package_dir: Installed element-plus package (node_modules/element-plus)
+        output_dir: Folder to write the builds to
+        esbuild: esbuild executable (found automatically if None)
+    
+    Returns:
+        Mapping of asset name ('element-plus-css', 'element-plus') to the
+        written file; the bundle is missing when esbuild is not available
+    """
+    package_dir = Path(package_dir)
+    if not (package_dir / 'package.json').is_file():
+        raise FileNotFoundError(f"element-plus package not found at {package_dir}")
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    exported = _exported_names(package_dir)
+    used = sorted(name for name in set(names) if export_name(name) in exported)
+    
+    built = {'element-plus-css': _build_style(used, package_dir, output_dir / SUBSET_STYLE)}
+    
+    esbuild = esbuild or _find_esbuild(package_dir)
+    if esbuild is not None:
+        built['element-plus'] = _build_script(used, package_dir, output_dir, esbuild)
+    return built
+
+
+def _exported_names(package_dir: Path) -> Set[str]:
+    """Get the component names exported by element-plus"""
+    names: Set[str] = set()
+    for index in (package_dir / 'es' / 'components').glob('*/index.mjs'):
+        names.update(re.findall(r'\bEl[A-Z]\w*', index.read_text(encoding='utf-8')))
+    return names
+
+
+def _build_style(names: List[str], package_dir: Path, output: Path) -> Path:
+    """Concatenate the theme-chalk base and the stylesheets the components import"""
+    theme = package_dir / 'theme-chalk'
+    files = [theme / 'base.css']
+    for name in list(_SERVICE_STYLES) + names:
+        for path in _style_files(name, package_dir):
+            if path.is_file() and path not in files:
+                files.append(path)
+    
+    output.write_text(
+        '\n'.join(path.read_text(encoding='utf-8') for path in files if path.is_file()),
+        encoding='utf-8'
+    )
+    return output
+
+
+def _style_files(name: str, package_dir: Path, seen: Optional[Set[str]] = None) -> List[Path]:
+    """
+    Get the theme-chalk stylesheets a component needs, dependencies first
+    
+    Follows the imports of ``es/components/<name>/style/css.mjs``, so
+    that e.g. select also brings in popper, scrollbar, tag and option.
+    
+    Args:
+        name: Component name without the ``el-`` prefix
+        package_dir: Installed element-plus package
+        seen: Components already visited
+    
+    Returns:
+        Stylesheet paths in import order
+    """
+    seen = set() if seen is None else seen
+    if name in seen:
+        return []
+    seen.add(name)
+    
+    entry = package_dir / 'es' / 'components' / name / 'style' / 'css.mjs'
+    if not entry.is_file():
+        return [package_dir / 'theme-chalk' / f'el-{name}.css']
+    
+    files: List[Path] = []
+    for source in re.findall(r"""import\s+['"]([^'"]+)['"]""", entry.read_text(encoding='utf-8')):
+        stylesheet = re.search(r'theme-chalk/([\w.-]+\.css)$', source)
+        dependency = re.match(r'\.\./\.\./([\w-]+)/style/css\.mjs$', source)
+        if stylesheet:
+            files.append(package_dir / 'theme-chalk' / stylesheet.group(1))
+        elif dependency:
+            files.extend(_style_files(dependency.group(1), package_dir, seen))
+    return files
+
+
+def _build_script(names: List[str], package_dir: Path, output_dir: Path, esbuild: str) -> Path:
+    """Bundle an entry registering only the used components with esbuild"""
+    components = [export_name(name) for name in names]
+    imports = ', '.join(components + list(_SERVICES))
+    
+    entry = output_dir / 'element-plus.entry.js'
+    entry.write_text(
+        "// Generated by Litchi App.build_assets(), do not edit\n"
+        f"import {{ {imports} }} from 'element-plus';\n"
+        f"export {{ {', '.join(_SERVICES)} }};\n"
+        f"const components = [{', '.join(components)}];\n"
+        "export function install(app) {\n"
+        "    for (const component of components) app.use(component);\n"
+        "}\n",
+        encoding='utf-8'
+    )
+    
+    # Resolve 'vue' to the global build the page already loads
+    shim = output_dir / 'element-plus.vue-global.js'
+    shim.write_text("module.exports = window.Vue;\n", encoding='utf-8')
+    
+    output = output_dir / SUBSET_SCRIPT
+    try:
+        subprocess.run(
+            [
+                esbuild, str(entry), '--bundle', '--minify', '--format=iife',
+                '--global-name=ElementPlus', f'--alias:vue={shim}',
+                f'--outfile={output}'
+            ],
+            env={**os.environ, 'NODE_PATH': str(package_dir.parent)},
+            check=True
+        )
+    finally:
+        entry.unlink(missing_ok=True)
+        shim.unlink(missing_ok=True)
+    return output
+
+
+def _find_esbuild(package_dir: Path) -> Optional[str]:
+    """Find an esbuild executable next to element-plus or on PATH"""
+    name = 'esbuild.cmd' if os.name == 'nt' else 'esbuild'
+    local = package_dir.parent / '.bin' / name
+    if local.is_file():
+        return str(local)
+    return shutil.which('esbuild')
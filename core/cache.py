@@ -0,0 +1,116 @@
+"""
+Page cache for Litchi 0.3.1
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .session import SessionStore
+from .state import StateManager
+
+
+class CachedPage:
+    """
+    A rendered page and what it was rendered from
+    """
+    
+    __slots__ = ('state', 'versions', 'context_version', 'page', 'vue_config', 'handlers')
+    
+    def __init__(
+        self,
+        state: StateManager,
+        versions: Tuple[Tuple[Optional[str], int], ...],
+        context_version: int,
+        page: Union[str, bytes],
+        vue_config: List[Dict[str, Any]],
+        handlers: Dict[str, Any]
+    ):
+        self.state = state
+        self.versions = versions
+        self.context_version = context_version
+        self.page = page
+        self.vue_config = vue_config
+        self.handlers = handlers
+    
+    def is_fresh(self, state: StateManager, context_version: int) -> bool:
+        """Check that no state key or context the page was rendered from changed"""
+        if state is not self.state or context_version != self.context_version:
+            return False
+        return all(state.key_version(key) == version for key, version in self.versions)
+    
+    def text(self) -> str:
+        """Page as text"""
+        return self.page.decode('utf-8') if isinstance(self.page, bytes) else self.page
+    
+    def bytes(self) -> bytes:
+        """Page as UTF-8 bytes"""
+        return self.page if isinstance(self.page, bytes) else self.page.encode('utf-8')
+
+
+class PageCache:
+    """
+    Rendered pages keyed by the versions of the state keys build() read
+    
+    Holds one page per cache key (a session ID, or '' for a shared state).
+    A page stays valid until one of the top-level state keys read while
+    rendering it is written, the state it was rendered from is replaced,
+    or the app context changes.
+    """
+    
+    def __init__(self, max_sessions: int = 1000, ttl: Optional[float] = 3600):
+        """
+        Initialize page cache
+        
+        Args:
+            max_sessions: Maximum number of cached pages
+            ttl: Idle time in seconds before a cached page expires
+        """
+        self._pages = SessionStore(lambda key: None, max_sessions=max_sessions, ttl=ttl)
+    
+    def get(self, key: str, state: StateManager, context_version: int) -> Optional[CachedPage]:
+        """
+        Get a cached page if it is still fresh
+        
+        Args:
+            key: Cache key
+            state: State the page would be rendered from now
+            context_version: Current app context version
+        
+        Returns:
+            Cached page, or None
+        """
+        entry = self._pages.peek(key)
+        if entry is None or not entry.is_fresh(state, context_version):
+            return None
+        return entry
+    
+    def put(
+        self,
+        key: str,
+        state: StateManager,
+        reads: Iterable[Optional[str]],
+        context_version: int,
+        page: Union[str, bytes],
+        vue_config: List[Dict[str, Any]],
+        handlers: Dict[str, Any]
+    ) -> None:
+        """
+        Cache a rendered page
+        
+        Args:
+            key: Cache key
+            state: State the page was rendered from
+            reads: Top-level keys read while rendering (see StateManager.track_reads)
+            context_version: App context version the page was rendered with
+            page: Rendered page
+            vue_config: Rendered component configuration
+            handlers: Component event handlers registered by the build
+        """
+        versions = tuple((read, state.key_version(read)) for read in reads)
+        self._pages.set(key, CachedPage(state, versions, context_version, page, vue_config, handlers))
+    
+    def clear(self) -> None:
+        """Drop all cached pages"""
+        self._pages.clear()
+    
+    def __len__(self) -> int:
+        return len(self._pages)
@@ -0,0 +1,139 @@
+"""
+Static hoisting for Litchi 0.3.1
+
+Finds subtrees of the rendered tree that do not depend on state or on
+per-render values, so they can be rendered and serialized once (see
+App.compile). A subtree is considered static when it renders identically
+in three builds: a normal one, one against a perturbed copy of the state
+(every value changed), and a second normal one (catching values such as
+the current time). Perturbing cannot change a missing or empty value, so
+builds reading one are not hoisted at all.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .component import Component, static_signature
+from .state import StateManager
+
+
+def perturbed_state(state: StateManager) -> StateManager:
+    """
+    Create a copy of a state with every value changed
+    
+    Args:
+        state: State to copy
+        
+    Returns:
+        New StateManager where each leaf value differs from the original
+    """
+    perturbed = StateManager()
+    perturbed.from_dict(_perturb(state.get_all()))
+    return perturbed
+
+
+def _perturb(value: Any) -> Any:
+    """Change a value while keeping its type and shape"""
+    if isinstance(value, bool):
+        return not value
+    if isinstance(value, (int, float)):
+        return value + 1
+    if isinstance(value, str):
+        return value + '\u200b'
+    if isinstance(value, dict):
+        return {key: _perturb(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_perturb(item) for item in value)
+    return value
+
+
+def empty_reads(state: StateManager, reads: Dict[Optional[str], None]) -> List[str]:
+    """
+    Find the missing or empty state values a build read
+    
+    Args:
+        state: State the build ran against
+        reads: Top-level keys read, from StateManager.track_reads()
+        
+    Returns:
+        Dotted paths of read keys that are missing, or hold None or an
+        empty container at any depth
+    """
+    values = state.get_all()
+    if None in reads:
+        return _empty_paths(values, '')
+    paths: List[str] = []
+    for key in reads:
+        if key not in values:
+            paths.append(key)
+        else:
+            paths.extend(_empty_paths(values[key], key))
+    return paths
+
+
+def _empty_paths(value: Any, path: str) -> List[str]:
+    """Find None or empty containers anywhere in a value"""
+    if value is None:
+        return [path]
+    if isinstance(value, dict):
+        if not value:
+            return [path]
+        return [found for key, item in value.items() for found in _empty_paths(item, f"{path}.{key}" if path else str(key))]
+    if isinstance(value, (list, tuple)):
+        if not value:
+            return [path]
+        return [found for index, item in enumerate(value) for found in _empty_paths(item, f"{path}.{index}")]
+    return []
+
+
+def _walk_nodes(nodes: List[Any]) -> Iterator[Dict[str, Any]]:
+    """Iterate over all rendered nodes depth-first"""
+    for node in nodes:
+        if isinstance(node, dict):
+            yield node
+            yield from _walk_nodes(node.get('children') or [])
+
+
+def _walk_components(components: List[Any]) -> Iterator[Component]:
+    """Iterate over all components depth-first"""
+    for component in components:
+        if isinstance(component, Component):
+            yield component
+            yield from _walk_components(component._children)
+        elif isinstance(component, list):
+            yield from _walk_components(component)
+
+
+def find_static_nodes(
+    components: List[Any],
+    vue_config: List[Dict[str, Any]],
+    *others: List[Dict[str, Any]]
+) -> Dict[str, Tuple[Any, Dict[str, Any]]]:
+    """
+    Find the largest subtrees rendered identically in every build
+    
+    Args:
+        components: Components of the primary build
+        vue_config: Rendered configuration of the primary build
+        *others: Rendered configurations of the comparison builds
+        
+    Returns:
+        Mapping of component ID to (signature, rendered node)
+    """
+    other_nodes = [{node.get('id'): node for node in _walk_nodes(config)} for config in others]
+    by_id = {component.id: component for component in _walk_components(components)}
+    
+    static: Dict[str, Tuple[Any, Dict[str, Any]]] = {}
+    
+    def visit(nodes: List[Any]) -> None:
+        for node in nodes:
+            if not isinstance(node, dict):
+                continue
+            node_id = node.get('id')
+            component = by_id.get(node_id)
+            if component is not None and all(others.get(node_id) == node for others in other_nodes):
+                static[node_id] = (static_signature(component), node)
+            else:
+                visit(node.get('children') or [])
+    
+    visit(vue_config)
+    return static
@@ -2,11 +2,23 @@
 Core component classes for Litchi 0.3.1
 """
 
-from typing import Any, Dict, List, Optional, Callable, Union
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Callable, Union
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
 import uuid
 
 
+# Hoisted static subtrees by component ID, active while a renderer renders
+# (see App.compile). Entries are (signature, rendered node).
+_static_nodes: ContextVar[Optional[Dict[str, Any]]] = ContextVar('litchi_static_nodes', default=None)
+
+# Memo cache of the app whose build() is running (see memo_cache())
+_memo_cache: ContextVar[Optional['MemoCache']] = ContextVar('litchi_memo_cache', default=None)
+
+
 class Component(ABC):
     """
     Base component class for Litchi 0.3.1
@@ -19,12 +31,28 @@ class Component(ABC):
         id: Optional[str] = None,
         css_class: Optional[Union[str, List[str]]] = None,
         style: Optional[Union[str, Dict[str, str]]] = None,
+        key: Optional[Any] = None,
+        debounce: Optional[int] = None,
+        throttle: Optional[int] = None,
         **kwargs
     ):
-        """Initialize component with basic properties"""
-        self.id = id or f"litchi_{uuid.uuid4().hex[:8]}"
+        """
+        Initialize component with basic properties
+        
+        ``on_<event>`` keyword arguments register event handlers; debounce
+        or throttle (milliseconds) rate-limit those events in the browser
+        (see on()). ``key`` is passed to Vue as the ``key`` prop, like any
+        other keyword argument, and also names the component in path IDs
+        (see assign_ids()).
+        """
+        self._id = id or None
+        self.key = key
+        self._auto_id = id is None
         self._props: Dict[str, Any] = {}
+        if key is not None:
+            self._props['key'] = key
         self._events: Dict[str, Callable] = {}
+        self._event_rates: Dict[str, Dict[str, int]] = {}
         self._children: List[Any] = []
         
         # Handle CSS classes
@@ -45,15 +73,52 @@ class Component(ABC):
         for key, value in kwargs.items():
             if key.startswith('on_'):
                 event_name = key[3:]  # Remove 'on_' prefix
-                self.on(event_name, value)
+                self.on(event_name, value, debounce=debounce, throttle=throttle)
             else:
                 self._props[key] = value
     
-    def on(self, event: str, handler: Union[Callable, str]) -> 'Component':
-        """Add event handler"""
+    def on(
+        self,
+        event: str,
+        handler: Union[Callable, str],
+        debounce: Optional[int] = None,
+        throttle: Optional[int] = None
+    ) -> 'Component':
+        """
+        Add event handler
+        
+        Args:
+            event: Event name
+            handler: Python callable, or a client-side expression string
+            debounce: Only send the event once it has not fired for this
+                      many milliseconds (e.g. search as you type)
+            throttle: Send the event at most once per this many
+                      milliseconds (e.g. scrolling)
+        """
+        if debounce is not None and throttle is not None:
+            raise ValueError("Use either debounce or throttle, not both")
+        
         self._events[event] = handler
+        self._event_rates.pop(event, None)
+        for name, value in (('debounce', debounce), ('throttle', throttle)):
+            if value is not None:
+                if value < 0:
+                    raise ValueError(f"{name} must not be negative: {value!r}")
+                self._event_rates[event] = {name: int(value)}
         return self
     
+    # Random IDs are only generated when read, since path-mode trees
+    # replace them in assign_ids() before anything looks at them.
+    @property
+    def id(self) -> str:
+        if self._id is None:
+            self._id = f"litchi_{uuid.uuid4().hex[:8]}"
+        return self._id
+    
+    @id.setter
+    def id(self, value: str) -> None:
+        self._id = value
+    
     def prop(self, **props) -> 'Component':
         """Set properties"""
         self._props.update(props)
@@ -87,12 +152,39 @@ class Component(ABC):
                 self._children.append(child)
         return self
     
-    def _build_events(self) -> Dict[str, str]:
+    def memo(self, key: Hashable, deps: Iterable[Hashable] = ()) -> 'Memo':
+        """
+        Wrap this component in a Memo
+        
+        Args:
+            key: Cache key identifying the subtree
+            deps: Values the subtree depends on
+        """
+        return Memo(self, key=key, deps=deps)
+    
+    def assign_ids(self, path: str) -> None:
+        """
+        Assign IDs derived from tree position
+        
+        Components without an explicit ``id`` get ``litchi_<path>``, where
+        the path lists the index (or ``key``, if given) of each component
+        from the root. Identical trees therefore get identical IDs.
+        
+        Args:
+            path: Position of this component in the tree
+        """
+        if self._auto_id:
+            self.id = f"litchi_{path}"
+        _assign_child_ids(self._children, path)
+    
+    def _build_events(self) -> Dict[str, Any]:
         """Build events dictionary for frontend"""
-        events = {}
+        events: Dict[str, Any] = {}
         for event_name, handler in self._events.items():
             if callable(handler):
-                events[event_name] = f"handleEvent('{self.id}', '{event_name}', $event)"
+                call = f"handleEvent('{self.id}', '{event_name}', $event)"
+                rate = self._event_rates.get(event_name)
+                events[event_name] = {'handler': call, **rate} if rate else call
             elif isinstance(handler, str):
                 events[event_name] = handler
         return events
@@ -104,7 +196,7 @@ class Component(ABC):
             if child is None:
                 continue
             elif hasattr(child, 'render'):
-                rendered.append(child.render())
+                rendered.append(render_component(child))
             elif isinstance(child, (str, int, float, bool)):
                 rendered.append(str(child))
             elif isinstance(child, dict):
@@ -122,6 +214,150 @@ class Component(ABC):
         return f"<{self.__class__.__name__}(id='{self.id}')>"
 
 
+def static_signature(component: Any) -> Any:
+    """
+    Get the identity check a hoisted subtree must pass to be reused
+    
+    Covers everything rendering reads: the type, ID, tag or element,
+    props and events (with their rates) of the component and of
+    everything below it, so a subtree that would render differently is
+    rendered again.
+    """
+    if isinstance(component, list):
+        return [static_signature(item) for item in component]
+    if not isinstance(component, Component):
+        return component
+    return (
+        type(component).__qualname__,
+        component.id,
+        getattr(component, 'tag', None),
+        getattr(component, 'element', None),
+        component._props,
+        {name: _event_input(component, name, handler) for name, handler in component._events.items()},
+        [static_signature(child) for child in component._children]
+    )
+
+
+def _event_input(component: Component, name: str, handler: Any) -> Any:
+    """Get what the rendered form of an event depends on besides the component ID"""
+    if callable(handler):
+        return component._event_rates.get(name, True)
+    return handler if isinstance(handler, str) else None
+
+
+def matches_signature(component: Any, signature: Any) -> bool:
+    """
+    Check a subtree against a static_signature() without building one
+    
+    Walks the component subtree like static_signature() does, but stops
+    at the first difference and allocates nothing, so the check costs a
+    fraction of rendering the subtree (though it still visits all of it
+    when the subtree is unchanged).
+    """
+    if isinstance(component, list):
+        return (
+            isinstance(signature, list) and len(component) == len(signature)
+            and all(matches_signature(item, expected) for item, expected in zip(component, signature))
+        )
+    if not isinstance(component, Component):
+        return component == signature
+    if not isinstance(signature, tuple) or len(signature) != 7:
+        return False
+    name, component_id, tag, element, props, events, children = signature
+    return (
+        type(component).__qualname__ == name
+        and component.id == component_id
+        and getattr(component, 'tag', None) == tag
+        and getattr(component, 'element', None) == element
+        and len(component._children) == len(children)
+        and component._props == props
+        and len(component._events) == len(events)
+        and all(
+            event in events and events[event] == _event_input(component, event, handler)
+            for event, handler in component._events.items()
+        )
+        and all(matches_signature(child, expected) for child, expected in zip(component._children, children))
+    )
+
+
+@contextmanager
+def static_nodes(nodes: Optional[Dict[str, Any]]):
+    """
+    Reuse hoisted static subtrees while rendering
+    
+    Args:
+        nodes: Mapping of component ID to (signature, rendered node)
+    """
+    token = _static_nodes.set(nodes or None)
+    try:
+        yield
+    finally:
+        _static_nodes.reset(token)
+
+
+@contextmanager
+def memo_cache(cache: 'MemoCache'):
+    """
+    Make Memo components created in the block use a cache
+    
+    Args:
+        cache: Cache owned by the app (or renderer) building the tree
+    """
+    token = _memo_cache.set(cache)
+    try:
+        yield
+    finally:
+        _memo_cache.reset(token)
+
+
+def render_component(component: Any) -> Any:
+    """Render a component, reusing its hoisted static subtree if there is one"""
+    nodes = _static_nodes.get()
+    if nodes:
+        entry = nodes.get(getattr(component, 'id', None))
+        if entry is not None and matches_signature(component, entry[0]):
+            return entry[1]
+    return component.render()
+
+
+def _path_segment(item: Any, index: int) -> str:
+    """
+    Get the ID path segment for an item at index
+    
+    Index segments are digits; key segments start with ``k`` and escape
+    every character other than ASCII letters and digits as ``-<hex>-``,
+    so distinct keys never share a segment with each other or an index.
+    """
+    key = getattr(item, 'key', None)
+    if key is None:
+        return str(index)
+    return 'k' + ''.join(
+        char if char.isascii() and char.isalnum() else f"-{ord(char):x}-"
+        for char in str(key)
+    )
+
+
+def _assign_child_ids(children: List[Any], path: str) -> None:
+    """Assign tree-position IDs to components in a children list"""
+    for index, child in enumerate(children):
+        if isinstance(child, Component):
+            child.assign_ids(f"{path}_{_path_segment(child, index)}")
+        elif isinstance(child, list):
+            _assign_child_ids(child, f"{path}_{index}")
+
+
+def assign_ids(components: List[Any]) -> None:
+    """
+    Assign tree-position IDs to a list of root components
+    
+    Args:
+        components: Root components, as returned by App.build()
+    """
+    for index, component in enumerate(components):
+        if isinstance(component, Component):
+            component.assign_ids(_path_segment(component, index))
+
+
 class ElementComponent(Component):
     """
     Element Plus component base class
@@ -162,3 +398,149 @@ class HtmlComponent(Component):
             'events': self._build_events(),
             'children': self._render_children()
         }
+
+
+class MemoCache:
+    """
+    Bounded LRU cache of rendered subtrees used by Memo
+    """
+    
+    def __init__(self, maxsize: int = 256):
+        """
+        Initialize memo cache
+        
+        Args:
+            maxsize: Maximum number of cached subtrees
+        """
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[Hashable, list]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[list]:
+        """Get a cached [rendered, component] entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def set(self, key: Hashable, entry: list) -> None:
+        """Store a [rendered, component] entry"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached subtrees"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Memo(Component):
+    """
+    Memoized subtree
+    
+    Renders its content once and reuses the rendered dictionary verbatim
+    for as long as ``key`` and ``deps`` stay the same. Passing a factory
+    instead of a component also skips building the subtree on cache hits.
+    Event handlers of a cached subtree are the ones from the build that
+    filled the cache. Each app caches separately; a Memo built outside of
+    an app uses the shared ``Memo.cache``.
+    
+    Usage:
+        Memo(lambda: Navigation(user), key='nav', deps=(user.id,))
+        Footer().memo(key='footer')
+    """
+    
+    # Fallback for Memo components built outside of memo_cache()
+    cache = MemoCache()
+    
+    def __init__(
+        self,
+        content: Union[Component, Callable[[], Any]],
+        key: Hashable,
+        deps: Iterable[Hashable] = (),
+        **kwargs
+    ):
+        """
+        Initialize memoized subtree
+        
+        Args:
+            content: Component, or a callable building it
+            key: Cache key identifying the subtree
+            deps: Hashable values the subtree depends on
+            **kwargs: Additional properties
+        """
+        super().__init__(**kwargs)
+        cache = _memo_cache.get()
+        if cache is not None:
+            self.cache = cache
+        self._content = content
+        self.memo_key = key
+        self.deps = tuple(deps)
+        self._path: Optional[str] = None
+        self._entry: Optional[list] = None
+    
+    # The memoized component is the only child; it is resolved on first
+    # access so that cache hits never build the subtree.
+    @property
+    def _children(self) -> List[Any]:
+        return [self._resolve()[1]]
+    
+    @_children.setter
+    def _children(self, value: List[Any]) -> None:
+        pass
+    
+    def child(self, *children) -> 'Component':
+        raise TypeError("Memo content is fixed at construction")
+    
+    def assign_ids(self, path: str) -> None:
+        """Assign tree-position IDs; cached subtrees keep the IDs they were rendered with"""
+        self._path = path
+        if self._auto_id:
+            self.id = f"litchi_{path}"
+        
+        rendered, component = self._resolve()
+        if rendered is None and isinstance(component, Component):
+            component.assign_ids(path)
+    
+    def _resolve(self) -> list:
+        """Look up the cache entry, building the content on a miss"""
+        if self._entry is None:
+            entry = self.cache.get(self._cache_key())
+            if entry is None:
+                content = self._content
+                if callable(content) and not isinstance(content, Component):
+                    # Factories run after build() returned; Memo components
+                    # they create belong to the same app's cache
+                    with memo_cache(self.cache):
+                        content = content()
+                entry = [None, content]
+            self._entry = entry
+        return self._entry
+    
+    def _cache_key(self) -> Hashable:
+        return (self.memo_key, self.deps, self._path)
+    
+    def render(self) -> Dict[str, Any]:
+        """Render memoized content, reusing the cached result if present"""
+        entry = self._resolve()
+        if entry[0] is None:
+            content = entry[1]
+            if hasattr(content, 'render'):
+                entry[0] = content.render()
+            else:
+                entry[0] = {
+                    'id': self.id,
+                    'component': 'span',
+                    'props': {},
+                    'events': {},
+                    'children': [str(content)]
+                }
+            self.cache.set(self._cache_key(), entry)
+        return entry[0]
@@ -0,0 +1,154 @@
+"""
+Response compression for Litchi 0.3.1
+
+Compresses with gzip, or with brotli when the brotli package is
+installed and the client accepts it.
+"""
+
+from typing import Optional, Tuple
+from collections import OrderedDict
+import hashlib
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Supported content codings, in order of preference
+CODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+class Compressor:
+    """
+    Content-coding negotiation and compression with a body cache
+    
+    Compressed bodies are cached by coding and content hash, so serving
+    an unchanged page again costs a hash instead of a compression. Bodies
+    starting with a registered prefix (such as the page shell head) are
+    gzipped from a copy of a compressor that has already consumed it.
+    """
+    
+    def __init__(
+        self,
+        min_size: int = 1024,
+        level: int = 6,
+        cache_size: int = 64,
+        max_prefixes: int = 8
+    ):
+        """
+        Initialize compressor
+        
+        Args:
+            min_size: Smallest body in bytes worth compressing
+            level: gzip compression level (brotli uses its quality 5)
+            cache_size: Maximum number of compressed bodies kept
+            max_prefixes: Maximum number of precompressed prefixes kept;
+                          adding another replaces the oldest
+        """
+        self.min_size = min_size
+        self.level = level
+        self.cache_size = cache_size
+        self.max_prefixes = max_prefixes
+        self._cache: 'OrderedDict[Tuple[str, bytes], bytes]' = OrderedDict()
+        self._prefixes: 'OrderedDict[bytes, Tuple[object, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def negotiate(self, accept_encoding: Optional[str]) -> Optional[str]:
+        """
+        Choose a content coding from an Accept-Encoding header
+        
+        The accepted coding with the highest q-value wins; ties go to the
+        order of CODINGS. Codings with q=0 are never chosen.
+        
+        Args:
+            accept_encoding: Accept-Encoding header value
+        
+        Returns:
+            Coding name, or None to send the body as is
+        """
+        if not accept_encoding:
+            return None
+        
+        accepted = {}
+        for item in accept_encoding.split(','):
+            coding, _, params = item.strip().partition(';')
+            quality = 1.0
+            params = params.strip()
+            if params.startswith('q='):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding.strip().lower()] = quality
+        
+        best, best_quality = None, 0.0
+        for coding in CODINGS:
+            quality = accepted.get(coding, accepted.get('*', 0.0))
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+    
+    def add_prefix(self, prefix: bytes) -> None:
+        """
+        Precompress a common body prefix for gzip
+        
+        Args:
+            prefix: Bytes many bodies start with
+        """
+        if prefix in self._prefixes:
+            return
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        compressed = compressor.compress(prefix)
+        with self._lock:
+            self._prefixes[prefix] = (compressor, compressed)
+            while len(self._prefixes) > self.max_prefixes:
+                self._prefixes.popitem(last=False)
+    
+    def compress(self, data: bytes, coding: str) -> bytes:
+        """
+        Compress a body, reusing an earlier result for the same content
+        
+        Args:
+            data: Body to compress
+            coding: Content coding from negotiate()
+        
+        Returns:
+            Compressed body
+        """
+        key = (coding, hashlib.sha1(data).digest())
+        with self._lock:
+            compressed = self._cache.get(key)
+            if compressed is not None:
+                self._cache.move_to_end(key)
+                return compressed
+        
+        if coding == 'br':
+            compressed = brotli.compress(data, quality=5)
+        else:
+            compressed = self._gzip(data)
+        
+        with self._lock:
+            self._cache[key] = compressed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return compressed
+    
+    def _gzip(self, data: bytes) -> bytes:
+        """gzip a body, starting from a precompressed prefix if one matches"""
+        for prefix, (base, head) in list(self._prefixes.items()):
+            if data.startswith(prefix):
+                with self._lock:
+                    compressor = base.copy()
+                return head + compressor.compress(data[len(prefix):]) + compressor.flush()
+        
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+    
+    def clear(self) -> None:
+        """Drop cached bodies and prefixes"""
+        with self._lock:
+            self._cache.clear()
+            self._prefixes.clear()
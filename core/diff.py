@@ -0,0 +1,158 @@
+"""
+Component tree diffing for Litchi 0.3.1
+
+Compares two rendered Vue configurations and produces a JSON Patch
+(RFC 6902) that turns the old tree into the new one. Children whose
+nodes all carry unique IDs are matched by ID, so inserting, removing or
+reordering siblings yields add/remove/move operations instead of a
+cascade of replacements.
+"""
+
+from typing import Any, Dict, List
+
+
+Operation = Dict[str, Any]
+
+# Node fields diffed individually; any other field is compared as a whole
+_NODE_FIELDS = ('props', 'events', 'children')
+
+
+def diff_tree(old: List[Any], new: List[Any]) -> List[Operation]:
+    """
+    Diff two rendered component trees
+    
+    Args:
+        old: Previously rendered Vue configuration
+        new: Newly rendered Vue configuration
+        
+    Returns:
+        List of JSON Patch operations, empty if the trees are equal
+    """
+    ops: List[Operation] = []
+    _diff_list(old, new, '', ops)
+    return ops
+
+
+def _escape(key: Any) -> str:
+    """Escape a key for use in a JSON Pointer"""
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+
+def _has_unique_ids(items: List[Any]) -> bool:
+    """Check whether all items are nodes with distinct IDs"""
+    ids = set()
+    for item in items:
+        if not isinstance(item, dict) or 'id' not in item or item['id'] in ids:
+            return False
+        ids.add(item['id'])
+    return True
+
+
+def _diff_list(old: List[Any], new: List[Any], path: str, ops: List[Operation]) -> None:
+    """Diff two lists of children"""
+    if old is new:
+        return
+    if _has_unique_ids(old) and _has_unique_ids(new):
+        _diff_keyed(old, new, path, ops)
+    else:
+        _diff_positional(old, new, path, ops)
+
+
+def _diff_keyed(old: List[Dict[str, Any]], new: List[Dict[str, Any]], path: str, ops: List[Operation]) -> None:
+    """Diff children matched by node ID"""
+    old_by_id = {node['id']: node for node in old}
+    new_ids = {node['id'] for node in new}
+    
+    # Simulate the client list while emitting operations
+    current = [node['id'] for node in old]
+    
+    for index in range(len(current) - 1, -1, -1):
+        if current[index] not in new_ids:
+            ops.append({'op': 'remove', 'path': f"{path}/{index}"})
+            del current[index]
+    
+    for index, node in enumerate(new):
+        node_id = node['id']
+        if index < len(current) and current[index] == node_id:
+            _diff_node(old_by_id[node_id], node, f"{path}/{index}", ops)
+        elif node_id in old_by_id:
+            source = current.index(node_id, index)
+            ops.append({'op': 'move', 'from': f"{path}/{source}", 'path': f"{path}/{index}"})
+            current.insert(index, current.pop(source))
+            _diff_node(old_by_id[node_id], node, f"{path}/{index}", ops)
+        else:
+            ops.append({'op': 'add', 'path': f"{path}/{index}", 'value': node})
+            current.insert(index, node_id)
+
+
+def _diff_positional(old: List[Any], new: List[Any], path: str, ops: List[Operation]) -> None:
+    """Diff children matched by position"""
+    common = min(len(old), len(new))
+    
+    for index in range(common):
+        a, b = old[index], new[index]
+        if a is b:
+            continue
+        if (isinstance(a, dict) and isinstance(b, dict)
+                and a.get('id') == b.get('id') and a.get('component') == b.get('component')):
+            _diff_node(a, b, f"{path}/{index}", ops)
+        elif a != b:
+            ops.append({'op': 'replace', 'path': f"{path}/{index}", 'value': b})
+    
+    for index in range(len(old) - 1, common - 1, -1):
+        ops.append({'op': 'remove', 'path': f"{path}/{index}"})
+    
+    for index in range(common, len(new)):
+        ops.append({'op': 'add', 'path': f"{path}/{index}", 'value': new[index]})
+
+
+def _diff_node(old: Dict[str, Any], new: Dict[str, Any], path: str, ops: List[Operation]) -> None:
+    """Diff two nodes with the same ID"""
+    if old is new:
+        return
+    if old.get('component') != new.get('component') or old.get('id') != new.get('id'):
+        ops.append({'op': 'replace', 'path': path, 'value': new})
+        return
+    
+    old_props, new_props = old.get('props'), new.get('props')
+    if isinstance(old_props, dict) and isinstance(new_props, dict):
+        _diff_dict(old_props, new_props, f"{path}/props", ops)
+    else:
+        _diff_field(old, new, 'props', path, ops)
+    
+    old_children, new_children = old.get('children'), new.get('children')
+    if isinstance(old_children, list) and isinstance(new_children, list):
+        _diff_list(old_children, new_children, f"{path}/children", ops)
+    else:
+        _diff_field(old, new, 'children', path, ops)
+    
+    _diff_field(old, new, 'events', path, ops)
+    
+    for field in new.keys() | old.keys():
+        if field not in _NODE_FIELDS:
+            _diff_field(old, new, field, path, ops)
+
+
+def _diff_dict(old: Dict[str, Any], new: Dict[str, Any], path: str, ops: List[Operation]) -> None:
+    """Diff two flat dictionaries key by key"""
+    for key, value in new.items():
+        if key not in old:
+            ops.append({'op': 'add', 'path': f"{path}/{_escape(key)}", 'value': value})
+        elif old[key] != value:
+            ops.append({'op': 'replace', 'path': f"{path}/{_escape(key)}", 'value': value})
+    
+    for key in old:
+        if key not in new:
+            ops.append({'op': 'remove', 'path': f"{path}/{_escape(key)}"})
+
+
+def _diff_field(old: Dict[str, Any], new: Dict[str, Any], field: str, path: str, ops: List[Operation]) -> None:
+    """Diff a single node field as a whole"""
+    target = f"{path}/{_escape(field)}"
+    if field not in new:
+        if field in old:
+            ops.append({'op': 'remove', 'path': target})
+    elif field not in old:
+        ops.append({'op': 'add', 'path': target, 'value': new[field]})
+    elif old[field] != new[field]:
+        ops.append({'op': 'replace', 'path': target, 'value': new[field]})
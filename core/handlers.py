@@ -0,0 +1,102 @@
+"""
+Event handler binding for Litchi 0.3.1
+"""
+
+from typing import Any, Callable, Dict, Hashable, Tuple
+import inspect
+import types
+import weakref
+
+
+# Signature parameters per function (or per code object, see _cache_key()),
+# shared by all binders of that function
+_parameters_cache: 'weakref.WeakKeyDictionary[Hashable, Tuple[inspect.Parameter, ...]]' = weakref.WeakKeyDictionary()
+
+_POSITIONAL = (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD)
+
+
+def _cache_key(target: Callable) -> Hashable:
+    """
+    Get the parameter cache key of a function
+    
+    Lambdas and closures created in build() are new function objects on
+    every build but share their code object, which fixes the names and
+    kinds of their parameters (the only parts binders use). Functions
+    whose signature comes from elsewhere, e.g. wrappers made with
+    functools.wraps, are keyed on themselves.
+    """
+    if (
+        isinstance(target, types.FunctionType)
+        and '__wrapped__' not in target.__dict__
+        and '__signature__' not in target.__dict__
+    ):
+        return target.__code__
+    return target
+
+
+def _parameters(func: Callable) -> Tuple[inspect.Parameter, ...]:
+    """Get signature parameters of a callable, cached per underlying function"""
+    target = getattr(func, '__func__', func)
+    key = _cache_key(target)
+    try:
+        params = _parameters_cache.get(key)
+    except TypeError:
+        # Not weak-referenceable, e.g. some builtins
+        return tuple(inspect.signature(func).parameters.values())
+    
+    if params is None:
+        params = tuple(inspect.signature(target).parameters.values())
+        _parameters_cache[key] = params
+    
+    # Bound methods receive their first argument implicitly
+    if target is not func:
+        params = params[1:]
+    return params
+
+
+class HandlerBinder:
+    """
+    Event handler with its signature resolved ahead of time
+    
+    Calling the binder with the event params passes only the params the
+    handler declares (or all of them if it takes ``**kwargs``), so no
+    introspection happens at dispatch time.
+    """
+    
+    __slots__ = ('handler', 'names', 'accepts_kwargs', 'wants_app')
+    
+    def __init__(self, handler: Callable, pass_app: bool = False):
+        """
+        Initialize handler binder
+        
+        Args:
+            handler: Handler callable
+            pass_app: Pass the app as first positional argument, as done
+                      for handlers registered with ``@app.on``
+        """
+        params = _parameters(handler)
+        
+        self.handler = handler
+        self.wants_app = pass_app and bool(params) and params[0].kind in _POSITIONAL
+        if self.wants_app:
+            params = params[1:]
+        
+        self.accepts_kwargs = any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params)
+        self.names = tuple(
+            p.name for p in params
+            if p.kind in (inspect.Parameter.POSITIONAL_OR_KEYWORD, inspect.Parameter.KEYWORD_ONLY)
+        )
+    
+    def __call__(self, app: Any, params: Dict[str, Any]) -> Any:
+        """Call the handler with the params it accepts"""
+        if self.accepts_kwargs:
+            kwargs = dict(params)
+        else:
+            kwargs = {name: params[name] for name in self.names if name in params}
+        
+        if self.wants_app:
+            return self.handler(app, **kwargs)
+        return self.handler(**kwargs)
+    
+    def __repr__(self) -> str:
+        return f"<HandlerBinder({getattr(self.handler, '__qualname__', self.handler)!r})>"
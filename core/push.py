@@ -0,0 +1,161 @@
+"""
+Server push for Litchi 0.3.1
+
+Pages subscribe to a Server-Sent Events stream once and apply the
+messages pushed to them. Each message is serialized to an SSE frame
+once, to UTF-8 bytes, and the same bytes are written to every
+subscriber it goes to.
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set
+import queue
+import threading
+
+
+class Subscriber:
+    """
+    One connected page, holding frames until its stream sends them
+    
+    A subscriber that falls more than ``max_pending`` frames behind is
+    closed rather than buffering without limit; the page reconnects.
+    """
+    
+    def __init__(self, session_id: Optional[str], max_pending: int = 256):
+        """
+        Initialize subscriber
+        
+        Args:
+            session_id: Session of the page
+            max_pending: Maximum number of frames waiting to be sent
+        """
+        self.session_id = session_id
+        self.closed = False
+        self._frames: 'queue.Queue[Optional[bytes]]' = queue.Queue(maxsize=max_pending)
+    
+    def send(self, frame: bytes) -> bool:
+        """
+        Queue a frame for sending
+        
+        Returns:
+            False if the subscriber is closed
+        """
+        if self.closed:
+            return False
+        try:
+            self._frames.put_nowait(frame)
+            return True
+        except queue.Full:
+            self.close()
+            return False
+    
+    def close(self) -> None:
+        """Close the subscriber, ending its stream"""
+        self.closed = True
+        while True:
+            try:
+                self._frames.get_nowait()
+            except queue.Empty:
+                break
+        try:
+            self._frames.put_nowait(None)
+        except queue.Full:
+            pass
+    
+    def frames(self, keepalive: float = 15.0) -> Iterator[bytes]:
+        """
+        Iterate over frames to send, with comments in between to keep the
+        connection open (and to notice disconnected pages)
+        
+        Args:
+            keepalive: Seconds of silence before a keep-alive comment
+        """
+        while True:
+            try:
+                frame = self._frames.get(timeout=keepalive)
+            except queue.Empty:
+                yield b': keep-alive\n\n'
+                continue
+            if frame is None:
+                return
+            yield frame
+
+
+class PushRegistry:
+    """
+    Connected pages by session
+    """
+    
+    def __init__(self, encoder: Callable[[Any], str], max_pending: int = 256):
+        """
+        Initialize push registry
+        
+        Args:
+            encoder: JSON encoder for messages
+            max_pending: Maximum number of frames waiting per subscriber
+        """
+        self._encoder = encoder
+        self._max_pending = max_pending
+        self._sessions: Dict[Optional[str], Set[Subscriber]] = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, session_id: Optional[str]) -> Subscriber:
+        """Register a page of a session"""
+        subscriber = Subscriber(session_id, self._max_pending)
+        with self._lock:
+            self._sessions.setdefault(session_id, set()).add(subscriber)
+        return subscriber
+    
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        """Remove a page"""
+        with self._lock:
+            subscribers = self._sessions.get(subscriber.session_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._sessions[subscriber.session_id]
+    
+    def encode(self, message: Dict[str, Any]) -> bytes:
+        """Serialize a message to an SSE frame"""
+        data = self._encoder(message).replace('\n', '\ndata: ')
+        return f"data: {data}\n\n".encode('utf-8')
+    
+    def push(self, message: Dict[str, Any], session_id: Optional[str] = None) -> int:
+        """
+        Push a message to the pages of a session, or to every page
+        
+        Args:
+            message: Message for the client, e.g. ``{'state_update': {...}}``
+            session_id: Session to push to; None pushes to every page
+        
+        Returns:
+            Number of pages the message was queued for
+        """
+        return self.send_frame(self.encode(message), session_id)
+    
+    def send_frame(self, frame: bytes, session_id: Optional[str] = None) -> int:
+        """Queue an already serialized frame (see push())"""
+        sent = 0
+        for subscriber in self.subscribers(session_id):
+            if subscriber.send(frame):
+                sent += 1
+            else:
+                self.unsubscribe(subscriber)
+        return sent
+    
+    def subscribers(self, session_id: Optional[str] = None) -> List[Subscriber]:
+        """Get the pages of a session, or every page"""
+        with self._lock:
+            if session_id is not None:
+                return list(self._sessions.get(session_id, ()))
+            return [subscriber for subscribers in self._sessions.values() for subscriber in subscribers]
+    
+    def close(self) -> None:
+        """Close every page's stream"""
+        for subscriber in self.subscribers():
+            subscriber.close()
+        with self._lock:
+            self._sessions.clear()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._sessions.values())
@@ -2,9 +2,64 @@
 Renderer for Litchi 0.3.1
 """
 
-from typing import Any, Dict, List, Optional
-import json
-from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Union
+import html
+import urllib.parse
+
+from . import serialization
+from .assets import AssetManifest
+from . import ssr
+from .component import MemoCache, render_component, static_nodes
+
+
+# Keys of a rendered node, in packed positional order
+_NODE_KEYS = ('id', 'component', 'props', 'events', 'children')
+
+ENCODINGS = ('pretty', 'compact', 'packed')
+
+
+class PageShell:
+    """
+    Static parts of a page, compiled once per app
+    
+    A page is its static parts with the dynamic slots (the server-rendered
+    app markup, if any, and the encoded config) filled in between. Parts
+    are kept as text and as UTF-8 bytes so responses only encode the slots.
+    """
+    
+    __slots__ = ('key', 'parts', 'parts_bytes')
+    
+    def __init__(self, key: Any, parts: List[str]):
+        """Initialize page shell"""
+        self.key = key
+        self.parts = parts
+        self.parts_bytes = [part.encode('utf-8') for part in parts]
+    
+    @property
+    def head(self) -> str:
+        """Page up to the first slot"""
+        return self.parts[0]
+    
+    @property
+    def tail(self) -> str:
+        """Page after the last slot"""
+        return self.parts[-1]
+    
+    def fill(self, *slots: str) -> str:
+        """Build the page text around the slot values"""
+        pieces = [self.parts[0]]
+        for slot, part in zip(slots, self.parts[1:]):
+            pieces.append(slot)
+            pieces.append(part)
+        return ''.join(pieces)
+    
+    def fill_bytes(self, *slots: str) -> bytes:
+        """Build the UTF-8 encoded page around the slot values"""
+        pieces = [self.parts_bytes[0]]
+        for slot, part in zip(slots, self.parts_bytes[1:]):
+            pieces.append(slot.encode('utf-8'))
+            pieces.append(part)
+        return b''.join(pieces)
 
 
 class Renderer:
@@ -12,9 +67,51 @@ class Renderer:
     Minimal but powerful renderer for Litchi 0.3.1
     """
     
-    def __init__(self):
-        """Initialize renderer"""
-        pass
+    def __init__(
+        self,
+        encoding: str = 'pretty',
+        json_encoder: Optional[Callable[..., str]] = None,
+        ssr: bool = False,
+        assets: Optional[AssetManifest] = None
+    ):
+        """
+        Initialize renderer
+        
+        Args:
+            encoding: How the component configuration is embedded in the page:
+                      'pretty' (indented JSON), 'compact' (no whitespace, empty
+                      fields omitted) or 'packed' (positional node arrays with
+                      a string table for component names and prop keys)
+            json_encoder: Callable ``(obj, indent=False) -> str`` used for all
+                          JSON the app produces (defaults to orjson when
+                          installed, otherwise the json module)
+            ssr: Render native HTML components to HTML on the server and
+                 hydrate them on the client instead of mounting from
+                 scratch; Element Plus components mount after hydration
+            assets: Where pages load Vue, Element Plus and axios from
+                    (defaults to the CDN development builds)
+        """
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Invalid encoding: {encoding!r}")
+        self.encoding = encoding
+        self.json_encoder = json_encoder or serialization.dumps
+        self.ssr = ssr
+        self.assets = assets if assets is not None else AssetManifest(local=False)
+        self._shell: Optional[PageShell] = None
+        
+        # Hoisted static subtrees (see App.compile), their pre-serialized
+        # JSON keyed by node identity and, for the packed encoding, the
+        # string table the fragments were packed against
+        self._static_nodes: Dict[str, Any] = {}
+        self._fragments: Dict[int, str] = {}
+        self._static_strings: Dict[str, int] = {}
+        
+        # Subtrees of the Memo components in trees built for this renderer
+        self.memo_cache = MemoCache()
+    
+    def dumps(self, obj: Any, indent: bool = False) -> str:
+        """Serialize object to JSON with the configured encoder"""
+        return self.json_encoder(obj, indent=indent)
     
     def render(self, components: List[Any], context: Dict[str, Any], app: Any) -> str:
         """
@@ -24,69 +121,311 @@ class Renderer:
             components: List of components to render
             context: Global context
             app: App instance
-            
+        
         Returns:
             HTML string
         """
-        # Render components to Vue configuration
+        vue_config = self.render_config(components, app)
+        return self.render_page(vue_config, context, app)
+    
+    def render_config(self, components: List[Any], app: Any) -> List[Dict[str, Any]]:
+        """
+        Render components to Vue configuration
+        
+        Args:
+            components: List of components to render
+            app: App instance
+        
+        Returns:
+            List of component configuration dictionaries
+        """
         vue_config = []
         for component in components:
-            if hasattr(component, 'render'):
-                try:
-                    rendered = component.render()
-                    if isinstance(rendered, dict):
-                        vue_config.append(rendered)
-                    else:
-                        # Convert to text component
-                        vue_config.append({
-                            'id': f"text_{len(vue_config)}",
-                            'component': 'span',
-                            'props': {},
-                            'events': {},
-                            'children': [str(rendered)]
-                        })
-                except Exception as e:
-                    if app.debug:
-                        print(f"Error rendering component {type(component).__name__}: {e}")
+            node = self._render_component(component, len(vue_config), app)
+            if node is not None:
+                vue_config.append(node)
+        
+        return vue_config
+    
+    def render_stream(
+        self,
+        components: Union[List[Any], Callable[[], List[Any]]],
+        context: Dict[str, Any],
+        app: Any,
+        vue_config: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[str]:
+        """
+        Render components to HTML in chunks
+        
+        The page head (with the CSS/JS links) is emitted before anything is
+        built, so the browser can start fetching assets right away. The
+        configuration then follows one top-level component at a time; with
+        the 'packed' encoding it is emitted in one piece, since its string
+        table is only complete at the end.
+        
+        Args:
+            components: List of components, or a callable building them
+                        (called after the head has been emitted)
+            context: Global context
+            app: App instance
+            vue_config: Optional list receiving the rendered nodes
+        
+        Yields:
+            HTML chunks
+        """
+        shell = self.shell(context, app)
+        yield shell.head
+        
+        if callable(components):
+            components = components()
+        if vue_config is None:
+            vue_config = []
+        
+        if self.ssr:
+            # Markup streams per component; the config follows in one piece
+            yield '<div>' + ssr.FRAGMENT_START
+            for component in components:
+                node = self._render_component(component, len(vue_config), app)
+                if node is not None:
+                    vue_config.append(node)
+                    yield ssr.render_node(node)
+            yield ssr.FRAGMENT_END + '</div>' + shell.parts[1]
+            yield self.encode_config(vue_config)
+        elif self.encoding == 'packed':
+            vue_config.extend(self.render_config(components, app))
+            yield self.encode_config(vue_config)
+        else:
+            yield '['
+            for component in components:
+                node = self._render_component(component, len(vue_config), app)
+                if node is None:
                     continue
+                splicing = self._splicing([node])
+                if self.encoding == 'compact':
+                    encoded = self._encode_compact(node, splicing)
+                else:
+                    encoded = self._encode_pretty(node, 0, splicing)
+                yield (',' if vue_config else '') + encoded.replace('</', '<\\/')
+                vue_config.append(node)
+            yield ']'
+        
+        yield shell.tail
+    
+    def set_static_nodes(self, nodes: Dict[str, Any]) -> None:
+        """
+        Set hoisted static subtrees to reuse instead of rendering
+        
+        Args:
+            nodes: Mapping of component ID to (signature, rendered node),
+                   as produced by compiler.find_static_nodes()
+        """
+        self._static_nodes = dict(nodes)
+        self._fragments = {}
+        self._static_strings = {}
+        for _, node in self._static_nodes.values():
+            if self.encoding == 'compact':
+                fragment = self.dumps(_compact_node(node))
+            elif self.encoding == 'packed':
+                fragment = self.dumps(_pack_node(node, self._static_strings))
+            else:
+                fragment = self.dumps(node, indent=True)
+            self._fragments[id(node)] = fragment.replace('</', '<\\/')
+    
+    def _render_component(self, component: Any, position: int, app: Any) -> Optional[Dict[str, Any]]:
+        """Render one top-level component, or None if rendering failed"""
+        if hasattr(component, 'render'):
+            try:
+                with static_nodes(self._static_nodes):
+                    rendered = render_component(component)
+            except Exception as e:
+                if app.debug:
+                    print(f"Error rendering component {type(component).__name__}: {e}")
+                return None
+            if isinstance(rendered, dict):
+                return rendered
+        else:
+            rendered = component
+        
+        # Convert to text component
+        return {
+            'id': f"text_{position}",
+            'component': 'span',
+            'props': {},
+            'events': {},
+            'children': [str(rendered)]
+        }
+    
+    def render_page(
+        self,
+        vue_config: List[Dict[str, Any]],
+        context: Dict[str, Any],
+        app: Any,
+        encode: bool = False
+    ) -> Union[str, bytes]:
+        """
+        Render Vue configuration to a full HTML page
+        
+        Args:
+            vue_config: Rendered component configuration
+            context: Global context
+            app: App instance
+            encode: Return UTF-8 encoded bytes instead of text
+        
+        Returns:
+            HTML string (or bytes)
+        """
+        shell = self.shell(context, app)
+        slots = [self.encode_config(vue_config)]
+        if self.ssr:
+            slots.insert(0, ssr.render_html(vue_config))
+        if encode:
+            return shell.fill_bytes(*slots)
+        return shell.fill(*slots)
+    
+    def _encode_compact(self, node: Any, splicing: Set[int]) -> str:
+        """Encode a node compactly, splicing in pre-serialized static subtrees"""
+        fragment = self._fragments.get(id(node))
+        if fragment is not None:
+            return fragment
+        if id(node) not in splicing:
+            return self.dumps(_compact_node(node))
+        
+        items = []
+        for key, value in node.items():
+            if key == 'children':
+                if value:
+                    items.append('"children":[' + ','.join(self._encode_compact(child, splicing) for child in value) + ']')
+            elif value or key in ('id', 'component'):
+                items.append(f"{self.dumps(key)}:{self.dumps(value)}")
+        return '{' + ','.join(items) + '}'
+    
+    def _encode_pretty(self, node: Any, depth: int, splicing: Set[int]) -> str:
+        """Encode a node as indented JSON at a nesting depth, splicing in static subtrees"""
+        fragment = self._fragments.get(id(node))
+        if fragment is None and id(node) not in splicing:
+            fragment = self.dumps(node, indent=True)
+        if fragment is not None:
+            return fragment.replace('\n', '\n' + '  ' * depth)
+        
+        pad = '  ' * (depth + 1)
+        items = []
+        for key, value in node.items():
+            if key == 'children' and value:
+                encoded = '[\n' + ',\n'.join(
+                    pad + '  ' + self._encode_pretty(child, depth + 2, splicing) for child in value
+                ) + '\n' + pad + ']'
+            else:
+                encoded = self.dumps(value, indent=True).replace('\n', '\n' + pad)
+            items.append(f"{pad}{self.dumps(key)}: {encoded}")
+        return '{\n' + ',\n'.join(items) + '\n' + '  ' * depth + '}'
+    
+    def _encode_packed(self, node: Any, strings: Dict[str, int], splicing: Set[int]) -> str:
+        """Encode a packed node, splicing in static subtrees packed against the static string table"""
+        fragment = self._fragments.get(id(node))
+        if fragment is not None:
+            return fragment
+        if id(node) not in splicing:
+            return self.dumps(_pack_node(node, strings))
+        
+        # Pack the node's own fields first, so strings are interned in the
+        # same order as _pack_node() would
+        packed = _pack_node({**node, 'children': []}, strings)
+        packed.extend([[]] * (5 - len(packed)))
+        children = ','.join(self._encode_packed(child, strings, splicing) for child in node['children'])
+        fields = [self.dumps(field) for field in packed[:4]] + [f"[{children}]"]
+        fields.extend(self.dumps(field) for field in packed[5:])
+        return '[' + ','.join(fields) + ']'
+    
+    def _splicing(self, nodes: List[Any]) -> Set[int]:
+        """
+        Find the nodes with a hoisted static subtree below them
+        
+        One pass over the tree (none without hoisted subtrees), so the
+        encoders can tell which nodes to encode field by field.
+        
+        Returns:
+            id() of each such node
+        """
+        found: Set[int] = set()
+        if not self._fragments:
+            return found
+        
+        def visit(node: Any) -> bool:
+            if not isinstance(node, dict):
+                return False
+            if id(node) in self._fragments:
+                return True
+            below = False
+            for child in node.get('children') or []:
+                below = visit(child) or below
+            if below:
+                found.add(id(node))
+            return below
+        
+        for node in nodes:
+            visit(node)
+        return found
+    
+    def shell(self, context: Dict[str, Any], app: Any) -> PageShell:
+        """
+        Get the compiled page shell for an app
+        
+        The shell is compiled on first use and again only if the app
+        attributes it depends on change.
+        """
+        key = (
+            app.name, self.ssr, self.assets.version, getattr(app, '_push', None) is not None,
+            getattr(app, 'topics', None), getattr(app, 'websocket', False)
+        )
+        shell = self._shell
+        if shell is None or shell.key != key:
+            if self.ssr:
+                parts = [self._page_head(app), self._page_script_head(), self._page_tail(context, app)]
+            else:
+                parts = [
+                    self._page_head(app) + self._page_app_template() + self._page_script_head(),
+                    self._page_tail(context, app)
+                ]
+            shell = self._shell = PageShell(key, parts)
+        return shell
+    
+    def encode_config(self, vue_config: List[Dict[str, Any]]) -> str:
+        """
+        Encode Vue configuration for embedding in the page
+        
+        The client bootstrap decodes every encoding back to full nodes.
+        
+        Args:
+            vue_config: Rendered component configuration
+        
+        Returns:
+            JSON string safe to place inside a <script> element
+        """
+        splicing = self._splicing(vue_config)
+        if self.encoding == 'pretty':
+            if not vue_config:
+                encoded = '[]'
             else:
-                # Convert to text component
-                vue_config.append({
-                    'id': f"text_{len(vue_config)}",
-                    'component': 'span',
-                    'props': {},
-                    'events': {},
-                    'children': [str(component)]
-                })
-        
-        # Generate HTML
-        html = self._generate_html(vue_config, context, app)
-        return html
-    
-    def _generate_html(self, vue_config: List[Dict[str, Any]], context: Dict[str, Any], app: Any) -> str:
-        """Generate HTML from Vue configuration"""
-        
-        # Inline JavaScript for event handling
-        js_code = self._generate_js(vue_config)
-        
-        html = f"""<!DOCTYPE html>
+                encoded = '[\n' + ',\n'.join('  ' + self._encode_pretty(node, 1, splicing) for node in vue_config) + '\n]'
+        elif self.encoding == 'compact':
+            encoded = '[' + ','.join(self._encode_compact(node, splicing) for node in vue_config) + ']'
+        else:
+            strings = dict(self._static_strings)
+            nodes = ','.join(self._encode_packed(node, strings, splicing) for node in vue_config)
+            encoded = '{"s":' + self.dumps(list(strings)) + ',"n":[' + nodes + ']}'
+        return encoded.replace('</', '<\\/')
+    
+    def _page_head(self, app: Any) -> str:
+        """Generate the page up to the content of the #app element"""
+        return f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{app.name}</title>
-    
-    <!-- Element Plus CSS -->
-    <link rel="stylesheet" href="https://unpkg.com/element-plus@2.4.0/dist/index.css">
-    
-    <!-- Vue 3 -->
-    <script src="https://unpkg.com/vue@3.3.0/dist/vue.global.js"></script>
+    <title>{html.escape(app.name)}</title>
     
-    <!-- Element Plus -->
-    <script src="https://unpkg.com/element-plus@2.4.0/dist/index.full.js"></script>
-    
-    <!-- Axios -->
-    <script src="https://unpkg.com/axios@1.5.0/dist/axios.min.js"></script>
+    <!-- Vue 3, Element Plus and Axios -->
+    {self.assets.tags()}
     
     <style>
         body {{
@@ -140,7 +479,11 @@ class Renderer:
     </style>
 </head>
 <body>
-    <div id="app">
+    <div id="app">"""
+    
+    def _page_app_template(self) -> str:
+        """Generate the in-DOM root template for client-side mounting"""
+        return """
         <div v-if="loading" class="litchi-loading">
             <el-loading-directive></el-loading-directive>
         </div>
@@ -152,20 +495,70 @@ class Renderer:
                 :component="item"
             />
         </div>
-    </div>
-
+    """
+    
+    def _page_script_head(self) -> str:
+        """Generate the page from the end of #app up to the embedded configuration"""
+        return """</div>
+    
     <script>
         // Vue 3 Application
-        const {{ createApp, ref, reactive, onMounted }} = Vue;
+        const { createApp, createSSRApp, ref, reactive, onMounted } = Vue;
+        
+        // Decode embedded configuration (see Renderer.encode_config)
+        function decodeConfig(raw) {
+            const normalize = (node) => {
+                if (!node || typeof node !== 'object' || !node.component) {
+                    return node;
+                }
+                node.props = node.props || {};
+                node.events = node.events || {};
+                node.children = (node.children || []).map(normalize);
+                return node;
+            };
+            if (Array.isArray(raw)) {
+                return raw.map(normalize);
+            }
+            
+            const strings = raw.s;
+            const pairs = (list) => {
+                const obj = {};
+                for (let i = 0; i < list.length; i += 2) {
+                    obj[strings[list[i]]] = list[i + 1];
+                }
+                return obj;
+            };
+            const unpack = (node) => Array.isArray(node) ? Object.assign({
+                id: node[0],
+                component: strings[node[1]],
+                props: pairs(node[2] || []),
+                events: pairs(node[3] || []),
+                children: (node[4] || []).map(unpack)
+            }, node[5] || {}) : node;
+            return raw.n.map(unpack);
+        }
         
         // Component configurations
-        const componentConfigs = {json.dumps(vue_config, indent=2)};
+        const componentConfigs = decodeConfig("""
+    
+    @staticmethod
+    def _stream_url(app: Any) -> str:
+        """Get the server push stream URL, with the topics the page subscribes to"""
+        topics = getattr(app, 'topics', None)
+        if topics is None:
+            return '/api/stream'
+        return '/api/stream?' + urllib.parse.urlencode({'topics': ','.join(topics)})
+    
+    def _page_tail(self, context: Dict[str, Any], app: Any) -> str:
+        """Generate the page after the embedded component configuration"""
+        return f""");
         
         // Debug: log component configurations
         console.log('Component configurations:', componentConfigs);
         
-        // Event handling state
-        let eventProcessing = false;
+        // Events waiting to be sent, in firing order
+        const eventQueue = [];
+        let eventsInFlight = false;
         
         // Event handler function
         function handleEvent(componentId, eventName, event) {{
@@ -174,92 +567,127 @@ class Renderer:
                 event.preventDefault();
             }}
             
-            // Avoid duplicate rapid events
-            if (eventProcessing) {{
-                console.log('Event already processing, skipping');
-                return false;
-            }}
-            
-            eventProcessing = true;
-            
-            const params = {{
+            eventQueue.push({{
                 component_id: componentId,
                 event: eventName,
                 params: {{
-                    target: event.target ? event.target.value : undefined,
+                    target: event && event.target ? event.target.value : undefined,
                     timestamp: new Date().toISOString()
                 }}
+            }});
+            
+            // Events fired in the same tick go out together
+            if (!eventsInFlight) {{
+                eventsInFlight = true;
+                Promise.resolve().then(flushEvents);
+            }}
+            return false;
+        }}
+        
+        // Debounce/throttle timers per component event, kept across re-renders
+        const eventTimers = {{}};
+        
+        // Fire an event declared with debounce or throttle (milliseconds)
+        function rateLimitEvent(componentId, eventName, rate, event) {{
+            if (event && event.preventDefault) {{
+                event.preventDefault();
+            }}
+            
+            const key = componentId + ':' + eventName;
+            const timer = eventTimers[key] || (eventTimers[key] = {{ last: 0, handle: null, event: null }});
+            timer.event = event;
+            const fire = () => {{
+                timer.handle = null;
+                timer.last = Date.now();
+                handleEvent(componentId, eventName, timer.event);
+            }};
+            
+            if (rate.debounce) {{
+                // Fire once the event has stopped for the whole delay
+                clearTimeout(timer.handle);
+                timer.handle = setTimeout(fire, rate.debounce);
+            }} else if (!timer.handle) {{
+                // Fire now, or with the latest event once the interval has passed
+                const wait = timer.last + rate.throttle - Date.now();
+                if (wait <= 0) {{
+                    fire();
+                }} else {{
+                    timer.handle = setTimeout(fire, wait);
+                }}
+            }}
+        }}
+        
+        // WebSocket transport for events, with HTTP as the fallback. Batch
+        // IDs are unique per page, so the server runs a resent batch once.
+        const eventSocket = {{ socket: null, nextId: 1, pending: {{}}, retry: 1000 }};
+        const pageId = Date.now().toString(36) + Math.random().toString(36).slice(2);
+        
+        function connectEventSocket() {{
+            const url = (location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/api/ws';
+            const socket = new WebSocket(url);
+            socket.onopen = () => {{
+                eventSocket.socket = socket;
+                eventSocket.retry = 1000;
+            }};
+            socket.onmessage = (message) => {{
+                const data = JSON.parse(message.data);
+                const pending = eventSocket.pending[data.id];
+                if (pending) {{
+                    delete eventSocket.pending[data.id];
+                    pending.resolve(data);
+                }}
+            }};
+            socket.onclose = () => {{
+                // Resend events still waiting over HTTP, then reconnect with backoff
+                eventSocket.socket = null;
+                Object.entries(eventSocket.pending).forEach(([id, pending]) => {{
+                    postEvents(pending.events, id).then(pending.resolve, pending.reject);
+                }});
+                eventSocket.pending = {{}};
+                setTimeout(connectEventSocket, eventSocket.retry);
+                eventSocket.retry = Math.min(eventSocket.retry * 2, 30000);
             }};
+        }}
+        
+        function postEvents(events, id) {{
+            return axios.post('/api/events', {{ id, events }}).then(response => response.data);
+        }}
+        
+        // Send events over the WebSocket when it is open, otherwise over HTTP
+        function sendEvents(events) {{
+            const socket = eventSocket.socket;
+            if (!socket || socket.readyState !== WebSocket.OPEN) {{
+                return postEvents(events, pageId + '-' + eventSocket.nextId++);
+            }}
+            const id = pageId + '-' + eventSocket.nextId++;
+            return new Promise((resolve, reject) => {{
+                eventSocket.pending[id] = {{ resolve, reject, events }};
+                socket.send(JSON.stringify({{ id, events }}));
+            }});
+        }}
+        
+        if ({'true' if getattr(app, 'websocket', False) else 'false'} && window.WebSocket) {{
+            connectEventSocket();
+        }}
+        
+        // Send all queued events in one request, then the ones queued meanwhile
+        function flushEvents() {{
+            const events = eventQueue.splice(0, eventQueue.length);
+            if (!events.length) {{
+                eventsInFlight = false;
+                return;
+            }}
             
-            console.log('Sending event:', eventName, 'for component:', componentId);
+            console.log('Sending events:', events.map(e => e.event + '@' + e.component_id));
             
-            axios.post('/api/event', params)
-                .then(response => {{
-                    const data = response.data;
+            sendEvents(events)
+                .then(data => {{
                     console.log('Event response:', data);
+                    (data.results || []).forEach(handleEventResult);
                     
-                    if (data.success) {{
-                        // Handle notifications
-                        if (data.data && data.data.notification) {{
-                            const notification = data.data.notification;
-                            ElementPlus.ElMessage({{
-                                message: notification.message,
-                                type: notification.type || 'info',
-                                duration: 3000
-                            }});
-                        }}
-                        
-                        // Handle modals
-                        if (data.data && data.data.modal) {{
-                            const modal = data.data.modal;
-                            ElementPlus.ElMessageBox.alert(modal.message, modal.title, {{
-                                type: modal.type || 'info',
-                                confirmButtonText: '确定'
-                            }});
-                        }}
-                        
-                        // Handle redirects
-                        if (data.data && data.data.redirect) {{
-                            window.location.href = data.data.redirect;
-                        }}
-                        
-                        // Handle reloads
-                        if (data.data && data.data.reload) {{
-                            window.location.reload();
-                        }}
-                        
-                        // Handle component updates
-                        if (data.data && data.data.component_update) {{
-                            const update = data.data.component_update;
-                            const component = componentConfigs.find(c => c.id === update.id);
-                            if (component) {{
-                                Object.assign(component.props, update.updates);
-                            }}
-                        }}
-                        
-                        // Handle state updates
-                        if (data.data && data.data.state_update) {{
-                            const stateUpdates = data.data.state_update;
-                            Object.keys(stateUpdates).forEach(key => {{
-                                globalState[key] = stateUpdates[key];
-                            }});
-                        }}
-                        
-                        // Show success message if present
-                        if (data.message && !data.data) {{
-                            ElementPlus.ElMessage({{
-                                message: data.message,
-                                type: 'success',
-                                duration: 2000
-                            }});
-                        }}
-                    }} else {{
-                        // Show error message
-                        ElementPlus.ElMessage({{
-                            message: data.error || '操作失败',
-                            type: 'error',
-                            duration: 3000
-                        }});
+                    // Handle incremental tree patches
+                    if (data.patch) {{
+                        applyPatch(data.patch);
                     }}
                 }})
                 .catch(error => {{
@@ -270,13 +698,130 @@ class Renderer:
                         duration: 3000
                     }});
                 }})
-                .finally(() => {{
-                    eventProcessing = false;
+                .finally(flushEvents);
+        }}
+        
+        // Apply the result of one event handler
+        function handleEventResult(data) {{
+            if (data.success) {{
+                // Handle notifications
+                if (data.data && data.data.notification) {{
+                    const notification = data.data.notification;
+                    ElementPlus.ElMessage({{
+                        message: notification.message,
+                        type: notification.type || 'info',
+                        duration: 3000
+                    }});
+                }}
+                
+                // Handle modals
+                if (data.data && data.data.modal) {{
+                    const modal = data.data.modal;
+                    ElementPlus.ElMessageBox.alert(modal.message, modal.title, {{
+                        type: modal.type || 'info',
+                        confirmButtonText: '确定'
+                    }});
+                }}
+                
+                // Handle redirects
+                if (data.data && data.data.redirect) {{
+                    window.location.href = data.data.redirect;
+                }}
+                
+                // Handle reloads
+                if (data.data && data.data.reload) {{
+                    window.location.reload();
+                }}
+                
+                // Handle component updates
+                if (data.data && data.data.component_update) {{
+                    const update = data.data.component_update;
+                    const component = componentTree.find(c => c.id === update.id);
+                    if (component) {{
+                        Object.assign(component.props, update.updates);
+                    }}
+                }}
+                
+                // Handle state updates
+                if (data.data && data.data.state_update) {{
+                    const stateUpdates = data.data.state_update;
+                    Object.keys(stateUpdates).forEach(key => {{
+                        globalState[key] = stateUpdates[key];
+                    }});
+                }}
+                
+                // Show success message if present
+                if (data.message && !data.data) {{
+                    ElementPlus.ElMessage({{
+                        message: data.message,
+                        type: 'success',
+                        duration: 2000
+                    }});
+                }}
+            }} else {{
+                // Show error message
+                ElementPlus.ElMessage({{
+                    message: data.error || '操作失败',
+                    type: 'error',
+                    duration: 3000
                 }});
+            }}
+        }}
+        
+        // Apply JSON Patch operations to the component tree in place
+        function applyPatch(ops) {{
+            const parse = (path) => path.split('/').slice(1).map(
+                part => part.replace(/~1/g, '/').replace(/~0/g, '~')
+            );
+            const resolve = (parts) => parts.reduce((node, key) => node[key], componentTree);
+            const insert = (parent, key, value) => {{
+                if (Array.isArray(parent)) {{
+                    parent.splice(key === '-' ? parent.length : Number(key), 0, value);
+                }} else {{
+                    parent[key] = value;
+                }}
+            }};
+            const remove = (parent, key) => {{
+                if (Array.isArray(parent)) {{
+                    return parent.splice(Number(key), 1)[0];
+                }}
+                const value = parent[key];
+                delete parent[key];
+                return value;
+            }};
             
-            return false;
+            ops.forEach(op => {{
+                if (op.path === '') {{
+                    componentTree.splice(0, componentTree.length, ...op.value);
+                    return;
+                }}
+                const parts = parse(op.path);
+                const key = parts.pop();
+                const parent = resolve(parts);
+                
+                if (op.op === 'add') {{
+                    insert(parent, key, op.value);
+                }} else if (op.op === 'remove') {{
+                    remove(parent, key);
+                }} else if (op.op === 'replace') {{
+                    parent[Array.isArray(parent) ? Number(key) : key] = op.value;
+                }} else if (op.op === 'move') {{
+                    const fromParts = parse(op.from);
+                    const fromKey = fromParts.pop();
+                    insert(parent, key, remove(resolve(fromParts), fromKey));
+                }}
+            }});
         }}
         
+        // Server-rendered pages render only native elements and stand-ins
+        // until hydrated (see litchi.core.ssr); the components are mounted
+        // right after
+        const ssrRendered = {'true' if self.ssr else 'false'};
+        const hydrated = ref(!ssrRendered);
+        const nativeTag = /{ssr.NATIVE_TAG}/;
+        const standIns = {serialization.dumps(ssr.STAND_INS)};
+        {ssr.STAND_IN_SCRIPT.strip()}
+        
         // Define recursive component
         const RecursiveComponent = {{
             name: 'RecursiveComponent',
@@ -293,45 +838,46 @@ class Renderer:
                     if (props.component.events) {{
                         Object.entries(props.component.events).forEach(([eventName, handler]) => {{
                             const onEventName = 'on' + eventName.charAt(0).toUpperCase() + eventName.slice(1);
+                            const rate = handler && (handler.debounce || handler.throttle) ? handler : null;
                             attrs[onEventName] = (event) => {{
-                                handleEvent(props.component.id, eventName, event);
+                                if (rate) {{
+                                    rateLimitEvent(props.component.id, eventName, rate, event);
+                                }} else {{
+                                    handleEvent(props.component.id, eventName, event);
+                                }}
                             }};
                         }});
                     }}
                     return attrs;
                 }};
                 
+                const rendered = () => hydrated.value || nativeTag.test(props.component.component);
+                
                 return {{
-                    bindAttrs
+                    bindAttrs,
+                    rendered,
+                    standIn: () => standIn(props.component)
                 }};
             }},
-            template: `
-                <component 
-                    :is="component.component" 
-                    v-bind="bindAttrs()"
-                >
-                    <template v-for="(child, index) in component.children" :key="child.id || index">
-                        <recursive-component 
-                            v-if="typeof child === 'object' && child && child.component"
-                            :component="child"
-                        />
-                        <span v-else-if="typeof child !== 'object'">{{{{ child }}}}</span>
-                    </template>
-                </component>
-            `
+            template: `{ssr.COMPONENT_TEMPLATE}`
         }};
         
         // Global state object
         const globalState = {{}};
         
-        // Create Vue app
-        const app = createApp({{
+        // Reactive component tree, patched in place by event responses
+        const componentTree = reactive(componentConfigs);
+        
+        // Create Vue app, hydrating server-rendered markup if present
+        const app = (ssrRendered ? createSSRApp : createApp)({{
+            template: ssrRendered ? '{ssr.ROOT_TEMPLATE}' : undefined,
             setup() {{
-                const loading = ref(true);
-                const components = ref(componentConfigs);
+                const loading = ref(!ssrRendered);
+                const components = componentTree;
                 
                 onMounted(() => {{
                     loading.value = false;
+                    hydrated.value = true;
                 }});
                 
                 return {{
@@ -350,6 +896,19 @@ class Renderer:
         // Mount app
         app.mount('#app');
         
+        // Apply updates pushed by the server
+        if ({'true' if getattr(app, '_push', None) is not None else 'false'} && window.EventSource) {{
+            const stream = new EventSource('{self._stream_url(app)}');
+            stream.onmessage = (message) => {{
+                const data = JSON.parse(message.data);
+                console.log('Pushed update:', data);
+                handleEventResult({{ success: true, data }});
+                if (data.patch) {{
+                    applyPatch(data.patch);
+                }}
+            }};
+        }}
+        
         // Global error handler
         window.addEventListener('error', function(event) {{
             console.error('Global error:', event.error);
@@ -362,19 +921,58 @@ class Renderer:
     </script>
 </body>
 </html>"""
-        
-        return html
+
+def _compact_node(node: Any) -> Any:
+    """Drop empty fields from a node and its children"""
+    if not isinstance(node, dict) or 'component' not in node:
+        return node
+    compact = {}
+    for key, value in node.items():
+        if key == 'children':
+            if value:
+                compact[key] = [_compact_node(child) for child in value]
+        elif value or key in ('id', 'component'):
+            compact[key] = value
+    return compact
+
+
+def _pack_node(node: Any, strings: Dict[str, int]) -> Any:
+    """
+    Pack a node into a positional array
     
-    def _generate_js(self, vue_config: List[Dict[str, Any]]) -> str:
-        """Generate JavaScript code for components"""
-        # This is a simplified version - in a full implementation,
-        # you might want to generate more sophisticated JavaScript
-        return f"""
-        // Component configurations
-        const components = {json.dumps(vue_config, indent=2)};
-        
-        // Initialize components
-        components.forEach(config => {{
-            console.log('Initializing component:', config.id, config.component);
-        }});
-        """
\ No newline at end of file
+    Layout: [id, component, props, events, children, extra], where
+    component, prop keys and event names are indexes into the string
+    table, props/events are flat [key, value, ...] lists and trailing
+    empty fields are dropped. Text children stay plain strings.
+    """
+    if not isinstance(node, dict) or 'component' not in node:
+        return node
+    
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+    
+    def flatten(mapping: Optional[Dict[str, Any]]) -> List[Any]:
+        flat: List[Any] = []
+        for key, value in (mapping or {}).items():
+            flat.append(intern(key))
+            flat.append(value)
+        return flat
+    
+    packed = [
+        node.get('id'),
+        intern(node['component']),
+        flatten(node.get('props')),
+        flatten(node.get('events')),
+        [_pack_node(child, strings) for child in node.get('children') or []]
+    ]
+    
+    extra = {key: value for key, value in node.items() if key not in _NODE_KEYS}
+    if extra:
+        packed.append(extra)
+    else:
+        while len(packed) > 2 and not packed[-1]:
+            packed.pop()
+    return packed
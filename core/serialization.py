@@ -0,0 +1,79 @@
+"""
+JSON serialization for Litchi 0.3.1
+
+Uses orjson when it is installed and falls back to the standard library.
+Types JSON has no notation for are converted like Flask's JSON provider
+does, whichever library is used.
+"""
+
+from typing import Any
+from datetime import date
+import dataclasses
+import decimal
+import json
+import uuid
+
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def default(obj: Any) -> Any:
+    """
+    Convert an object JSON cannot represent, like Flask's JSON provider
+    
+    Dates become HTTP dates, decimals and UUIDs strings, dataclasses
+    dicts, and objects with ``__html__`` their markup.
+    
+    Raises:
+        TypeError: If the object has no conversion
+    """
+    if isinstance(obj, date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    """
+    Serialize object to a JSON string
+    
+    Args:
+        obj: Object to serialize
+        indent: Indent nested structures by two spaces
+        
+    Returns:
+        JSON string (non-ASCII characters are kept as is)
+    """
+    if orjson is not None:
+        # Dates go through default() so they match the standard library path
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option).decode('utf-8')
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=default)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=default)
+
+
+def loads(data: Any) -> Any:
+    """
+    Deserialize a JSON string or bytes
+    
+    Args:
+        data: JSON document
+        
+    Returns:
+        Deserialized object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
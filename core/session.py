@@ -0,0 +1,225 @@
+"""
+Session storage for Litchi 0.3.1
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import time
+
+
+class SessionStore:
+    """
+    Bounded per-session value store with LRU eviction and idle TTL
+    
+    Values are created on first access by calling ``factory``. The least
+    recently used session is dropped once ``max_sessions`` is exceeded,
+    and sessions idle for longer than ``ttl`` seconds are dropped lazily.
+    """
+    
+    def __init__(
+        self,
+        factory: Callable[[str], Any],
+        max_sessions: int = 1000,
+        ttl: Optional[float] = 3600,
+        on_evict: Optional[Callable[[str, Any], None]] = None
+    ):
+        """
+        Initialize session store
+        
+        Args:
+            factory: Called with the session ID to create a new value
+            max_sessions: Maximum number of sessions kept in memory
+            ttl: Idle time in seconds before a session expires (None to disable)
+            on_evict: Optional callback called with (session_id, value) on eviction
+        """
+        self._factory = factory
+        self._max_sessions = max_sessions
+        self._ttl = ttl
+        self._on_evict = on_evict
+        self._entries: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, session_id: str) -> Any:
+        """
+        Get value for a session, creating it if needed
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            Session value
+        """
+        now = time.monotonic()
+        expired = {}
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and self._expired(entry, now):
+                # Idle for too long: drop it and start a new one
+                del self._entries[session_id]
+                expired[session_id] = entry[0]
+            elif entry is not None:
+                entry[1] = now
+                self._entries.move_to_end(session_id)
+                return entry[0]
+        
+        self._notify_evicted(expired)
+        value = self._factory(session_id)
+        with self._lock:
+            # Another thread may have created it meanwhile
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                return entry[0]
+            self._entries[session_id] = [value, now]
+            evicted = self._evict(now)
+        
+        self._notify_evicted(evicted)
+        return value
+    
+    def peek(self, session_id: str, default: Any = None) -> Any:
+        """Get value for a session without creating it or refreshing its age"""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is None or self._expired(entry, time.monotonic()):
+                return default
+            return entry[0]
+    
+    def set(self, session_id: str, value: Any) -> None:
+        """Set value for a session"""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[session_id] = [value, now]
+            self._entries.move_to_end(session_id)
+            evicted = self._evict(now)
+        
+        self._notify_evicted(evicted)
+    
+    def discard(self, session_id: str) -> None:
+        """Remove a session"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        
+        if entry is not None:
+            self._notify_evicted({session_id: entry[0]})
+    
+    def clear(self) -> None:
+        """Remove all sessions"""
+        with self._lock:
+            evicted = {sid: entry[0] for sid, entry in self._entries.items()}
+            self._entries.clear()
+        
+        self._notify_evicted(evicted)
+    
+    def items(self) -> List[Tuple[str, Any]]:
+        """Get (session ID, value) pairs of the live sessions"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (session_id, entry[0])
+                for session_id, entry in self._entries.items()
+                if not self._expired(entry, now)
+            ]
+    
+    def _expired(self, entry: list, now: float) -> bool:
+        """Check whether an entry has been idle for longer than the TTL"""
+        return self._ttl is not None and now - entry[1] > self._ttl
+    
+    def _evict(self, now: float) -> Dict[str, Any]:
+        """Drop expired and overflowing sessions (caller holds the lock)"""
+        evicted = {}
+        
+        # Entries are kept in access order, so expired ones come first
+        if self._ttl is not None:
+            while self._entries:
+                session_id, entry = next(iter(self._entries.items()))
+                if not self._expired(entry, now):
+                    break
+                self._entries.popitem(last=False)
+                evicted[session_id] = entry[0]
+        
+        while len(self._entries) > self._max_sessions:
+            session_id, entry = self._entries.popitem(last=False)
+            evicted[session_id] = entry[0]
+        
+        return evicted
+    
+    def _notify_evicted(self, evicted: Dict[str, Any]) -> None:
+        """Call the eviction callback outside the lock"""
+        if self._on_evict is None:
+            return
+        for session_id, value in evicted.items():
+            try:
+                self._on_evict(session_id, value)
+            except Exception as e:
+                print(f"Error in session eviction callback for '{session_id}': {e}")
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._entries
+    
+    def __repr__(self) -> str:
+        return f"<SessionStore(sessions={len(self._entries)}, max={self._max_sessions}, ttl={self._ttl})>"
+
+
+class ReplayLog:
+    """
+    Responses of recently handled requests by request ID
+    
+    A client that lost a reply (for example when its WebSocket dropped)
+    resends the request with the same ID. The log answers it with the
+    first response, waiting for it if the first attempt is still running,
+    so the request is handled once.
+    """
+    
+    def __init__(self, size: int = 256):
+        """
+        Initialize replay log
+        
+        Args:
+            size: Number of recent request IDs remembered
+        """
+        self.size = size
+        self._entries: 'OrderedDict[Any, list]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def run(self, request_id: Any, handler: Callable[[], Any]) -> Any:
+        """
+        Handle a request once per ID
+        
+        Args:
+            request_id: Hashable ID chosen by the client
+            handler: Produces the response
+        
+        Returns:
+            The response of the first attempt that completed
+        """
+        with self._lock:
+            entry = self._entries.get(request_id)
+            owner = entry is None
+            if owner:
+                entry = self._entries[request_id] = [threading.Event(), None]
+                while len(self._entries) > self.size:
+                    self._entries.popitem(last=False)
+        
+        if not owner:
+            entry[0].wait()
+            if entry[1] is not None:
+                return entry[1]
+            # The first attempt failed, so nothing was answered yet
+            return handler()
+        
+        try:
+            entry[1] = handler()
+        except BaseException:
+            with self._lock:
+                if self._entries.get(request_id) is entry:
+                    del self._entries[request_id]
+            raise
+        finally:
+            entry[0].set()
+        return entry[1]
+    
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,304 @@
+"""
+Server-side rendering for Litchi 0.3.1
+
+Turns rendered Vue configuration into the HTML markup Vue's server
+renderer produces for the client templates below, so the page shows
+content before any script runs and Vue can hydrate it instead of
+mounting from scratch. Only native HTML elements are rendered as they
+are. Element Plus (and any other Vue) components render differently
+across versions, so until the page is hydrated both sides render them
+as stand-ins instead: layout components (cards, rows, columns,
+containers) as plain elements with their root classes around their
+children, everything else as an empty ``v-if`` placeholder. The client
+mounts the real components right after hydration.
+"""
+
+from typing import Any, Dict, List, Optional
+import re
+
+
+# Template of the component rendering one node on the client. rendered()
+# is false for non-native components until the page is hydrated, and
+# standIn() gives the node rendered meanwhile (see stand_in()).
+COMPONENT_TEMPLATE = """
+                <component
+                    v-if="rendered()"
+                    :is="component.component"
+                    v-bind="bindAttrs()"
+                >
+                    <template v-for="(child, index) in component.children" :key="child.id || index">
+                        <recursive-component
+                            v-if="typeof child === 'object' && child && child.component"
+                            :component="child"
+                        />
+                        <span v-else-if="typeof child !== 'object'">{{ child }}</span>
+                    </template>
+                </component>
+                <recursive-component v-else-if="standIn()" :component="standIn()"/>
+            """
+
+# Root template of server-rendered pages
+ROOT_TEMPLATE = '<div><recursive-component v-for="item in components" :key="item.id" :component="item"/></div>'
+
+# Component names rendered on the server (native HTML tags); the client
+# checks names against the same pattern
+NATIVE_TAG = r'^[a-z][a-z0-9]*$'
+
+_NATIVE_TAG = re.compile(NATIVE_TAG)
+
+# Components rendered before hydration as a plain element with the root
+# classes Element Plus gives them. Each class rule is [template, prop,
+# skipped values]: without a prop the template is used as is, otherwise
+# '{}' is replaced by the prop's value unless it is missing or skipped.
+# 'header' and 'body' are the classes of the card header (holding the
+# header prop) and of the element wrapping the children.
+STAND_INS: Dict[str, Dict[str, Any]] = {
+    'el-card': {
+        'tag': 'div',
+        'class': [['el-card'], ['is-{}-shadow', 'shadow', []]],
+        'header': 'el-card__header',
+        'body': 'el-card__body'
+    },
+    'el-row': {
+        'tag': 'div',
+        'class': [['el-row'], ['is-justify-{}', 'justify', ['start']], ['is-align-{}', 'align', ['']]]
+    },
+    'el-col': {
+        'tag': 'div',
+        'class': [['el-col'], ['el-col-{}', 'span', []]] + [
+            [f"el-col-{prop}-{{}}", prop, [0]] for prop in ('offset', 'pull', 'push')
+        ] + [
+            [f"el-col-{size}-{{}}", size, []] for size in ('xs', 'sm', 'md', 'lg', 'xl')
+        ]
+    },
+    'el-container': {
+        'tag': 'section',
+        'class': [['el-container'], ['is-{}', 'direction', ['horizontal']]]
+    }
+}
+
+# Client version of stand_in(), reading STAND_INS as standIns
+STAND_IN_SCRIPT = """
+        function standIn(node) {
+            const spec = node && standIns[node.component];
+            if (!spec) {
+                return null;
+            }
+            const props = node.props || {};
+            const classes = [];
+            spec.class.forEach(([template, prop, skipped]) => {
+                if (!prop) {
+                    classes.push(template);
+                } else if (props[prop] !== null && props[prop] !== undefined && !skipped.includes(props[prop])) {
+                    classes.push(template.replace('{}', String(props[prop])));
+                }
+            });
+            
+            let children = node.children || [];
+            if (spec.body) {
+                children = [{ component: 'div', props: { class: spec.body }, children }];
+            }
+            if (spec.header && props.header) {
+                children = [{ component: 'div', props: { class: spec.header }, children: [props.header] }, ...children];
+            }
+            const standInProps = { class: props.class ? [classes.join(' '), props.class] : classes.join(' ') };
+            if (props.style) {
+                standInProps.style = props.style;
+            }
+            return { component: spec.tag, props: standInProps, children };
+        }
+"""
+
+# Elements without closing tag or children
+_VOID_TAGS = frozenset((
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'source', 'track', 'wbr'
+))
+
+# Attributes Vue renders without a value, and only when truthy
+_BOOLEAN_ATTRS = frozenset((
+    'itemscope', 'allowfullscreen', 'formnovalidate', 'ismap', 'nomodule',
+    'novalidate', 'readonly', 'async', 'autofocus', 'autoplay', 'controls',
+    'default', 'defer', 'disabled', 'hidden', 'inert', 'loop', 'open',
+    'required', 'reversed', 'scoped', 'seamless', 'checked', 'muted',
+    'multiple', 'selected'
+))
+
+# Props Vue never renders as attributes
+_SKIPPED_PROPS = frozenset(('key', 'ref', 'ref_key', 'ref_for', 'innerHTML', 'textContent'))
+
+# Event listener props (onClick, ...)
+_EVENT_PROP = re.compile(r'^on[^a-z]')
+
+# Prop names Vue renders under another attribute name
+_ATTR_NAMES = {
+    'acceptCharset': 'accept-charset',
+    'className': 'class',
+    'htmlFor': 'for',
+    'httpEquiv': 'http-equiv'
+}
+
+_ESCAPES = str.maketrans({'"': '&quot;', '&': '&amp;', "'": '&#39;', '<': '&lt;', '>': '&gt;'})
+
+# Vue fragment anchors around v-for lists
+FRAGMENT_START = '<!--[-->'
+FRAGMENT_END = '<!--]-->'
+
+# What v-if renders while false
+PLACEHOLDER = '<!--v-if-->'
+
+
+def render_html(vue_config: List[Any]) -> str:
+    """
+    Render Vue configuration to the markup of the root app template
+    
+    Args:
+        vue_config: Rendered component configuration
+    
+    Returns:
+        HTML string to place inside the #app element
+    """
+    return f"<div>{render_nodes(vue_config)}</div>"
+
+
+def render_nodes(nodes: List[Any]) -> str:
+    """Render a list of nodes, wrapped in fragment anchors"""
+    return FRAGMENT_START + ''.join(render_node(node) for node in nodes) + FRAGMENT_END
+
+
+def render_node(node: Any) -> str:
+    """
+    Render a single node to HTML
+    
+    Args:
+        node: Node dictionary or text child
+    
+    Returns:
+        HTML string
+    """
+    if isinstance(node, dict):
+        component = node.get('component')
+        if not isinstance(component, str) or not _NATIVE_TAG.match(component):
+            replacement = stand_in(node)
+            return PLACEHOLDER if replacement is None else render_node(replacement)
+        return _element(node, component)
+    if isinstance(node, (list, tuple)) or node is None:
+        return PLACEHOLDER
+    return f"<span>{_escape(_display(node))}</span>"
+
+
+def stand_in(node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Get the plain node rendered for a component before hydration
+    
+    Args:
+        node: Node of a non-native component
+    
+    Returns:
+        Node of native elements around the component's children, or None
+        if the component has no stand-in (see STAND_INS)
+    """
+    spec = STAND_INS.get(node.get('component'))
+    if spec is None:
+        return None
+    props = node.get('props') or {}
+    classes = []
+    for rule in spec['class']:
+        if len(rule) == 1:
+            classes.append(rule[0])
+        elif props.get(rule[1]) is not None and props[rule[1]] not in rule[2]:
+            classes.append(rule[0].replace('{}', _display(props[rule[1]])))
+    
+    children = node.get('children') or []
+    if spec.get('body'):
+        children = [{'component': 'div', 'props': {'class': spec['body']}, 'children': children}]
+    if spec.get('header') and props.get('header'):
+        children = [{'component': 'div', 'props': {'class': spec['header']}, 'children': [props['header']]}] + children
+    stand_in_props: Dict[str, Any] = {'class': [' '.join(classes), props['class']] if props.get('class') else ' '.join(classes)}
+    if props.get('style'):
+        stand_in_props['style'] = props['style']
+    return {'component': spec['tag'], 'props': stand_in_props, 'children': children}
+
+
+def _element(node: Dict[str, Any], tag: str) -> str:
+    """Render a node as a native element"""
+    props = node.get('props') or {}
+    attrs = _attributes(props)
+    if tag in _VOID_TAGS:
+        return f"<{tag}{attrs}>"
+    if props.get('innerHTML') is not None:
+        content = str(props['innerHTML'])
+    elif props.get('textContent') is not None:
+        content = _escape(_display(props['textContent']))
+    else:
+        content = render_nodes(node.get('children') or [])
+    return f"<{tag}{attrs}>{content}</{tag}>"
+
+
+def _attributes(props: Dict[str, Any]) -> str:
+    """Render props as HTML attributes the way Vue's ssrRenderAttrs does"""
+    parts = []
+    for key, value in props.items():
+        if key in _SKIPPED_PROPS or _EVENT_PROP.match(key):
+            continue
+        if key == 'class':
+            parts.append(f' class="{_escape(_normalize_class(value))}"')
+        elif key == 'style':
+            parts.append(f' style="{_escape(_normalize_style(value))}"')
+        elif value is not None and isinstance(value, (str, int, float, bool)):
+            name = _ATTR_NAMES.get(key, key.lower())
+            if name in _BOOLEAN_ATTRS:
+                if value or value == '':
+                    parts.append(f' {name}')
+            elif value == '' and isinstance(value, str):
+                parts.append(f' {name}')
+            else:
+                parts.append(f' {name}="{_escape(_display(value))}"')
+    return ''.join(parts)
+
+
+def _normalize_class(value: Any) -> str:
+    """Flatten a class binding like Vue's normalizeClass"""
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return ' '.join(filter(None, (_normalize_class(item) for item in value)))
+    if isinstance(value, dict):
+        return ' '.join(str(name) for name, enabled in value.items() if enabled)
+    return ''
+
+
+def _normalize_style(value: Any) -> str:
+    """Flatten a style binding like Vue's ssrRenderStyle"""
+    if not value:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict):
+        return ''.join(
+            f"{_hyphenate(name)}:{item};"
+            for name, item in value.items()
+            if isinstance(item, str) or (isinstance(item, (int, float)) and not isinstance(item, bool))
+        )
+    return ''
+
+
+def _hyphenate(name: str) -> str:
+    """Convert a camelCase style name to CSS, keeping custom properties"""
+    if name.startswith('--'):
+        return name
+    return re.sub(r'\B([A-Z])', r'-\1', name).lower()
+
+
+def _display(value: Any) -> str:
+    """Convert a value to text like JavaScript's String()"""
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _escape(text: str) -> str:
+    """Escape text like Vue's escapeHtml"""
+    return text.translate(_ESCAPES)
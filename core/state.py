@@ -2,22 +2,126 @@
 State management for Litchi 0.3.1
 """
 
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Deque, Dict, Iterator, List, Optional, Callable, Tuple
+from collections import deque
+from contextlib import contextmanager
 import copy
 import json
+import threading
+import time
+
+from . import serialization
+from .backends import StateBackend
+
+
+# Marker for "key did not exist" in history patches
+_MISSING = object()
+
+# Inverse patch: (path, old_value). An empty path stands for the whole state.
+Patch = Tuple[Tuple[str, ...], Any]
+
+
+def _detach(value: Any) -> Any:
+    """Copy lists and dicts so the state does not share them with the caller"""
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
+
+
+class _Batch(threading.local):
+    """Writes staged by the open batches of one thread (see StateManager.batch())"""
+    
+    def __init__(self):
+        self.depth = 0
+        # Staged operations: ('set', key, value), ('delete', key, None)
+        # or ('replace', None, data)
+        self.ops: List[Tuple[str, Optional[str], Any]] = []
+        # Top-level values as changed by the staged operations (_MISSING
+        # for deleted keys); dicts on written paths are copies, never the
+        # stored ones
+        self.view: Dict[str, Any] = {}
+        self.replaced = False
+        # Dicts copied into the view since the innermost batch opened,
+        # which later writes may change in place
+        self.owned: Dict[int, Any] = {}
 
 
 class StateManager:
     """
     Minimal but powerful state management for Litchi 0.3.1
+    
+    History is kept as inverse patches holding replaced values by
+    reference, so a write costs time proportional to the changed path
+    rather than to the size of the whole state. Reads return stored
+    values by reference, and lists and dicts passed to set() are stored
+    by reference too. Each written list or dict is copied once, into a
+    clean copy of its top-level key that history takes old values from,
+    so changing a value in place and setting it again still undoes
+    correctly. Keys never written (e.g. loaded from a backend) are
+    copied once when first handed out instead.
     """
     
-    def __init__(self):
-        """Initialize state manager"""
+    def __init__(
+        self,
+        backend: Optional[StateBackend] = None,
+        flush_interval: Optional[float] = 1.0,
+        sync_interval: Optional[float] = 1.0,
+        json_encoder: Optional[Callable[..., str]] = None
+    ):
+        """
+        Initialize state manager
+        
+        Args:
+            backend: Optional shared backend (see litchi.core.backends)
+            flush_interval: Minimum seconds between backend writes; changes
+                            made in between are buffered and written together
+                            (call flush() to write the last of them). None
+                            buffers until flush() is called.
+            sync_interval: Minimum seconds between backend version checks on
+                           read; 0 checks on every read. None only checks
+                           when sync() is called.
+            json_encoder: JSON encoder ``(obj, indent=False) -> str`` used
+                          by to_json() (defaults to litchi.core.serialization)
+        """
         self._state: Dict[str, Any] = {}
         self._watchers: Dict[str, List[Callable]] = {}
-        self._history: List[Dict[str, Any]] = []
         self._max_history = 50
+        self._history: Deque[List[Patch]] = deque(maxlen=self._max_history)
+        
+        # Batches are staged per thread and applied under the lock when
+        # they commit (see batch()); _batch_depth is only set while a
+        # commit applies them
+        self._lock = threading.RLock()
+        self._batch = _Batch()
+        self._batch_depth = 0
+        self._pending_patches: List[Patch] = []
+        
+        # Unchanged copies of the top-level values written or handed out
+        # as containers, kept in step with writes (see _mirror())
+        self._clean: Dict[str, Any] = {}
+        
+        # Change versions: a global counter, the version each top-level key
+        # was last written at, and the version everything was last replaced at
+        self._version = 0
+        self._versions: Dict[str, int] = {}
+        self._reset_version = 0
+        
+        # Open read trackers (see track_reads())
+        self._read_sets: List[Dict[Optional[str], None]] = []
+        self._json_encoder = json_encoder or serialization.dumps
+        
+        # Backend read cache and write-behind buffer
+        self._backend = backend
+        self._flush_interval = flush_interval
+        self._sync_interval = sync_interval
+        self._dirty: Dict[str, None] = {}
+        self._replace_all = False
+        self._last_flush = 0.0
+        self._last_sync = 0.0
+        self._backend_version = 0
+        if backend is not None:
+            self._backend_version = backend.version()
+            self._state = backend.load()
     
     def get(self, key: str, default: Any = None) -> Any:
         """
@@ -28,11 +132,30 @@ class StateManager:
             default: Default value if key not found
             
         Returns:
-            State value
+            State value (by reference)
         """
+        self._maybe_sync()
+        if self._read_sets:
+            self._track(key.split('.', 1)[0])
+        batch = self._staged(key)
+        if batch is not None:
+            value = self._lookup(key, _MISSING, batch.view)
+            return default if value is _MISSING else value
+        with self._lock:
+            value = self._lookup(key, _MISSING)
+            if value is _MISSING:
+                return default
+            if isinstance(value, (dict, list)):
+                top = key.split('.', 1)[0]
+                if top not in self._clean:
+                    self._clean[top] = copy.deepcopy(self._state[top])
+            return value
+    
+    def _lookup(self, key: str, default: Any = None, state: Optional[Dict[str, Any]] = None) -> Any:
+        """Get a stored value by reference, without syncing or tracking"""
         try:
             keys = key.split('.')
-            value = self._state
+            value = self._state if state is None else state
             
             for k in keys:
                 if isinstance(value, dict) and k in value:
@@ -52,25 +175,17 @@ class StateManager:
             key: State key (supports dot notation like 'user.name')
             value: Value to set
         """
-        # Save current state to history
-        if len(self._history) >= self._max_history:
-            self._history.pop(0)
-        self._history.append(copy.deepcopy(self._state))
+        batch = self._batch
+        if batch.depth:
+            self._stage(batch, key, value)
+            batch.ops.append(('set', key, value))
+            return
         
-        # Set the value
-        keys = key.split('.')
-        current = self._state
-        
-        for k in keys[:-1]:
-            if k not in current:
-                current[k] = {}
-            current = current[k]
-        
-        old_value = current.get(keys[-1])
-        current[keys[-1]] = value
+        with self._lock:
+            changes = self._write(key, value)
         
         # Notify watchers
-        self._notify_watchers(key, value, old_value)
+        self._dispatch_notifications(changes)
     
     def update(self, updates: Dict[str, Any]) -> None:
         """
@@ -79,40 +194,77 @@ class StateManager:
         Args:
             updates: Dictionary of key-value pairs to update
         """
-        for key, value in updates.items():
-            self.set(key, value)
+        with self.batch():
+            for key, value in updates.items():
+                self.set(key, value)
+    
+    @contextmanager
+    def batch(self) -> Iterator['StateManager']:
+        """
+        Group several writes into one atomic change
+        
+        Writes inside the block are staged: the thread running it reads
+        them back, other threads keep seeing the state from before the
+        block. When the block exits they are applied together under the
+        lock and share a single history entry, and watchers are called
+        once per changed key after the lock is released. If the block
+        raises, its writes are dropped and no watcher is called. Batches
+        may be nested; only the outermost one commits, and an inner one
+        that raises drops only its own writes. undo() and clear() are
+        not staged, and values changed in place are not rolled back.
+        
+        Usage:
+            with state.batch():
+                state.set('form.name', name)
+                state.set('form.email', email)
+        """
+        batch = self._batch
+        ops, view, replaced = len(batch.ops), dict(batch.view), batch.replaced
+        batch.depth += 1
+        batch.owned = {}
+        try:
+            yield self
+        except BaseException:
+            del batch.ops[ops:]
+            batch.view, batch.replaced, batch.owned = view, replaced, {}
+            raise
+        finally:
+            batch.depth -= 1
+        
+        if not batch.depth:
+            staged = batch.ops
+            batch.ops, batch.view, batch.replaced, batch.owned = [], {}, False, {}
+            if staged:
+                self._commit(staged)
+    
+    transaction = batch
     
     def delete(self, key: str) -> bool:
         """
         Delete key from state
         
+        Deletes are recorded in history like writes, so undo() restores
+        the key (and undoing earlier writes below it still applies).
+        
         Args:
             key: State key to delete
             
         Returns:
             True if key was deleted, False if key didn't exist
         """
-        try:
-            keys = key.split('.')
-            current = self._state
-            
-            for k in keys[:-1]:
-                if isinstance(current, dict) and k in current:
-                    current = current[k]
-                else:
-                    return False
-            
-            if keys[-1] in current:
-                old_value = current[keys[-1]]
-                del current[keys[-1]]
-                
-                # Notify watchers
-                self._notify_watchers(key, None, old_value)
-                return True
-            
-            return False
-        except Exception:
-            return False
+        batch = self._batch
+        if batch.depth:
+            if not self._stage(batch, key, _MISSING):
+                return False
+            batch.ops.append(('delete', key, None))
+            return True
+        
+        with self._lock:
+            changes = self._remove(key)
+        
+        # Notify watchers
+        self._dispatch_notifications(changes)
+        return bool(changes)
     
     def has(self, key: str) -> bool:
         """
@@ -124,7 +276,15 @@ class StateManager:
         Returns:
             True if key exists
         """
-        return self.get(key) is not None
+        self._maybe_sync()
+        if self._read_sets:
+            self._track(key.split('.', 1)[0])
+        batch = self._staged(key)
+        if batch is not None:
+            value = self._lookup(key, None, batch.view)
+            return value is not None and value is not _MISSING
+        with self._lock:
+            return self._lookup(key) is not None
     
     def watch(self, key: str, callback: Callable[[str, Any, Any], None]) -> None:
         """
@@ -158,6 +318,15 @@ class StateManager:
                 except ValueError:
                     pass
     
+    def watchers(self) -> Dict[str, List[Callable]]:
+        """
+        Get the registered watchers
+        
+        Returns:
+            Copy of the callbacks by watched key
+        """
+        return {key: list(callbacks) for key, callbacks in self._watchers.items()}
+    
     def get_all(self) -> Dict[str, Any]:
         """
         Get all state data
@@ -165,13 +334,19 @@ class StateManager:
         Returns:
             Copy of entire state dictionary
         """
-        return copy.deepcopy(self._state)
+        self._maybe_sync()
+        self._track(None)
+        with self._lock:
+            return copy.deepcopy(self._visible())
     
     def clear(self) -> None:
         """Clear all state data"""
-        self._state.clear()
-        self._history.clear()
-        self._watchers.clear()
+        with self._lock:
+            self._state.clear()
+            self._clean.clear()
+            self._history.clear()
+            self._watchers.clear()
+            self._touch(None)
     
     def undo(self) -> bool:
         """
@@ -180,19 +355,50 @@ class StateManager:
         Returns:
             True if undo was successful
         """
-        if self._history:
-            self._state = self._history.pop()
-            return True
-        return False
+        with self._lock:
+            if self._history:
+                for patch in reversed(self._history.pop()):
+                    self._restore(patch)
+                    self._touch(patch[0][0] if patch[0] else None)
+                return True
+            return False
     
     def get_history(self) -> List[Dict[str, Any]]:
         """
         Get state history
         
+        Snapshots are reconstructed from the stored inverse patches, so
+        this is the only history operation that copies the whole state.
+        
+        Returns:
+            List of previous state snapshots, oldest first
+        """
+        snapshots = []
+        with self._lock:
+            state = copy.deepcopy(self._state)
+            for entry in reversed(self._history):
+                for path, old_value in reversed(entry):
+                    # Copy old values so later patches cannot change the stored ones
+                    if old_value is not _MISSING:
+                        old_value = copy.deepcopy(old_value)
+                    state = self._apply_patch(state, (path, old_value))
+                snapshots.append(copy.deepcopy(state))
+        snapshots.reverse()
+        return snapshots
+    
+    def copy(self) -> 'StateManager':
+        """
+        Create an independent state manager with a copy of this state
+        
+        Watchers and history are not copied.
+        
         Returns:
-            List of previous state snapshots
+            New StateManager instance
         """
-        return copy.deepcopy(self._history)
+        clone = StateManager(json_encoder=self._json_encoder)
+        with self._lock:
+            clone._state = copy.deepcopy(self._state)
+        return clone
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -210,7 +416,15 @@ class StateManager:
         Args:
             data: Dictionary to load into state
         """
-        self._state = copy.deepcopy(data)
+        data = copy.deepcopy(data)
+        batch = self._batch
+        if batch.depth:
+            batch.view, batch.replaced, batch.owned = dict(data), True, {}
+            batch.ops.append(('replace', None, data))
+            return
+        
+        with self._lock:
+            self._replace(data)
     
     def to_json(self) -> str:
         """
@@ -219,7 +433,10 @@ class StateManager:
         Returns:
             JSON representation of state
         """
-        return json.dumps(self._state, ensure_ascii=False, indent=2)
+        self._maybe_sync()
+        self._track(None)
+        with self._lock:
+            return self._json_encoder(self._visible(), indent=True)
     
     def from_json(self, json_str: str) -> None:
         """
@@ -229,28 +446,431 @@ class StateManager:
             json_str: JSON string to load
         """
         try:
-            data = json.loads(json_str)
+            data = serialization.loads(json_str)
             self.from_dict(data)
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON: {e}")
     
-    def _notify_watchers(self, key: str, new_value: Any, old_value: Any) -> None:
-        """Notify all watchers of a key"""
-        # Notify exact key watchers
-        if key in self._watchers:
-            for callback in self._watchers[key]:
-                try:
-                    callback(key, new_value, old_value)
-                except Exception as e:
-                    print(f"Error in state watcher for key '{key}': {e}")
-        
-        # Notify parent key watchers (for dot notation)
-        key_parts = key.split('.')
-        for i in range(len(key_parts) - 1):
-            parent_key = '.'.join(key_parts[:i + 1])
+    # ==================== Change Tracking ====================
+    
+    @property
+    def version(self) -> int:
+        """Counter increased by every change to the state"""
+        self._maybe_sync()
+        return self._version
+    
+    def key_version(self, key: Optional[str]) -> int:
+        """
+        Get the version a top-level key was last changed at
+        
+        Only changes made through this manager are seen; mutating a
+        value returned by get() in place does not change its version.
+        
+        Args:
+            key: Top-level state key, or None for the whole state
+            
+        Returns:
+            Version number, equal until the key is changed again
+        """
+        self._maybe_sync()
+        if key is None:
+            return self._version
+        return max(self._versions.get(key, 0), self._reset_version)
+    
+    @contextmanager
+    def track_reads(self) -> Iterator[Dict[Optional[str], None]]:
+        """
+        Record which top-level keys are read inside the block
+        
+        Yields a dict whose keys are the top-level keys read so far.
+        A None key means the whole state was read (e.g. by get_all()).
+        
+        Usage:
+            with state.track_reads() as reads:
+                page = build()
+            versions = {key: state.key_version(key) for key in reads}
+        """
+        reads: Dict[Optional[str], None] = {}
+        self._read_sets.append(reads)
+        try:
+            yield reads
+        finally:
+            self._read_sets = [r for r in self._read_sets if r is not reads]
+    
+    def _track(self, key: Optional[str]) -> None:
+        """Record a read of a top-level key in every open tracker"""
+        for reads in self._read_sets:
+            reads[key] = None
+    
+    def _bump(self, key: Optional[str]) -> None:
+        """Increase the version of a top-level key (or everything, for None)"""
+        self._version += 1
+        if key is None:
+            self._reset_version = self._version
+            self._versions.clear()
+        else:
+            self._versions[key] = self._version
+    
+    # ==================== Backend Synchronization ====================
+    
+    def flush(self) -> None:
+        """Write buffered changes to the backend"""
+        with self._lock:
+            if self._backend is None or not (self._dirty or self._replace_all):
+                return
+            
+            if self._replace_all:
+                updates = dict(self._state)
+                deletes: List[str] = []
+            else:
+                updates = {k: self._state[k] for k in self._dirty if k in self._state}
+                deletes = [k for k in self._dirty if k not in self._state]
+            
+            expected = self._backend_version + 1
+            version = self._backend.write(updates, deletes, replace=self._replace_all)
+            self._dirty.clear()
+            self._replace_all = False
+            self._last_flush = time.monotonic()
+            
+            # A gap means another process wrote meanwhile; reload on next sync
+            self._backend_version = version if version == expected else -1
+    
+    def sync(self) -> bool:
+        """
+        Reload state from the backend if another process changed it
+        
+        Keys with unflushed local changes keep their local values. History
+        is dropped on reload since it no longer describes the state.
+        
+        Returns:
+            True if the state was reloaded
+        """
+        with self._lock:
+            if self._backend is None or self._batch_depth:
+                return False
+            
+            self._last_sync = time.monotonic()
+            version = self._backend.version()
+            if version == self._backend_version:
+                return False
+            
+            data = self._backend.load()
+            if self._replace_all:
+                data = self._state
+            else:
+                for key in self._dirty:
+                    if key in self._state:
+                        data[key] = self._state[key]
+                    else:
+                        data.pop(key, None)
+            
+            # Only kept local values may still be held by callers
+            self._clean = {key: value for key, value in self._clean.items() if data.get(key) is self._state.get(key)}
+            self._state = data
+            self._backend_version = version
+            self._history.clear()
+            self._bump(None)
+            return True
+    
+    def revert(self) -> None:
+        """
+        Drop unflushed changes and reload the state from the backend
+        
+        Watchers are not called for the dropped changes.
+        """
+        with self._lock:
+            if self._backend is None or self._batch_depth:
+                return
+            self._dirty.clear()
+            self._replace_all = False
+            self._backend_version = -1
+            self.sync()
+    
+    def _maybe_sync(self) -> None:
+        """Check the backend for changes if sync_interval has elapsed"""
+        if self._backend is None or self._sync_interval is None:
+            return
+        if time.monotonic() - self._last_sync >= self._sync_interval:
+            self.sync()
+    
+    def _maybe_flush(self) -> None:
+        """Write buffered changes if flush_interval has elapsed"""
+        if self._flush_interval is None:
+            return
+        if time.monotonic() - self._last_flush >= self._flush_interval:
+            self.flush()
+    
+    def _touch(self, key: Optional[str]) -> None:
+        """Mark a top-level key (or everything, for None) as changed"""
+        self._bump(key)
+        if self._backend is None:
+            return
+        if key is None:
+            self._replace_all = True
+        else:
+            self._dirty[key] = None
+        if not self._batch_depth:
+            self._maybe_flush()
+    
+    # ==================== Writes ====================
+    
+    def _write(self, key: str, value: Any) -> Dict[str, Tuple[Any, Any]]:
+        """Apply a write under the lock and return the change to notify"""
+        keys = key.split('.')
+        current = self._state
+        patch: Optional[Patch] = None
+        
+        for i, k in enumerate(keys[:-1]):
+            if k not in current:
+                # Undoing removes the topmost container created here
+                if patch is None:
+                    patch = (tuple(keys[:i + 1]), _MISSING)
+                current[k] = {}
+            current = current[k]
+        
+        old_value = current.get(keys[-1])
+        if patch is None:
+            patch = (tuple(keys), self._pristine(tuple(keys)))
+        if len(keys) > 1 and keys[0] not in self._clean:
+            # Nothing records this value as written; keep the caller's
+            # in-place changes out of the stored one instead
+            value = _detach(value)
+        current[keys[-1]] = value
+        
+        # Save inverse patch to history
+        self._record(patch)
+        self._mirror(tuple(keys), value)
+        self._touch(keys[0])
+        return {key: (value, old_value)}
+    
+    def _remove(self, key: str) -> Dict[str, Tuple[Any, Any]]:
+        """Apply a delete under the lock and return the change to notify"""
+        try:
+            keys = key.split('.')
+            current = self._state
+            
+            for k in keys[:-1]:
+                if isinstance(current, dict) and k in current:
+                    current = current[k]
+                else:
+                    return {}
+            
+            if keys[-1] not in current:
+                return {}
+            
+            old_value = current[keys[-1]]
+            patch = (tuple(keys), self._pristine(tuple(keys)))
+            del current[keys[-1]]
+            
+            # Save inverse patch to history
+            self._record(patch)
+            self._mirror(tuple(keys), _MISSING)
+            self._touch(keys[0])
+            return {key: (None, old_value)}
+        except Exception:
+            return {}
+    
+    def _replace(self, data: Dict[str, Any]) -> None:
+        """Replace the whole state under the lock"""
+        old_state = {key: self._clean.get(key, value) for key, value in self._state.items()}
+        self._record(((), old_state))
+        self._state = data
+        self._clean.clear()
+        self._touch(None)
+    
+    def _commit(self, ops: List[Tuple[str, Optional[str], Any]]) -> None:
+        """Apply the operations staged by a batch, then notify watchers"""
+        changes: Dict[str, Tuple[Any, Any]] = {}
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                for kind, key, value in ops:
+                    if kind == 'replace':
+                        self._replace(copy.deepcopy(value))
+                        continue
+                    applied = self._write(key, value) if kind == 'set' else self._remove(key)
+                    for changed, (new_value, old_value) in applied.items():
+                        if changed in changes:
+                            old_value = changes[changed][1]
+                        changes[changed] = (new_value, old_value)
+            except BaseException:
+                # Another thread changed the state under a staged write
+                for patch in reversed(self._pending_patches):
+                    self._restore(patch)
+                    self._bump(patch[0][0] if patch[0] else None)
+                raise
+            finally:
+                self._batch_depth -= 1
+                patches, self._pending_patches = self._pending_patches, []
+            
+            if patches:
+                self._history.append(patches)
+                self._maybe_flush()
+        
+        self._dispatch_notifications(changes)
+    
+    def _staged(self, key: str) -> Optional[_Batch]:
+        """Get this thread's open batch if it staged writes to the key's top-level key"""
+        batch = self._batch
+        if batch.depth and (batch.replaced or key.split('.', 1)[0] in batch.view):
+            return batch
+        return None
+    
+    def _stage(self, batch: _Batch, key: str, value: Any) -> bool:
+        """
+        Apply a write (or a delete, for _MISSING) to a batch's view
+        
+        Dicts on the path are copied rather than changed, so the stored
+        state and the views of enclosing batches stay as they were.
+        
+        Returns:
+            False if a deleted key did not exist
+        """
+        keys = key.split('.')
+        if keys[0] not in batch.view and not batch.replaced:
+            with self._lock:
+                batch.view[keys[0]] = self._state.get(keys[0], _MISSING)
+        
+        parent = batch.view
+        for i, k in enumerate(keys[:-1]):
+            child = parent.get(k, _MISSING)
+            if child is _MISSING or not isinstance(child, dict):
+                if value is _MISSING:
+                    return False
+                if child is not _MISSING:
+                    raise TypeError(f"Cannot set '{key}': '{'.'.join(keys[:i + 1])}' is not a dict")
+                child = {}
+            elif id(child) in batch.owned:
+                parent = child
+                continue
+            else:
+                child = dict(child)
+            batch.owned[id(child)] = child
+            parent[k] = child
+            parent = child
+        
+        if value is not _MISSING:
+            parent[keys[-1]] = value
+        elif parent.get(keys[-1], _MISSING) is _MISSING:
+            return False
+        elif parent is batch.view:
+            parent[keys[-1]] = _MISSING
+        else:
+            del parent[keys[-1]]
+        return True
+    
+    def _visible(self) -> Dict[str, Any]:
+        """Get the state as this thread sees it, with its staged writes"""
+        batch = self._batch
+        if not batch.depth:
+            return self._state
+        state = {} if batch.replaced else dict(self._state)
+        state.update(batch.view)
+        return {key: value for key, value in state.items() if value is not _MISSING}
+    
+    def _record(self, patch: Patch) -> None:
+        """Record an inverse patch in history or in the open batch"""
+        if self._batch_depth:
+            self._pending_patches.append(patch)
+        else:
+            self._history.append([patch])
+    
+    def _pristine(self, path: Tuple[str, ...]) -> Any:
+        """Get the value at a path as last written, ignoring in-place changes by callers"""
+        top = path[0]
+        value: Any = {top: self._clean[top]} if top in self._clean else self._state
+        for k in path:
+            if isinstance(value, dict) and k in value:
+                value = value[k]
+            else:
+                return _MISSING
+        return value
+    
+    def _mirror(self, path: Tuple[str, ...], value: Any) -> None:
+        """
+        Apply a write to the unchanged copies of top-level values
+        
+        Values taken from the copies by _pristine() are replaced here, so
+        patches never share objects with them. This is the one copy a
+        write of a list or dict costs.
+        """
+        if not path:
+            self._clean.clear()
+            return
+        top = path[0]
+        if len(path) == 1:
+            if isinstance(value, (dict, list)):
+                self._clean[top] = copy.deepcopy(value)
+            else:
+                self._clean.pop(top, None)
+            return
+        if top not in self._clean:
+            return
+        
+        current = self._clean[top]
+        for k in path[1:-1]:
+            current = current.setdefault(k, {}) if isinstance(current, dict) else None
+        if not isinstance(current, dict):
+            # Changed in place into another shape; copy it again
+            self._clean[top] = copy.deepcopy(self._state[top])
+        elif value is _MISSING:
+            current.pop(path[-1], None)
+        else:
+            current[path[-1]] = copy.deepcopy(value)
+    
+    def _restore(self, patch: Patch) -> None:
+        """Apply an inverse patch to the state"""
+        self._state = self._apply_patch(self._state, patch)
+        self._mirror(patch[0], patch[1])
+    
+    @staticmethod
+    def _apply_patch(state: Dict[str, Any], patch: Patch) -> Dict[str, Any]:
+        """Apply an inverse patch to state and return the resulting state"""
+        path, old_value = patch
+        if not path:
+            return old_value
+        
+        current = state
+        for k in path[:-1]:
+            current = current[k]
+        
+        if old_value is _MISSING:
+            current.pop(path[-1], None)
+        else:
+            current[path[-1]] = old_value
+        return state
+    
+    def _dispatch_notifications(self, changes: Dict[str, Tuple[Any, Any]]) -> None:
+        """
+        Call watchers once per changed key and once per affected parent key
+        
+        Called without the lock held, so watchers may read and write the
+        state or wait on threads that do.
+        """
+        if not self._watchers:
+            return
+        
+        parent_keys: Dict[str, None] = {}
+        for key, (new_value, old_value) in changes.items():
+            # Notify exact key watchers
+            if key in self._watchers:
+                for callback in list(self._watchers[key]):
+                    try:
+                        callback(key, new_value, old_value)
+                    except Exception as e:
+                        print(f"Error in state watcher for key '{key}': {e}")
+            
+            # Collect parent keys (for dot notation)
+            if '.' in key:
+                key_parts = key.split('.')
+                for i in range(len(key_parts) - 1):
+                    parent_keys['.'.join(key_parts[:i + 1])] = None
+        
+        # Notify parent key watchers
+        for parent_key in parent_keys:
             if parent_key in self._watchers:
                 parent_value = self.get(parent_key)
-                for callback in self._watchers[parent_key]:
+                for callback in list(self._watchers[parent_key]):
                     try:
                         callback(parent_key, parent_value, None)
                     except Exception as e:
@@ -0,0 +1,95 @@
+"""
+App request handling tests for Litchi 0.3.1
+"""
+
+from pathlib import Path
+import importlib
+import json
+import sys
+import time
+
+from werkzeug.http import http_date
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+
+
+class CounterApp(litchi.App):
+    def __init__(self, **options):
+        super().__init__(name='App Test', **options)
+        self.state.set('count', 0)
+    
+    def build(self):
+        return [
+            litchi.Button('Add', id='add').on('click', self.add),
+            litchi.Text(str(self.state.get('count')), id='count')
+        ]
+    
+    def add(self):
+        self.state.set('count', self.state.get('count') + 1)
+
+
+def test_state_etag_is_not_fooled_by_if_modified_since():
+    app = CounterApp(etag='state')
+    client = app._create_flask_app().test_client()
+    
+    page = client.get('/')
+    assert page.status_code == 200
+    assert 'Last-Modified' not in page.headers
+    assert client.get('/', headers={'If-None-Match': page.headers['ETag']}).status_code == 304
+    
+    app.state.set('count', 1)
+    
+    # Changed within the same second as the page was sent
+    headers = {'If-Modified-Since': http_date(time.time())}
+    assert client.get('/', headers=headers).status_code == 200
+    assert client.get('/', headers={'If-None-Match': page.headers['ETag']}).status_code == 200
+
+
+def connect_page(app):
+    """Load the page and subscribe it for server push, like its script does"""
+    client = app._create_flask_app().test_client()
+    client.get('/')
+    with client.session_transaction() as session:
+        session_id = session['_litchi_sid']
+    subscriber = app._push.subscribe(session_id)
+    app._hub.subscribe(subscriber)
+    return client, subscriber
+
+
+def next_message(subscriber):
+    frame = next(subscriber.frames(keepalive=5))
+    assert frame.startswith(b'data: ')
+    return json.loads(frame[len(b'data: '):])
+
+
+def test_push_rerenders_the_page():
+    app = CounterApp(server_push=True)
+    _, subscriber = connect_page(app)
+    
+    assert app.push(state_update={'count': 5}, notification={'message': 'Done'}) == 1
+    
+    message = next_message(subscriber)
+    assert message['notification'] == {'message': 'Done'}
+    assert message['patch'] == [{'op': 'replace', 'path': '/1/children/0', 'value': '5'}]
+    assert app.state.get('count') == 5
+
+
+def test_broadcast_rerenders_every_page_once():
+    app = CounterApp(server_push=True, broadcast_tick=0)
+    app.broadcast_state('count')
+    pages = [connect_page(app)[1] for _ in range(2)]
+    
+    app.state.set('count', 1)
+    for page in pages:
+        message = next_message(page)
+        assert message['state_update'] == {'count': 1}
+        assert message['patch'] == [{'op': 'replace', 'path': '/1/children/0', 'value': '1'}]
+    
+    # The pages now show the same tree, so they share the serialized frame
+    app.state.set('count', 2)
+    first, second = (next(page.frames(keepalive=5)) for page in pages)
+    assert first is second
+    assert json.loads(first[len(b'data: '):])['patch'][0]['value'] == '2'
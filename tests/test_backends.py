@@ -0,0 +1,103 @@
+"""
+Shared state backend tests for Litchi 0.3.1
+
+Each test stands two workers up against one backend, the way several
+processes share it.
+"""
+
+from pathlib import Path
+import importlib
+import sys
+import uuid
+
+import pytest
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+backends = importlib.import_module(f"{ROOT.name}.core.backends")
+StateManager = importlib.import_module(f"{ROOT.name}.core.state").StateManager
+
+
+@pytest.fixture(params=['sqlite', 'shared_memory'])
+def make_backend(request, tmp_path):
+    """Open backends sharing one store, like each worker process does"""
+    opened = []
+    name = f"litchi_test_{uuid.uuid4().hex[:12]}"
+    
+    def make():
+        if request.param == 'sqlite':
+            backend = backends.SQLiteBackend(str(tmp_path / 'state.db'))
+        else:
+            backend = backends.SharedMemoryBackend(name=name, size=1 << 16)
+        opened.append(backend)
+        return backend
+    
+    yield make
+    if request.param == 'shared_memory':
+        opened[0].unlink()
+    for backend in opened:
+        backend.close()
+
+
+def test_managers_sync_through_backend(make_backend):
+    first = StateManager(make_backend(), flush_interval=None, sync_interval=0)
+    second = StateManager(make_backend(), flush_interval=None, sync_interval=0)
+    
+    first.set('count', 1)
+    first.set('form', {'name': 'a'})
+    assert second.get('count') is None
+    
+    first.flush()
+    assert second.get('count') == 1
+    assert second.get('form.name') == 'a'
+    
+    with second.batch():
+        second.set('count', 2)
+        second.delete('form')
+    second.flush()
+    assert first.get_all() == {'count': 2}
+
+
+def test_unflushed_changes_survive_sync(make_backend):
+    first = StateManager(make_backend(), flush_interval=None, sync_interval=None)
+    second = StateManager(make_backend(), flush_interval=None, sync_interval=None)
+    
+    first.set('a', 1)
+    first.flush()
+    second.set('b', 2)
+    
+    assert second.sync() is True
+    assert second.get_all() == {'a': 1, 'b': 2}
+
+
+class CounterApp(litchi.App):
+    def build(self):
+        return [
+            litchi.Button('Add').on('click', self.add),
+            litchi.Text(str(self.state.get('count', 0)))
+        ]
+    
+    def add(self):
+        self.state.set('count', self.state.get('count', 0) + 1)
+
+
+def test_events_reach_any_worker(make_backend):
+    workers = [CounterApp(name='Worker', state_backend=make_backend()) for _ in range(2)]
+    clients = [worker._create_flask_app().test_client() for worker in workers]
+    
+    page = clients[0].get('/').get_data(as_text=True)
+    button = next(
+        component for component in workers[0]._build_components()
+        if isinstance(component, litchi.Button)
+    )
+    assert button.id in page
+    
+    # The page's event lands on the other worker
+    response = clients[1].post('/api/event', json={'event': 'click', 'component_id': button.id})
+    
+    assert response.get_json()['success'] is True
+    workers[1].state.flush()
+    workers[0].state.sync()
+    assert workers[0].state.get('count') == 1
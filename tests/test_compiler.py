@@ -0,0 +1,42 @@
+"""
+Static hoisting tests for Litchi 0.3.1
+"""
+
+from pathlib import Path
+import importlib
+import sys
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+compiler = importlib.import_module(f"{ROOT.name}.core.compiler")
+StateManager = importlib.import_module(f"{ROOT.name}.core.state").StateManager
+
+
+class ListApp(litchi.App):
+    def build(self):
+        return [
+            litchi.Title('Items'),
+            litchi.Card(*[litchi.Text(item) for item in self.state.get('items', [])])
+        ]
+
+
+def test_empty_reads():
+    state = StateManager()
+    state.from_dict({'items': [], 'user': {'name': 'a', 'tags': [None]}, 'count': 0})
+    
+    assert compiler.empty_reads(state, {'items': None, 'count': None, 'missing': None}) == ['items', 'missing']
+    assert compiler.empty_reads(state, {None: None}) == ['items', 'user.tags.0']
+
+
+def test_compile_warns_about_empty_values(capsys):
+    app = ListApp(name='Compile Test')
+    app.state.set('items', [])
+    
+    assert app.compile() == 0
+    assert 'items' in capsys.readouterr().out
+    
+    app.state.set('items', ['a', 'b'])
+    assert app.compile() > 0
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,131 @@
+"""
+Component tree diff tests for Litchi 0.3.1
+
+Patches are applied with a small JSON Patch implementation following
+the client's, so each test checks the patch reproduces the new tree.
+"""
+
+from pathlib import Path
+import copy
+import importlib
+import random
+import sys
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+diff_tree = importlib.import_module(f"{ROOT.name}.core.diff").diff_tree
+
+
+def apply_patch(tree, ops):
+    """Apply JSON Patch operations to a copy of a tree"""
+    tree = copy.deepcopy(tree)
+    
+    def locate(path):
+        keys = [key.replace('~1', '/').replace('~0', '~') for key in path.split('/')[1:]]
+        parent = tree
+        for key in keys[:-1]:
+            parent = parent[int(key)] if isinstance(parent, list) else parent[key]
+        last = keys[-1]
+        return parent, int(last) if isinstance(parent, list) else last
+    
+    for op in ops:
+        parent, key = locate(op['path'])
+        if op['op'] == 'add':
+            value = copy.deepcopy(op['value'])
+            if isinstance(parent, list):
+                parent.insert(key, value)
+            else:
+                parent[key] = value
+        elif op['op'] == 'replace':
+            parent[key] = copy.deepcopy(op['value'])
+        elif op['op'] == 'remove':
+            del parent[key]
+        elif op['op'] == 'move':
+            source, source_key = locate(op['from'])
+            value = source.pop(source_key)
+            parent, key = locate(op['path'])
+            parent.insert(key, value)
+        else:
+            raise AssertionError(f"Unexpected operation {op}")
+    return tree
+
+
+def node(node_id, *children, component='div', **props):
+    return {'id': node_id, 'component': component, 'props': props, 'events': {}, 'children': list(children)}
+
+
+def test_equal_trees():
+    tree = [node('a', 'text', color='red')]
+    
+    assert diff_tree(tree, copy.deepcopy(tree)) == []
+
+
+def test_keyed_insert():
+    old = [node('list', node('a'), node('c'))]
+    new = [node('list', node('a'), node('b'), node('c'))]
+    
+    ops = diff_tree(old, new)
+    
+    assert ops == [{'op': 'add', 'path': '/0/children/1', 'value': node('b')}]
+    assert apply_patch(old, ops) == new
+
+
+def test_keyed_remove():
+    old = [node('list', node('a'), node('b'), node('c'))]
+    new = [node('list', node('a'), node('c'))]
+    
+    ops = diff_tree(old, new)
+    
+    assert ops == [{'op': 'remove', 'path': '/0/children/1'}]
+    assert apply_patch(old, ops) == new
+
+
+def test_keyed_reorder():
+    old = [node('list', node('a'), node('b', 'text'), node('c'))]
+    new = [node('list', node('c'), node('a'), node('b', 'text'))]
+    
+    ops = diff_tree(old, new)
+    
+    assert ops == [{'op': 'move', 'from': '/0/children/2', 'path': '/0/children/0'}]
+    assert apply_patch(old, ops) == new
+
+
+def test_props_only_change():
+    old = [node('a', node('b', 'label', size='large', type='primary'))]
+    new = [node('a', node('b', 'label', size='small', plain=True))]
+    
+    ops = diff_tree(old, new)
+    
+    assert sorted(ops, key=lambda op: op['path']) == [
+        {'op': 'add', 'path': '/0/children/0/props/plain', 'value': True},
+        {'op': 'replace', 'path': '/0/children/0/props/size', 'value': 'small'},
+        {'op': 'remove', 'path': '/0/children/0/props/type'},
+    ]
+    assert apply_patch(old, ops) == new
+
+
+def test_positional_children():
+    old = [node('a', 'one', 'two', node('b'))]
+    new = [node('a', 'one', node('c'))]
+    
+    assert apply_patch(old, diff_tree(old, new)) == new
+
+
+def test_round_trip():
+    rng = random.Random(7)
+    
+    def random_tree(depth):
+        ids = rng.sample('abcdefgh', rng.randint(0, 5))
+        children = [
+            node(f"{depth}{node_id}", *random_tree(depth + 1), color=rng.choice(['red', 'blue']))
+            if depth < 3 else f"text {node_id}"
+            for node_id in ids
+        ]
+        if rng.random() < 0.2:
+            children.append('loose text')
+        return children
+    
+    for _ in range(200):
+        old, new = random_tree(0), random_tree(0)
+        assert apply_patch(old, diff_tree(old, new)) == new
@@ -0,0 +1,144 @@
+"""
+Server-side rendering tests for Litchi 0.3.1
+
+Checks the server markup against what Vue's server renderer produces
+for the client templates. The comparison with Vue itself runs when node
+can load vue (e.g. with NODE_PATH pointing at a node_modules folder).
+"""
+
+from pathlib import Path
+import importlib
+import json
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+ssr = importlib.import_module(f"{ROOT.name}.core.ssr")
+
+
+# Renders a configuration with the client templates, like the page does
+# before hydration
+VUE_SCRIPT = """
+const { createSSRApp, ref } = require('vue');
+const { renderToString } = require('vue/server-renderer');
+const [componentTemplate, rootTemplate, nativeTag, standIns, components] = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+const hydrated = ref(false);
+const app = createSSRApp({ template: rootTemplate, setup: () => ({ components }) });
+app.component('recursive-component', {
+    props: { component: { type: Object, required: true } },
+    setup: (props) => ({
+        bindAttrs: () => ({ ...props.component.props }),
+        rendered: () => hydrated.value || new RegExp(nativeTag).test(props.component.component),
+        standIn: () => standIn(props.component)
+    }),
+    template: componentTemplate
+});
+renderToString(app).then(html => process.stdout.write(html));
+"""
+
+
+def render_config(*components):
+    app = litchi.App(id_mode='path')
+    app.build = lambda: list(components)
+    return app.renderer.render_config(app._build_components(), app)
+
+
+def vue_render(vue_config):
+    if shutil.which('node') is None:
+        pytest.skip('node is not installed')
+    payload = json.dumps([ssr.COMPONENT_TEMPLATE, ssr.ROOT_TEMPLATE, ssr.NATIVE_TAG, ssr.STAND_INS, vue_config])
+    script = VUE_SCRIPT + ssr.STAND_IN_SCRIPT
+    result = subprocess.run(['node', '-e', script], input=payload, capture_output=True, text=True)
+    if 'Cannot find module' in result.stderr:
+        pytest.skip('vue is not installed for node')
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_native_elements():
+    vue_config = render_config(
+        litchi.Text('a < b', tag='p', css_class='lead', style={'color': 'red'}),
+        litchi.Input(),
+    )
+    
+    html = ssr.render_html(vue_config)
+    
+    assert html.startswith('<div><!--[--><p class="lead" style="color: red"><!--[--><span>a &lt; b</span><!--]--></p>')
+
+
+def test_attributes_follow_vue():
+    node = {'component': 'input', 'props': {'disabled': True, 'readonly': False, 'value': 3.0, 'title': True, 'key': 'k'}}
+    
+    assert ssr.render_node(node) == '<input disabled value="3" title="true">'
+
+
+def test_components_are_left_to_the_client():
+    vue_config = render_config(litchi.Button('inside'), litchi.Text('outside'))
+    
+    html = ssr.render_html(vue_config)
+    
+    assert 'inside' not in html
+    assert html == '<div><!--[--><!--v-if--><span><!--[--><span>outside</span><!--]--></span><!--]--></div>'
+
+
+def test_layout_components_render_stand_ins():
+    vue_config = render_config(
+        litchi.Layout().child(
+            litchi.Card(
+                litchi.Row(justify='center').child(litchi.Col(span=12, offset=2).child(litchi.Text('inside'))),
+                header='Title',
+                css_class='panel'
+            )
+        )
+    )
+    
+    html = ssr.render_html(vue_config)
+    
+    assert html == (
+        '<div><!--[--><section class="el-container is-vertical"><!--[-->'
+        '<div class="el-card is-always-shadow panel"><!--[-->'
+        '<div class="el-card__header"><!--[--><span>Title</span><!--]--></div>'
+        '<div class="el-card__body"><!--[-->'
+        '<div class="el-row is-justify-center is-align-top"><!--[-->'
+        '<div class="el-col el-col-12 el-col-offset-2"><!--[-->'
+        '<span><!--[--><span>inside</span><!--]--></span>'
+        '<!--]--></div><!--]--></div><!--]--></div><!--]--></div><!--]--></section><!--]--></div>'
+    )
+
+
+def test_matches_vue_server_renderer():
+    vue_config = render_config(
+        litchi.Title('Heading', level=2),
+        litchi.Card(litchi.Text('inside'), header='Card', css_class='panel', style={'width': '50%'}),
+        litchi.Row(gutter=10).child(litchi.Col(span=8, xs=24).child(litchi.Text('column'))),
+        litchi.Layout(direction='horizontal'),
+        litchi.Text("quotes ' and \"", tag='p', css_class='lead'),
+        litchi.Button('Add', on_click=lambda: None),
+    )
+    
+    assert ssr.render_html(vue_config) == vue_render(vue_config)
+
+
+def test_stand_ins_match_client():
+    if shutil.which('node') is None:
+        pytest.skip('node is not installed')
+    nodes = render_config(
+        litchi.Card(litchi.Text('inside'), header='Card', css_class='panel', style={'width': '50%'}),
+        litchi.Row(gutter=10, align=''),
+        litchi.Col(span=0, offset=1.0, xs=24),
+        litchi.Layout(direction='horizontal'),
+    )
+    script = (
+        f"const standIns = {json.dumps(ssr.STAND_INS)};{ssr.STAND_IN_SCRIPT}"
+        "process.stdout.write(JSON.stringify(JSON.parse(require('fs').readFileSync(0, 'utf8')).map(standIn)));"
+    )
+    result = subprocess.run(['node', '-e', script], input=json.dumps(nodes), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    
+    assert json.loads(result.stdout) == json.loads(json.dumps([ssr.stand_in(node) for node in nodes]))
@@ -0,0 +1,165 @@
+"""
+State manager tests for Litchi 0.3.1
+"""
+
+from pathlib import Path
+import importlib
+import sys
+import threading
+
+import pytest
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+StateManager = importlib.import_module(f"{ROOT.name}.core.state").StateManager
+
+
+def in_thread(target):
+    """Run a function in another thread and return its result"""
+    results = []
+    thread = threading.Thread(target=lambda: results.append(target()), daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive(), 'the other thread is blocked'
+    return results[0]
+
+
+def test_watchers_run_without_the_lock():
+    state = StateManager()
+    seen = []
+    state.watch('count', lambda key, new, old: seen.append(in_thread(lambda: state.get('count'))))
+    
+    state.set('count', 1)
+    with state.batch():
+        state.set('count', 2)
+    
+    assert seen == [1, 2]
+
+
+def test_batch_does_not_block_other_threads():
+    state = StateManager()
+    state.set('form', {'name': 'old'})
+    
+    with state.batch():
+        state.set('form.name', 'new')
+        state.set('count', 1)
+        
+        assert state.get('form.name') == 'new'
+        assert in_thread(lambda: state.get('form.name')) == 'old'
+        assert in_thread(lambda: state.has('count')) is False
+        in_thread(lambda: state.set('other', True))
+    
+    assert state.get_all() == {'form': {'name': 'new'}, 'count': 1, 'other': True}
+
+
+def test_batch_notifies_once_per_key():
+    state = StateManager()
+    state.set('form', {'name': 'a'})
+    calls = []
+    state.watch('form.name', lambda key, new, old: calls.append((key, new, old)))
+    state.watch('form', lambda key, new, old: calls.append((key, new, old)))
+    
+    with state.batch():
+        state.set('form.name', 'b')
+        state.set('form.name', 'c')
+        state.set('form.email', 'x@example.com')
+        assert calls == []
+    
+    assert calls == [('form.name', 'c', 'a'), ('form', {'name': 'c', 'email': 'x@example.com'}, None)]
+    assert len(state.get_history()) == 2
+
+
+def test_batch_rolls_back_on_exception():
+    state = StateManager()
+    state.set('form', {'name': 'a'})
+    calls = []
+    state.watch('form.name', lambda *args: calls.append(args))
+    
+    with pytest.raises(ValueError):
+        with state.batch():
+            state.set('form.name', 'b')
+            state.delete('form')
+            raise ValueError
+    
+    assert state.get_all() == {'form': {'name': 'a'}}
+    assert calls == []
+    assert len(state.get_history()) == 1
+
+
+def test_nested_batches():
+    state = StateManager()
+    calls = []
+    state.watch('a', lambda *args: calls.append(args))
+    
+    with state.batch():
+        state.set('a', 1)
+        with state.batch():
+            state.set('b', 2)
+        with pytest.raises(KeyError):
+            with state.batch():
+                state.set('a', 3)
+                state.set('c', 4)
+                raise KeyError
+        
+        assert state.get_all() == {'a': 1, 'b': 2}
+        assert calls == []
+    
+    assert state.get_all() == {'a': 1, 'b': 2}
+    assert calls == [('a', 1, None)]
+    
+    state.undo()
+    assert state.get_all() == {}
+
+
+def test_undo_after_nested_in_place_change():
+    state = StateManager()
+    state.set('user', {'profile': {'name': 'a', 'tags': []}})
+    
+    user = state.get('user')
+    user['profile']['name'] = 'b'
+    user['profile']['tags'].append('x')
+    state.set('user', user)
+    state.set('user.profile.name', 'c')
+    
+    state.undo()
+    assert state.get('user') == {'profile': {'name': 'b', 'tags': ['x']}}
+    state.undo()
+    assert state.get('user') == {'profile': {'name': 'a', 'tags': []}}
+
+
+def test_undo_restores_values_as_written():
+    state = StateManager()
+    state.set('items', [1])
+    state.get('items').append(2)
+    
+    state.from_dict({'other': True})
+    state.undo()
+    
+    assert state.get_all() == {'items': [1]}
+
+
+def test_history_limit():
+    state = StateManager()
+    for i in range(60):
+        state.set('count', i)
+    
+    assert len(state.get_history()) == 50
+    assert all(state.undo() for _ in range(50))
+    assert state.undo() is False
+    assert state.get('count') == 9
+
+
+def test_delete_is_undoable():
+    state = StateManager()
+    state.set('form.name', 'a')
+    
+    assert state.delete('form') is True
+    assert state.delete('form') is False
+    assert state.get_history()[-1] == {'form': {'name': 'a'}}
+    
+    state.undo()
+    assert state.get('form.name') == 'a'
+    state.undo()
+    assert state.get_all() == {}
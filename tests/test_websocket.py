@@ -0,0 +1,100 @@
+"""
+WebSocket event transport tests for Litchi 0.3.1
+
+Runs an app on a local server and talks to it as a page would.
+"""
+
+from pathlib import Path
+import importlib
+import json
+import sys
+import threading
+import urllib.request
+
+import pytest
+
+pytest.importorskip('flask_sock')
+simple_websocket = pytest.importorskip('simple_websocket')
+
+from werkzeug.serving import make_server
+
+# Import the package from its checkout, whatever the folder is called
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT.parent))
+litchi = importlib.import_module(ROOT.name)
+
+
+class CounterApp(litchi.App):
+    def __init__(self):
+        super().__init__(name='WebSocket Test', websocket=True)
+        self.state.set('count', 0)
+    
+    def build(self):
+        return [
+            litchi.Button('Add', id='add').on('click', self.add),
+            litchi.Text(str(self.state.get('count')), id='count')
+        ]
+    
+    def add(self):
+        self.state.set('count', self.state.get('count') + 1)
+
+
+@pytest.fixture
+def server():
+    app = CounterApp()
+    flask_app = app._create_flask_app()
+    httpd = make_server('127.0.0.1', 0, flask_app, threaded=True)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    
+    # Load the page like a browser, keeping its session cookie for the socket
+    client = flask_app.test_client()
+    with urllib.request.urlopen(f"http://127.0.0.1:{httpd.server_port}/") as response:
+        cookie = response.headers['Set-Cookie'].split(';', 1)[0]
+    client.set_cookie(*cookie.split('=', 1))
+    try:
+        yield app, client, f"ws://127.0.0.1:{httpd.server_port}/api/ws", {'Cookie': cookie}
+    finally:
+        httpd.shutdown()
+        thread.join()
+
+
+def test_events_over_websocket(server):
+    app, _, url, headers = server
+    ws = simple_websocket.Client.connect(url, headers=headers)
+    try:
+        ws.send(json.dumps({'id': 1, 'events': [
+            {'event': 'click', 'component_id': 'add'},
+            {'event': 'click', 'component_id': 'add'}
+        ]}))
+        response = json.loads(ws.receive(timeout=5))
+    finally:
+        ws.close()
+    
+    assert response['id'] == 1
+    assert response['success'] is True
+    assert [result['success'] for result in response['results']] == [True, True]
+    assert 'timestamp' not in response
+    assert app.state.get('count') == 2
+
+
+def test_resent_batch_runs_once(server):
+    app, client, url, headers = server
+    batch = {'id': 'page-1', 'events': [{'event': 'click', 'component_id': 'add'}]}
+    ws = simple_websocket.Client.connect(url, headers=headers)
+    try:
+        ws.send(json.dumps(batch))
+        first = json.loads(ws.receive(timeout=5))
+    finally:
+        ws.close()
+    
+    # The page resends a batch over HTTP when its socket drops before the reply
+    response = client.post('/api/events', json=batch)
+    
+    assert response.status_code == 200
+    assert response.get_json()['results'][0]['success'] is True
+    assert first['results'][0]['success'] is True
+    assert app.state.get('count') == 1
+    
+    response = client.post('/api/events', json={**batch, 'id': 'page-2'})
+    assert app.state.get('count') == 2